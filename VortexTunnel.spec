@@ -3,7 +3,7 @@ from PyInstaller.utils.hooks import collect_all
 
 datas = [('src', 'src')]
 binaries = []
-hiddenimports = ['PyQt6', 'PyQt6.QtCore', 'PyQt6.QtWidgets', 'PyQt6.QtGui', 'src', 'src.tabs', 'src.tabs.drawing_tab', 'src.tabs.chat_tab', 'src.tabs.file_tab', 'src.tabs.canvas_widget', 'src.network', 'src.network.tailscale_manager', 'src.utils', 'src.utils.theme_manager', 'src.utils.config_manager']
+hiddenimports = ['PyQt6', 'PyQt6.QtCore', 'PyQt6.QtWidgets', 'PyQt6.QtGui', 'src', 'src.tabs', 'src.tabs.drawing_tab', 'src.tabs.chat_tab', 'src.tabs.file_tab', 'src.tabs.canvas_widget', 'src.tabs.stroke_batcher', 'src.tabs.canvas_geometry', 'src.tabs.tile_cache', 'src.tabs.tiled_canvas', 'src.tabs.op_log', 'src.tabs.stroke_store', 'src.tabs.paint_batch', 'src.network', 'src.network.tailscale_manager', 'src.network.protocol', 'src.network.file_transfer', 'src.network.outbound', 'src.network.stroke_codec', 'src.network.transport', 'src.network.session', 'src.network.stats', 'src.network.reassembly', 'src.network.inbound', 'src.network.registry', 'src.network.tailscale_status', 'src.network.hub', 'src.network.group', 'src.network.mesh', 'src.network.datagram', 'src.utils', 'src.utils.theme_manager', 'src.utils.config_manager', 'src.utils.logger']
 tmp_ret = collect_all('PyQt6')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 
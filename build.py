@@ -41,11 +41,34 @@ def build_executable():
         "--hidden-import=src.tabs.chat_tab",
         "--hidden-import=src.tabs.file_tab",
         "--hidden-import=src.tabs.canvas_widget",
+        "--hidden-import=src.tabs.stroke_batcher",
+        "--hidden-import=src.tabs.canvas_geometry",
+        "--hidden-import=src.tabs.tile_cache",
+        "--hidden-import=src.tabs.tiled_canvas",
+        "--hidden-import=src.tabs.op_log",
+        "--hidden-import=src.tabs.stroke_store",
+        "--hidden-import=src.tabs.paint_batch",
         "--hidden-import=src.network",
         "--hidden-import=src.network.tailscale_manager",
+        "--hidden-import=src.network.protocol",
+        "--hidden-import=src.network.file_transfer",
+        "--hidden-import=src.network.outbound",
+        "--hidden-import=src.network.stroke_codec",
+        "--hidden-import=src.network.transport",
+        "--hidden-import=src.network.session",
+        "--hidden-import=src.network.stats",
+        "--hidden-import=src.network.reassembly",
+        "--hidden-import=src.network.inbound",
+        "--hidden-import=src.network.registry",
+        "--hidden-import=src.network.tailscale_status",
+        "--hidden-import=src.network.hub",
+        "--hidden-import=src.network.group",
+        "--hidden-import=src.network.mesh",
+        "--hidden-import=src.network.datagram",
         "--hidden-import=src.utils",
         "--hidden-import=src.utils.theme_manager",
         "--hidden-import=src.utils.config_manager",
+        "--hidden-import=src.utils.logger",
         "--collect-all=PyQt6",
         "main.py"
     ]
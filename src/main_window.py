@@ -11,7 +11,7 @@ from PyQt6.QtWidgets import (
     QMessageBox, QFileDialog, QSplitter, QFrame
 )
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
-from PyQt6.QtGui import QIcon, QPalette, QColor, QFont
+from PyQt6.QtGui import QIcon, QPalette, QColor, QFont, QKeySequence, QShortcut
 
 from tabs.drawing_tab import DrawingTab
 from tabs.chat_tab import ChatTab
@@ -19,6 +19,7 @@ from tabs.file_tab import FileTab
 from network.tailscale_manager import TailscaleManager
 from utils.theme_manager import ThemeManager
 from utils.config_manager import ConfigManager
+from utils import logger
 
 
 class MainWindow(QMainWindow):
@@ -31,8 +32,10 @@ class MainWindow(QMainWindow):
         super().__init__()
         print("🔧 Initializing MainWindow...")
         self.config_manager = ConfigManager()
+        self.setup_logging()
         self.theme_manager = ThemeManager()
         self.tailscale_manager = TailscaleManager()
+        self.tailscale_manager.probe_tailscale()
         print("✅ Managers initialized")
         
         self.init_ui()
@@ -68,6 +71,12 @@ class MainWindow(QMainWindow):
         
         # Status bar
         self.statusBar().showMessage("Ready")
+        self.link_label = QLabel()
+        self.statusBar().addPermanentWidget(self.link_label)
+        
+        # Debug diagnostics can be switched on while the app runs
+        self.diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        self.diagnostics_shortcut.activated.connect(self.toggle_diagnostics)
         
     def create_toolbar(self, parent_layout):
         """Create the top toolbar with controls."""
@@ -84,7 +93,7 @@ class MainWindow(QMainWindow):
         # Connection role selection
         role_label = QLabel("Role:")
         self.role_combo = QComboBox()
-        self.role_combo.addItems(["Auto", "Host", "Client"])
+        self.role_combo.addItems(["Auto", "Host", "Client", "Hub", "Mesh"])
         self.role_combo.currentTextChanged.connect(self.on_role_changed)
         
         # Connection button
@@ -136,17 +145,31 @@ class MainWindow(QMainWindow):
         )
         print("✅ Connection status signal connected")
         
+        self.tailscale_manager.connection_failed.connect(
+            self.on_connection_failed
+        )
+        print("✅ Connection failed signal connected")
+        
+        self.tailscale_manager.connection_interrupted.connect(
+            self.on_connection_interrupted
+        )
+        print("✅ Connection interrupted signal connected")
+        
         # Connect network received signals to tabs
         self.tailscale_manager.message_received.connect(
             self.chat_tab.receive_message
         )
         print("✅ Chat message signal connected")
         
-        self.tailscale_manager.drawing_data_received.connect(
-            self.drawing_tab.receive_drawing_data
+        self.tailscale_manager.drawing_batch_received.connect(
+            self.drawing_tab.receive_drawing_batch
         )
         print("✅ Drawing data signal connected")
         
+        self.tailscale_manager.ephemeral_batch_received.connect(
+            self.drawing_tab.receive_ephemeral_batch
+        )
+        
         self.tailscale_manager.file_received.connect(
             self.file_tab.receive_file
         )
@@ -158,6 +181,10 @@ class MainWindow(QMainWindow):
         )
         print("✅ Drawing data sent signal connected")
         
+        self.drawing_tab.ephemeral_data_sent.connect(
+            self.tailscale_manager.send_ephemeral
+        )
+        
         self.chat_tab.message_sent.connect(
             self.tailscale_manager.send_message
         )
@@ -168,8 +195,37 @@ class MainWindow(QMainWindow):
         )
         print("✅ File sent signal connected")
         
+        self.tailscale_manager.file_send_progress.connect(
+            self.file_tab.update_send_progress
+        )
+        print("✅ File progress signal connected")
+        
+        self.tailscale_manager.send_congestion_changed.connect(
+            self.on_send_congestion_changed
+        )
+        print("✅ Send congestion signal connected")
+        
+        self.tailscale_manager.link_stats_updated.connect(
+            self.on_link_stats_updated
+        )
+        print("✅ Link stats signal connected")
+        
         print("🎉 All signal connections established!")
         
+    def setup_logging(self):
+        """Configure log levels and the optional log file from settings."""
+        log_settings = self.config_manager.get_log_settings()
+        self.log_level = log_settings['level']
+        logger.setup_logging(
+            level=self.log_level, levels=log_settings['levels'], log_file=log_settings['file']
+        )
+        
+    def toggle_diagnostics(self):
+        """Switch debug logging on or off."""
+        enabled = not logger.diagnostics_enabled()
+        logger.set_diagnostics(enabled, self.log_level)
+        self.statusBar().showMessage(f"Debug logging {'on' if enabled else 'off'}", 3000)
+        
     def load_settings(self):
         """Load application settings."""
         settings = self.config_manager.load_settings()
@@ -200,6 +256,8 @@ class MainWindow(QMainWindow):
         if role_index >= 0:
             self.role_combo.setCurrentIndex(role_index)
             
+        self.drawing_tab.canvas.set_memory_budget(self.config_manager.get_canvas_memory_budget())
+            
     def save_settings(self):
         """Save application settings."""
         settings = {
@@ -224,10 +282,9 @@ class MainWindow(QMainWindow):
         self.statusBar().showMessage(f"Connecting as {profile}...")
         
         try:
+            # Connecting happens in the background; the button cancels it meanwhile
             self.tailscale_manager.connect(profile)
-            self.connect_btn.setText("Disconnect")
-            self.statusBar().showMessage("Connected!")
-            print("✅ Connection successful!")
+            self.connect_btn.setText("Cancel")
         except Exception as e:
             print(f"❌ Connection failed: {e}")
             QMessageBox.critical(self, "Connection Error", str(e))
@@ -265,17 +322,60 @@ class MainWindow(QMainWindow):
         
     def on_role_changed(self, role):
         """Handle role selection change."""
+        self.config_manager.set_connection_role(role.lower())
         self.statusBar().showMessage(f"Role changed to: {role}")
         
     def on_connection_status_changed(self, connected):
         """Handle connection status changes."""
         if connected:
+            self.connect_btn.setText("Disconnect")
             self.statusBar().showMessage("Connected to peer")
+            print("✅ Connection successful!")
         else:
+            self.connect_btn.setText("Connect")
             self.statusBar().showMessage("Disconnected from peer")
+            self.link_label.clear()
             
+    def on_connection_interrupted(self):
+        """Show that the connection dropped and is being re-established."""
+        self.connect_btn.setText("Cancel")
+        self.statusBar().showMessage("Connection lost - reconnecting...")
+        
+    def on_connection_failed(self, error):
+        """Handle a connection attempt that failed in the background."""
+        print(f"❌ Connection failed: {error}")
+        self.connect_btn.setText("Connect")
+        QMessageBox.critical(self, "Connection Error", error)
+        self.statusBar().showMessage("Connection failed")
+            
+    def on_send_congestion_changed(self, congested):
+        """Throttle bulk sends while the outbound queue is backed up."""
+        self.file_tab.send_file_btn.setEnabled(not congested)
+        if congested:
+            self.statusBar().showMessage("Network busy - sending is being throttled")
+        elif self.tailscale_manager.connected:
+            self.statusBar().showMessage("Connected to peer")
+            
+    def on_link_stats_updated(self, stats):
+        """Show live latency and throughput next to the status message."""
+        if stats['rtt_ms'] is None:
+            latency = "RTT --"
+        else:
+            latency = f"RTT {stats['rtt_ms']:.0f} ms ± {stats['jitter_ms']:.0f} ms"
+        if 'peers' in stats:
+            latency = f"{stats['peers']} peers  {latency}"
+        self.link_label.setText(
+            f"{latency}  ↑ {self.file_tab.format_file_size(stats['send_rate'])}/s"
+            f"  ↓ {self.file_tab.format_file_size(stats['receive_rate'])}/s"
+        )
+        
     def closeEvent(self, event):
         """Handle application close event."""
         self.save_settings()
-        self.tailscale_manager.disconnect()
-        event.accept() 
\ No newline at end of file
+        self.config_manager.flush()
+        self.tailscale_manager.shutdown()
+        self.drawing_tab.canvas.shutdown()
+        self.file_tab.shutdown()
+        logger.shutdown_logging()
+        event.accept() 
+
@@ -0,0 +1,126 @@
+"""
+Lossy side channel for Vortex Tunnel.
+Sends cursors and stroke previews as UDP datagrams, where only the latest value counts.
+"""
+
+import asyncio
+import os
+import threading
+
+from network import protocol
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+SEQUENCE_MASK = 0xFFFFFFFF
+
+
+def is_newer(seq, last):
+    """Return True if seq comes after last, allowing for wrap-around."""
+    return 0 < (seq - last) & SEQUENCE_MASK < 0x80000000
+
+
+class DatagramChannel(asyncio.DatagramProtocol):
+    """Latest-value-wins updates over UDP, next to the reliable stream.
+    
+    A lost datagram is never sent again; the next update replaces it, so a
+    lossy link costs a skipped cursor position instead of a stall behind a
+    retransmit. Every sender numbers its datagrams and a receiver drops any
+    that is not newer than the last one it applied for that sender and
+    type, so reordering never moves a cursor backwards. Updates queued
+    faster than the loop sends them are coalesced to the latest per type.
+    
+    Datagrams are only accepted from added peers, so nothing outside the
+    session can inject updates. Anything that must arrive stays on the
+    reliable stream.
+    """
+    
+    def __init__(self, on_update, sender_id=None):
+        self.on_update = on_update
+        self.sender_id = sender_id or int.from_bytes(os.urandom(4), 'big') or 1
+        self.seq = 0
+        self.peers = set()
+        self.latest = {}  # (sender id, datagram type) -> last sequence applied
+        self.pending = {}  # datagram type -> payload waiting to be sent
+        self.lock = threading.Lock()
+        self.scheduled = False
+        self.stale = 0
+        self.transport = None
+        self.loop = None
+        
+    async def open(self, host, port):
+        """Bind the channel; returns the port bound."""
+        self.loop = asyncio.get_running_loop()
+        await self.loop.create_datagram_endpoint(lambda: self, local_addr=(host, port))
+        port = self.transport.get_extra_info('sockname')[1]
+        logger.info("✅ Side channel listening on UDP port %s", port)
+        return port
+        
+    def connection_made(self, transport):
+        """Remember the transport once the socket is bound."""
+        self.transport = transport
+        
+    def add_peer(self, host, port):
+        """Send updates to a peer and accept updates from it; runs on the loop."""
+        self.peers.add((host, port))
+        
+    def remove_peer(self, host, port):
+        """Stop exchanging updates with a peer; runs on the loop."""
+        self.peers.discard((host, port))
+        
+    def send(self, dgram_type, payload):
+        """Queue an update, replacing one of the same type not sent yet; safe to call from any thread."""
+        # Checked here so an oversized update fails its caller rather than the flush
+        if protocol.DATAGRAM.size + len(payload) > protocol.MAX_DATAGRAM_SIZE:
+            raise ValueError(f"Datagram payload too large: {len(payload)} bytes")
+        with self.lock:
+            self.pending[dgram_type] = payload
+            if self.scheduled or self.loop is None:
+                return
+            self.scheduled = True
+        self.loop.call_soon_threadsafe(self.flush)
+        
+    def flush(self):
+        """Send the latest queued update of each type to every peer; runs on the loop."""
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+            self.scheduled = False
+        if self.transport is None:
+            return
+        for dgram_type, payload in pending.items():
+            self.seq = (self.seq + 1) & SEQUENCE_MASK
+            datagram = protocol.encode_datagram(self.sender_id, self.seq, dgram_type, payload)
+            for peer in self.peers:
+                self.transport.sendto(datagram, peer)
+                
+    def datagram_received(self, data, addr):
+        """Apply an update from a known peer unless a newer one was already applied."""
+        if addr[:2] not in self.peers:
+            return
+        try:
+            sender_id, seq, dgram_type, payload = protocol.decode_datagram(data)
+        except ValueError:
+            return
+        key = (sender_id, dgram_type)
+        last = self.latest.get(key)
+        if last is not None and not is_newer(seq, last):
+            self.stale += 1
+            return
+        self.latest[key] = seq
+        try:
+            self.on_update(sender_id, dgram_type, payload)
+        except Exception as e:
+            logger.debug("❌ Dropping datagram type %d from %s: %s", dgram_type, addr, e)
+            
+    def error_received(self, exc):
+        """Log a socket error; the channel carries on."""
+        # An unreachable peer shows up here as ICMP; the next update just tries again
+        logger.debug("🔇 Side channel error: %s", exc)
+        
+    def close(self):
+        """Close the socket; runs on the loop."""
+        if self.transport:
+            self.transport.close()
+            self.transport = None
@@ -0,0 +1,286 @@
+"""
+Chunked file transfer for Vortex Tunnel.
+Streams files from disk as offer, chunk and end frames and reassembles them on disk.
+"""
+
+import os
+import mmap
+import atexit
+import shutil
+import hashlib
+import itertools
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+
+from network import protocol
+
+
+# Small enough that one chunk on the wire never delays interactive frames for long
+CHUNK_SIZE = 16 * 1024
+
+# Chunks read and hashed ahead of the writer when reading on an executor
+READ_AHEAD = 8
+
+
+class FileSender:
+    """Streams a file from disk as a sequence of transfer frames."""
+    
+    _transfer_ids = itertools.count(1)
+    
+    def __init__(self, file_path, file_name, chunk_size=CHUNK_SIZE):
+        self.transfer_id = next(self._transfer_ids)
+        self.file_path = file_path
+        self.file_name = file_name
+        self.file_size = os.path.getsize(file_path)
+        self.chunk_size = chunk_size
+        self.bytes_sent = 0
+        
+    def frames(self, executor=None):
+        """Yield (message type, payload parts) frames for the whole transfer.
+        
+        Chunk data is a view into the memory-mapped file. The views stay
+        valid after the generator moves on: the transport may still be
+        writing them, and the retransmit buffer holds them until the peer
+        acknowledges them. So the mapping must never be released eagerly;
+        it is freed once the last view is dropped.
+        
+        Given an executor with a single worker, chunks are read and hashed
+        on it, up to READ_AHEAD ahead, so page faults and SHA-256 stay off
+        the caller's thread. While the next chunk is not ready its Future
+        is yielded in place of a frame; ask again once it is done.
+        """
+        digest = hashlib.sha256()
+        yield protocol.MSG_FILE_OFFER, protocol.encode_file_offer(
+            self.transfer_id, self.file_size, self.file_name
+        )
+        
+        with open(self.file_path, 'rb') as f:
+            for item in self.hashed_chunks(self.read_chunks(f), digest, executor):
+                if isinstance(item, Future):
+                    yield item
+                    continue
+                offset, chunk = item
+                self.bytes_sent = offset + len(chunk)
+                yield protocol.MSG_FILE_CHUNK, (
+                    protocol.encode_file_chunk_header(self.transfer_id, offset),
+                    chunk
+                )
+                
+        yield protocol.MSG_FILE_END, protocol.encode_file_end(
+            self.transfer_id, digest.digest()
+        )
+        
+    def hashed_chunks(self, chunks, digest, executor=None):
+        """Yield (offset, chunk) pairs once each is hashed, or the Future of one still on the executor."""
+        if executor is None:
+            for offset, chunk in chunks:
+                digest.update(chunk)
+                yield offset, chunk
+            return
+            
+        def read_next():
+            # One worker runs these in order, so chunks are hashed in file order
+            for offset, chunk in chunks:
+                digest.update(chunk)
+                return offset, chunk
+            return None
+            
+        pending = deque(executor.submit(read_next) for _ in range(READ_AHEAD))
+        try:
+            while True:
+                if not pending[0].done():
+                    yield pending[0]
+                    continue
+                item = pending.popleft().result()
+                if item is None:
+                    return
+                pending.append(executor.submit(read_next))
+                yield item
+        finally:
+            for future in pending:
+                future.cancel()
+                
+                
+    def read_chunks(self, f):
+        """Yield (offset, chunk) pairs, memory-mapping the file where possible."""
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and special files cannot be mapped
+            mapped = None
+            
+        if mapped is None:
+            offset = 0
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield offset, chunk
+                offset += len(chunk)
+            return
+            
+        # The transport may still hold a chunk after it has been written, so the
+        # views are not released here; the mapping is freed with the last of them
+        if hasattr(mapped, 'madvise'):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        view = memoryview(mapped)
+        for offset in range(0, len(view), self.chunk_size):
+            yield offset, view[offset:offset + self.chunk_size]
+
+
+class IncomingTransfer:
+    """State of a single file being received."""
+    
+    def __init__(self, transfer_id, file_name, file_size, download_dir):
+        self.transfer_id = transfer_id
+        self.file_name = file_name
+        self.file_size = file_size
+        self.bytes_received = 0
+        self.digest = hashlib.sha256()
+        handle, self.path = tempfile.mkstemp(suffix='.part', dir=download_dir)
+        self.file = os.fdopen(handle, 'wb')
+        
+    def write(self, offset, data):
+        """Append a chunk of file data."""
+        if offset != self.bytes_received:
+            raise ValueError(
+                f"Out of order chunk for {self.file_name}: "
+                f"expected offset {self.bytes_received}, got {offset}"
+            )
+        if self.bytes_received + len(data) > self.file_size:
+            raise ValueError(f"Received more data than offered for {self.file_name}")
+        self.file.write(data)
+        self.digest.update(data)
+        self.bytes_received += len(data)
+        
+    def finish(self, expected_digest):
+        """Close the file and verify its size and checksum."""
+        self.file.close()
+        if self.bytes_received != self.file_size:
+            raise ValueError(
+                f"Incomplete transfer for {self.file_name}: "
+                f"{self.bytes_received} of {self.file_size} bytes"
+            )
+        if self.digest.digest() != bytes(expected_digest):
+            raise ValueError(f"Checksum mismatch for {self.file_name}")
+            
+    def discard(self):
+        """Close and delete the partially received file."""
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ReceivedFiles:
+    """Completed transfers waiting in the download directory for the user.
+    
+    Each received file stays there until it is saved, which moves it out,
+    or discarded. Whatever is left is deleted at interpreter exit.
+    """
+    
+    def __init__(self):
+        self.paths = set()
+        self.lock = threading.Lock()
+        atexit.register(self.discard_all)
+        
+    def __contains__(self, path):
+        return path in self.paths
+        
+    def add(self, path):
+        """Take ownership of a received file."""
+        with self.lock:
+            self.paths.add(path)
+            
+    def save(self, path, destination):
+        """Move a received file to where the user chose; returns where it now is."""
+        with self.lock:
+            if path not in self.paths:
+                # Saved before, so copy it from there again
+                shutil.copyfile(path, destination)
+                return destination
+            shutil.move(path, destination)
+            self.paths.discard(path)
+        return destination
+        
+    def discard(self, path):
+        """Delete a received file the user did not save."""
+        with self.lock:
+            self.paths.discard(path)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+            
+    def discard_all(self):
+        """Delete every received file not saved yet."""
+        with self.lock:
+            paths = list(self.paths)
+        for path in paths:
+            self.discard(path)
+
+
+class FileReceiver:
+    """Reassembles incoming file transfers into files on disk."""
+    
+    def __init__(self, download_dir=None):
+        if download_dir is None:
+            download_dir = Path(tempfile.gettempdir()) / "vortex_tunnel"
+        self.download_dir = Path(download_dir)
+        self.transfers = {}
+        
+    def handle_offer(self, payload):
+        """Start a new transfer from a file offer frame."""
+        transfer_id, file_size, file_name = protocol.decode_file_offer(payload)
+        if transfer_id in self.transfers:
+            raise ValueError(f"File transfer {transfer_id} is already in progress")
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        transfer = IncomingTransfer(transfer_id, file_name, file_size, self.download_dir)
+        self.transfers[transfer_id] = transfer
+        return transfer
+        
+    def handle_chunk(self, payload):
+        """Write a chunk frame to its transfer."""
+        transfer_id, offset, data = protocol.decode_file_chunk(payload)
+        transfer = self.get_transfer(transfer_id)
+        try:
+            transfer.write(offset, data)
+        except Exception:
+            self.abort(transfer_id)
+            raise
+        return transfer
+        
+    def handle_end(self, payload):
+        """Complete and verify a transfer from its end frame."""
+        transfer_id, expected_digest = protocol.decode_file_end(payload)
+        transfer = self.transfers.pop(transfer_id, None)
+        if transfer is None:
+            raise ValueError(f"Unknown file transfer: {transfer_id}")
+        try:
+            transfer.finish(expected_digest)
+        except Exception:
+            transfer.discard()
+            raise
+        return transfer
+        
+    def get_transfer(self, transfer_id):
+        """Look up an in-progress transfer."""
+        transfer = self.transfers.get(transfer_id)
+        if transfer is None:
+            raise ValueError(f"Unknown file transfer: {transfer_id}")
+        return transfer
+        
+    def abort(self, transfer_id):
+        """Abort a transfer and delete its partial file."""
+        transfer = self.transfers.pop(transfer_id, None)
+        if transfer:
+            transfer.discard()
+            
+    def abort_all(self):
+        """Abort every in-progress transfer."""
+        for transfer_id in list(self.transfers):
+            self.abort(transfer_id)
@@ -0,0 +1,268 @@
+"""
+Peer groups for Vortex Tunnel.
+Serves many peer links from one event loop; the base for hub and mesh modes.
+"""
+
+import asyncio
+import functools
+import itertools
+
+from network import protocol
+from network.outbound import Frame, OutboundQueue, fragment_frames
+from network.reassembly import REASSEMBLY_BUDGET, Reassembler
+from network.session import Session
+from network.stats import LinkStats
+from network.stroke_codec import StrokePalette
+from network.transport import HEARTBEAT_INTERVAL, HEARTBEAT_TIMEOUT, FrameProtocol, PeerConnection
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Keep a disconnected member's session this long so it can resume
+MEMBER_TIMEOUT = 120
+
+# File transfers only run over a single peer link, so groups refuse these
+FILE_TYPES = frozenset({protocol.MSG_FILE_OFFER, protocol.MSG_FILE_CHUNK, protocol.MSG_FILE_END})
+
+
+class GroupMember:
+    """Everything a group keeps for one peer: session, send queue, stats and receive state."""
+    
+    def __init__(self, key, name, reassembly_budget=REASSEMBLY_BUDGET, origin=None):
+        self.key = key
+        self.name = name
+        # Identifies the member to others when its messages are passed on
+        self.origin = origin
+        self.relay_seq = itertools.count(1)
+        self.session = Session()
+        self.stats = LinkStats()
+        self.queue = None
+        self.connection = None
+        self.expiry = None
+        self.reset(reassembly_budget)
+        
+    def reset(self, reassembly_budget):
+        """Start the member's queue and receive state over for a new session."""
+        if self.queue:
+            self.queue.close()
+        self.queue = OutboundQueue()
+        self.reassembler = Reassembler(budget=reassembly_budget)
+        self.palette = StrokePalette()
+
+
+class PeerGroup:
+    """Accepts many peers at once and sends to all of them.
+    
+    Every member gets its own session, send queue, link stats and receive
+    state, all served by the engine's one event loop, so dozens of members
+    cost no extra threads. A member that drops keeps its session for
+    member_timeout seconds and resumes without loss if it reconnects.
+    
+    Messages sent to the group are encoded once into a frame that all
+    members' queues share. A member whose queue overflows is dropped rather
+    than allowed to hold the others back. Received messages are delivered
+    through on_message(msg_type, payload, sender), sender being the origin
+    id of the node that sent them; subclasses decide what else happens to
+    them.
+    """
+    
+    def __init__(self, on_message, on_members_changed=None, on_stats=None,
+                 max_frame_size=protocol.MAX_FRAME_SIZE, reassembly_budget=REASSEMBLY_BUDGET,
+                 member_timeout=MEMBER_TIMEOUT, heartbeat_interval=HEARTBEAT_INTERVAL,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        self.on_message = on_message
+        self.on_members_changed = on_members_changed
+        self.on_stats = on_stats
+        self.max_frame_size = max_frame_size
+        self.reassembly_budget = reassembly_budget
+        self.member_timeout = member_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.members = {}
+        # Rebuilt on every membership change so other threads can iterate it safely
+        self.member_list = ()
+        self.server = None
+        self.stats_task = None
+        self.loop = None
+        self.port = None
+        
+    async def start(self, host, port):
+        """Start accepting members; returns the port listened on."""
+        self.loop = asyncio.get_running_loop()
+        self.server = await self.loop.create_server(
+            lambda: FrameProtocol(on_connected=self.on_connected, max_frame_size=self.max_frame_size),
+            host, port, reuse_address=True
+        )
+        if self.on_stats and self.heartbeat_interval:
+            self.stats_task = asyncio.ensure_future(self.report_stats())
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info("✅ %s listening on port %s", type(self).__name__, self.port)
+        return self.port
+        
+    def on_connected(self, connection):
+        """Handshake with a new connection in the background."""
+        asyncio.ensure_future(self.admit(connection))
+        
+    async def admit(self, connection, timeout=10):
+        """Match a connection to its member by the hello and start serving it."""
+        peername = connection.transport.get_extra_info('peername')
+        try:
+            msg_type, _, _, _, payload = await asyncio.wait_for(connection.next_backlogged(), timeout)
+            if msg_type != protocol.MSG_HELLO or len(payload) != protocol.HELLO.size:
+                raise ValueError(f"Expected a session hello, got frame type {msg_type}")
+        except Exception as e:
+            logger.warning("❌ Rejected %s: %s", peername, e)
+            connection.close()
+            return
+            
+        peer_id = protocol.decode_hello(payload)[0]
+        member = self.members.get(peer_id)
+        if member is None:
+            member = GroupMember(peer_id, f"{peer_id:x}", self.reassembly_budget, peer_id & 0xFFFFFFFF)
+            self.add_member(member)
+            
+        # The member sent its hello first, so it is already waiting for ours
+        connection.write_frame(Frame(protocol.MSG_HELLO, member.session.hello(), channel=protocol.CHANNEL_CONTROL))
+        try:
+            resumed = member.session.resume(payload)
+        except ValueError as e:
+            logger.warning("❌ Rejected %s: %s", peername, e)
+            connection.close()
+            self.drop(member, "sent an invalid hello")
+            return
+        logger.info("✅ %s %s (%d members)", 'Resumed' if resumed else 'Accepted', peername, len(self.members))
+        self.serve(member, connection, resumed)
+        
+    def add_member(self, member):
+        """Start keeping a new member."""
+        self.members[member.key] = member
+        self.update_members()
+        
+    def serve(self, member, connection, resumed):
+        """Run a member's session over a connection that has exchanged hellos."""
+        if member.expiry:
+            member.expiry.cancel()
+            member.expiry = None
+        if member.connection:
+            # The member reconnected before the old link was noticed as dead
+            member.connection.close()
+        if not resumed:
+            member.reset(self.reassembly_budget)
+        member.connection = PeerConnection(
+            connection, member.queue, functools.partial(self.on_member_frame, member),
+            on_closed=functools.partial(self.on_member_closed, member),
+            session=member.session, stats=member.stats,
+            heartbeat_interval=self.heartbeat_interval, heartbeat_timeout=self.heartbeat_timeout
+        )
+        member.connection.task = asyncio.ensure_future(member.connection.run())
+        
+    def on_member_frame(self, member, msg_type, flags, channel, payload):
+        """Deliver a member's message locally."""
+        try:
+            payload = member.reassembler.feed(msg_type, flags, channel, payload)
+            if payload is not None:
+                self.deliver(member, msg_type, payload)
+        except Exception as e:
+            logger.error("❌ Dropping a type %d message from member %s: %s", msg_type, member.name, e)
+            
+    def deliver(self, member, msg_type, payload, sender=None):
+        """Hand a member's message to on_message, refusing file transfers.
+        
+        sender defaults to the member itself.
+        """
+        if msg_type in FILE_TYPES:
+            raise ValueError("file transfer is not available in a group")
+        self.on_message(msg_type, payload, member.origin if sender is None else sender)
+        
+    def send(self, msg_type, payload, channel=protocol.CHANNEL_INTERACTIVE):
+        """Encode a message once and queue it for every member; safe to call from any thread."""
+        return self.broadcast(Frame(msg_type, payload, channel=channel))
+        
+    def broadcast(self, frame):
+        """Queue a frame for every member; safe to call from any thread.
+        
+        Returns True if at least one member will get it.
+        """
+        return self.fan_out(frame)
+        
+    def fan_out(self, frame, exclude=None):
+        """Queue one shared frame for every member but exclude."""
+        fragments = None
+        if frame.length > self.max_frame_size:
+            fragments = tuple(fragment_frames(frame, self.max_frame_size))
+        queued = False
+        for member in self.member_list:
+            if member is exclude:
+                continue
+            item = frame if fragments is None else iter(fragments)
+            # Never wait on one member: a full queue means it cannot keep up
+            if member.queue.put(item, channel=frame.channel, timeout=0):
+                queued = True
+            elif not member.queue.closed:
+                self.loop.call_soon_threadsafe(self.drop, member, "could not keep up")
+        return queued
+        
+    def on_member_closed(self, member, connection):
+        """Keep a disconnected member's session for a while in case it comes back."""
+        if connection is not member.connection:
+            return
+        member.connection = None
+        if self.members.get(member.key) is member:
+            member.expiry = self.loop.call_later(
+                self.member_timeout, self.drop, member, "did not reconnect"
+            )
+            
+    def drop(self, member, reason):
+        """Forget a member and close its link; runs on the loop."""
+        if self.members.get(member.key) is not member:
+            return
+        logger.info("👋 Dropping member %s: %s", member.name, reason)
+        del self.members[member.key]
+        self.update_members()
+        if member.expiry:
+            member.expiry.cancel()
+            member.expiry = None
+        member.queue.close()
+        if member.connection:
+            member.connection.close()
+            
+    def update_members(self):
+        """Publish the new member list."""
+        self.member_list = tuple(self.members.values())
+        if self.on_members_changed:
+            self.on_members_changed(len(self.member_list))
+            
+    async def report_stats(self):
+        """Report combined link stats once per heartbeat."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self.on_stats(self.snapshot())
+            
+    def snapshot(self):
+        """Return stats across all connected members, in LinkStats.snapshot form.
+        
+        RTT and jitter are the worst member's; rates and byte counts are totals.
+        """
+        connected = [member.stats for member in self.member_list if member.connection]
+        rtts = [stats.rtt for stats in connected if stats.rtt is not None]
+        return {
+            'rtt_ms': max(rtts) * 1000 if rtts else None,
+            'jitter_ms': max((stats.jitter for stats in connected), default=0.0) * 1000,
+            'send_rate': sum(stats.send_rate for stats in connected),
+            'receive_rate': sum(stats.receive_rate for stats in connected),
+            'bytes_sent': sum(stats.bytes_sent for stats in connected),
+            'bytes_received': sum(stats.bytes_received for stats in connected),
+            'peers': len(connected)
+        }
+        
+    def close(self):
+        """Stop accepting members and disconnect them all; runs on the loop."""
+        if self.server:
+            self.server.close()
+            self.server = None
+        if self.stats_task:
+            self.stats_task.cancel()
+            self.stats_task = None
+        for member in list(self.member_list):
+            self.drop(member, "closed")
@@ -0,0 +1,57 @@
+"""
+Hub mode for Vortex Tunnel.
+Serves any number of peers from one instance and relays chat and drawing between them.
+"""
+
+from network import protocol
+from network.group import PeerGroup
+from network.outbound import Frame
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Message types the hub passes on to every other member
+RELAYED_TYPES = frozenset({
+    protocol.MSG_CHAT, protocol.MSG_STROKE_SEGMENT, protocol.MSG_STROKE_END, protocol.MSG_CLEAR_CANVAS
+})
+
+
+class Hub(PeerGroup):
+    """Accepts many peers at once and relays messages between them.
+    
+    Chat and drawing messages from a member are delivered locally through
+    on_message and relayed to every other member as one shared frame;
+    stroke segments are re-encoded self-contained so any member can decode
+    them. Relayed messages are wrapped in an origin envelope naming the
+    member, so receivers can tell members' strokes apart. Members are
+    served as described in PeerGroup.
+    """
+    
+    def on_member_frame(self, member, msg_type, flags, channel, payload):
+        """Deliver a member's message locally and relay it to everyone else."""
+        try:
+            payload = member.reassembler.feed(msg_type, flags, channel, payload)
+            if payload is None:
+                return
+            if msg_type not in RELAYED_TYPES:
+                self.deliver(member, msg_type, payload)
+                return
+            frame = self.relay_frame(member, msg_type, payload)
+        except Exception as e:
+            logger.error("❌ Dropping a type %d message from member %s: %s", msg_type, member.name, e)
+            return
+        self.fan_out(frame, exclude=member)
+        self.on_message(msg_type, frame.parts[-1], member.origin)
+        
+    def relay_frame(self, member, msg_type, payload):
+        """Build the one frame a member's message is relayed as; the message is its last part."""
+        if msg_type == protocol.MSG_STROKE_SEGMENT:
+            # The member's styles are only defined on its own link
+            data = protocol.decode_drawing(msg_type, payload, member.palette)
+            msg_type, payload = protocol.encode_drawing(data, None)
+        else:
+            # The receive buffer is reused, so the relayed frame needs its own copy
+            payload = bytes(payload)
+        envelope = protocol.encode_origin(member.origin, next(member.relay_seq), msg_type)
+        return Frame(protocol.MSG_ORIGIN, (envelope, payload))
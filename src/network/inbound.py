@@ -0,0 +1,89 @@
+"""
+Inbound message hand-off for Vortex Tunnel.
+Passes decoded messages from the network thread to the GUI thread in batches.
+"""
+
+from collections import deque
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Most messages handled per drain before yielding back to the event loop
+INBOUND_DRAIN_LIMIT = 1000
+
+
+class InboundQueue:
+    """Lock-free queue of decoded messages, drained by the GUI once per tick.
+    
+    The network thread puts (kind, item) pairs; deque append and popleft are
+    atomic, so neither side takes a lock. A drain is requested only when the
+    queue goes from idle to busy, so a burst of messages costs one wakeup.
+    Each drain hands runs of consecutive items of the same kind to that
+    kind's batch handler in one call, keeping the original order.
+    """
+    
+    def __init__(self, request_drain=None, drain_limit=INBOUND_DRAIN_LIMIT):
+        self.items = deque()
+        self.handlers = {}
+        self.request_drain = request_drain
+        self.drain_limit = drain_limit
+        self.scheduled = False
+        
+    def register(self, kind, handler):
+        """Set the handler called with a list of items of one kind."""
+        self.handlers[kind] = handler
+        
+    def put(self, kind, item):
+        """Queue an item from any thread and request a drain if none is pending."""
+        self.items.append((kind, item))
+        if not self.scheduled:
+            self.scheduled = True
+            if self.request_drain:
+                self.request_drain()
+                
+    def drain(self):
+        """Run the batch handlers over queued items; returns how many were handled.
+        
+        Stops after drain_limit items and requests another drain for the
+        rest, so a flood of messages cannot starve painting and input.
+        """
+        # Clear the flag before taking items: anything put after this point
+        # either gets taken below or requests a drain of its own
+        self.scheduled = False
+        items = self.items
+        handled = 0
+        batch_kind = None
+        batch = []
+        while items and handled < self.drain_limit:
+            kind, item = items.popleft()
+            handled += 1
+            if kind != batch_kind and batch:
+                self.dispatch(batch_kind, batch)
+                batch = []
+            batch_kind = kind
+            batch.append(item)
+        if batch:
+            self.dispatch(batch_kind, batch)
+        if items and not self.scheduled:
+            self.scheduled = True
+            if self.request_drain:
+                self.request_drain()
+        return handled
+        
+    def dispatch(self, kind, batch):
+        """Hand one batch to its handler."""
+        handler = self.handlers.get(kind)
+        if handler is None:
+            logger.warning("❓ No handler for inbound %s messages", kind)
+            return
+        try:
+            handler(batch)
+        except Exception as e:
+            logger.error("❌ Error handling %d inbound %s messages: %s", len(batch), kind, e)
+            
+    def clear(self):
+        """Discard everything still queued."""
+        self.items.clear()
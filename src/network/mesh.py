@@ -0,0 +1,193 @@
+"""
+Mesh mode for Vortex Tunnel.
+Connects every node straight to every other node, so no message waits on a relay.
+"""
+
+import asyncio
+import itertools
+import os
+
+from network import protocol
+from network.group import GroupMember, PeerGroup
+from network.outbound import Frame
+from network.session import Session
+from network.transport import address_key, dial_with_backoff, exchange_hello
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Operations from one origin may arrive this far out of order before the gap is given up on
+DEDUP_WINDOW = 4096
+
+# Wait this long before dialing again after a failed handshake
+HANDSHAKE_RETRY_DELAY = 1.0
+
+
+class OpFilter:
+    """Remembers which operations have been applied, per origin node.
+    
+    Each origin keeps the highest sequence below which everything has been
+    seen, plus the few sequences seen above it. Memory stays bounded by the
+    window however long the session runs.
+    """
+    
+    def __init__(self, window=DEDUP_WINDOW):
+        self.window = window
+        self.origins = {}  # origin id -> [contiguous high-water mark, set of sequences above it]
+        
+    def accept(self, origin_id, op_seq):
+        """Return True the first time an operation is seen and False for every repeat."""
+        state = self.origins.get(origin_id)
+        if state is None:
+            # Joining mid-session: whatever came before this operation is not ours to wait for
+            self.origins[origin_id] = [op_seq, set()]
+            return True
+        high, seen = state
+        if op_seq <= high or op_seq in seen:
+            return False
+        seen.add(op_seq)
+        if op_seq - high > self.window:
+            # Too far ahead: stop waiting for the oldest missing operations
+            high = op_seq - self.window
+            seen.difference_update([seq for seq in seen if seq <= high])
+        while high + 1 in seen:
+            high += 1
+            seen.remove(high)
+        state[0] = high
+        return True
+
+
+class Mesh(PeerGroup):
+    """Keeps a direct link to every other node of an N-way session.
+    
+    Each node listens for the others and dials the peers it is given; of
+    each pair only the node with the lower address and port dials, so every
+    pair shares one link. A dialed peer that drops is dialed again, and the
+    session resumes as it does for members that dial in.
+    
+    Messages sent through the mesh carry this node's id and an operation
+    sequence, and are encoded once into a frame shared by every link.
+    Receivers apply each operation once: a peer reached over more than one
+    link, for example when neither side knew its own address, does not see
+    an operation twice. Operations go straight from their origin to every
+    node and are never forwarded, so each arrives after exactly one hop.
+    """
+    
+    def __init__(self, on_message, node_id=None, dedup_window=DEDUP_WINDOW, **kwargs):
+        super().__init__(on_message, **kwargs)
+        self.node_id = node_id or int.from_bytes(os.urandom(4), 'big') or 1
+        # next() on a count is atomic, so any thread may send
+        self.op_seq = itertools.count(1)
+        self.filter = OpFilter(dedup_window)
+        self.self_address = None
+        self.peers = set()
+        self.dialers = {}
+        self.closed = False
+        
+    async def start(self, host, port, self_address=None):
+        """Start accepting nodes; returns the port listened on.
+        
+        self_address is this node's address as the others dial it, used to
+        decide which side of each pair dials.
+        """
+        self.self_address = self_address
+        return await super().start(host, port)
+        
+    def add_peer(self, host, port):
+        """Keep a link to another node; runs on the loop.
+        
+        Returns True if this node dials it, and False if the peer is
+        expected to dial this node instead or is already known.
+        """
+        key = (host, port)
+        if key in self.peers or not self.should_dial(host, port):
+            return False
+        self.peers.add(key)
+        self.connect_peer(key)
+        return True
+        
+    def should_dial(self, host, port):
+        """Return True if this node is the one of the pair that dials."""
+        if self.self_address is None:
+            return True
+        try:
+            return (address_key(self.self_address), self.port) < (address_key(host), port)
+        except ValueError:
+            return True
+            
+    def connect_peer(self, key):
+        """Start a new member for a peer address and dial it."""
+        member = GroupMember(key, '%s:%s' % key, self.reassembly_budget)
+        self.add_member(member)
+        self.redial(member)
+        
+    def redial(self, member):
+        """Dial a member in the background."""
+        self.dialers[member.key] = asyncio.ensure_future(self.dial(member))
+        
+    async def dial(self, member):
+        """Dial a member until a handshake succeeds, then serve it."""
+        host, port = member.key
+        while True:
+            connection = await dial_with_backoff(host, port, max_frame_size=self.max_frame_size)
+            try:
+                resumed = await exchange_hello(connection, member.session)
+                break
+            except asyncio.CancelledError:
+                connection.close()
+                raise
+            except Exception as e:
+                logger.warning("❌ Handshake with %s failed: %s", member.name, e)
+                connection.close()
+                # Whatever the peer disliked, a fresh session cannot be mistaken for it
+                member.session = Session()
+                await asyncio.sleep(HANDSHAKE_RETRY_DELAY)
+        self.dialers.pop(member.key, None)
+        logger.info("✅ %s %s (%d members)", 'Resumed' if resumed else 'Dialed', member.name, len(self.members))
+        self.serve(member, connection, resumed)
+        
+    def on_member_frame(self, member, msg_type, flags, channel, payload):
+        """Deliver each operation from a member once, whichever link it came over."""
+        try:
+            payload = member.reassembler.feed(msg_type, flags, channel, payload)
+            if payload is None:
+                return
+            origin_id = None
+            if msg_type == protocol.MSG_ORIGIN:
+                origin_id, op_seq, msg_type, payload = protocol.decode_origin(payload)
+                if origin_id == self.node_id or not self.filter.accept(origin_id, op_seq):
+                    return
+            self.deliver(member, msg_type, payload, origin_id)
+        except Exception as e:
+            logger.error("❌ Dropping a type %d message from member %s: %s", msg_type, member.name, e)
+            
+    def send(self, msg_type, payload, channel=protocol.CHANNEL_INTERACTIVE):
+        """Stamp a message with this node's origin and queue it for every member once."""
+        envelope = protocol.encode_origin(self.node_id, next(self.op_seq), msg_type)
+        parts = payload if isinstance(payload, tuple) else (payload,)
+        return self.broadcast(Frame(protocol.MSG_ORIGIN, (envelope,) + parts, channel=channel))
+        
+    def on_member_closed(self, member, connection):
+        """Keep the member's session and dial it again if this node is the dialer."""
+        if connection is not member.connection:
+            return
+        super().on_member_closed(member, connection)
+        if member.key in self.peers and not self.closed:
+            self.redial(member)
+            
+    def drop(self, member, reason):
+        """Forget a member; a peer this node dials is started over with a new session."""
+        if self.members.get(member.key) is not member:
+            return
+        dialer = self.dialers.pop(member.key, None)
+        if dialer:
+            dialer.cancel()
+        super().drop(member, reason)
+        if member.key in self.peers and not self.closed:
+            self.connect_peer(member.key)
+            
+    def close(self):
+        """Stop accepting and dialing nodes and disconnect them all; runs on the loop."""
+        self.closed = True
+        super().close()
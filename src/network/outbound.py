@@ -0,0 +1,317 @@
+"""
+Outbound frame queue for Vortex Tunnel.
+Hands frames from any thread to the network loop, schedules the logical
+channels and applies backpressure to producers.
+"""
+
+import threading
+from collections import deque
+
+from network import protocol
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Relative share of the link each channel gets while several have data queued.
+# The control channel is not weighted: it is always served first.
+CHANNEL_WEIGHTS = {
+    protocol.CHANNEL_INTERACTIVE: 16,
+    protocol.CHANNEL_BULK: 1,
+}
+
+
+class Frame:
+    """A header plus the payload buffers that follow it on the wire."""
+    
+    __slots__ = ('msg_type', 'flags', 'parts', 'length', 'size', 'channel')
+    
+    def __init__(self, msg_type, payload, channel=protocol.CHANNEL_INTERACTIVE, flags=protocol.FLAG_NONE):
+        self.msg_type = msg_type
+        self.flags = flags
+        self.parts = payload if isinstance(payload, tuple) else (payload,)
+        self.channel = channel
+        self.length = sum(len(part) for part in self.parts)
+        if self.length > protocol.MAX_PAYLOAD_SIZE:
+            raise ValueError(f"Payload too large for a single frame: {self.length} bytes")
+        self.size = protocol.HEADER_SIZE + self.length
+        
+    def header(self, seq=0):
+        """Pack the frame header; the sequence number is only known at write time."""
+        return protocol.encode_header(self.msg_type, self.length, flags=self.flags,
+                                      channel=self.channel, seq=seq)
+
+
+def fragment_frames(frame, max_size):
+    """Split a frame whose payload exceeds max_size into sub-frames.
+    
+    Yields frames of the same type and channel; every one but the last is
+    flagged FLAG_MORE. Queued as a stream, the sub-frames stay back to back on
+    their channel while other channels interleave with them.
+    """
+    parts = frame.parts
+    payload = memoryview(parts[0] if len(parts) == 1 else b''.join(parts)).cast('B')
+    for offset in range(0, len(payload), max_size):
+        last = offset + max_size >= len(payload)
+        yield Frame(
+            frame.msg_type, payload[offset:offset + max_size], channel=frame.channel,
+            flags=frame.flags if last else frame.flags | protocol.FLAG_MORE
+        )
+
+
+class OutboundQueue:
+    """Bounded, thread-safe, multi-channel queue of frames waiting to be written.
+    
+    Each channel has its own FIFO. The control channel is served strictly
+    first; the remaining channels share the link by weighted fair queueing on
+    bytes written, so a bulk transfer can never hold interactive frames back
+    by more than one of its chunks.
+    
+    Items are either single frames or streams (iterables of frames) that
+    next_frame expands one frame at a time, so a file transfer only holds one chunk
+    in memory and yields to other channels between chunks. Queued bytes are
+    tracked against a high and low watermark and the congestion callback fires
+    whenever the queue crosses them. A stream counts the bytes it declares
+    toward the watermarks until it has produced them, but not toward
+    max_bytes, so a large file signals congestion without shutting out
+    every other message for as long as it takes to send.
+    
+    A stream whose next frame is still being produced elsewhere yields that
+    work's Future instead of a frame. Its channel is passed over until the
+    Future is done, so the other channels keep being served meanwhile.
+    """
+    
+    def __init__(self, max_bytes=8 * 1024 * 1024, high_water=1024 * 1024,
+                 low_water=256 * 1024, on_congestion=None, on_ready=None, weights=None):
+        self.max_bytes = max_bytes
+        self.high_water = high_water
+        self.low_water = low_water
+        self.on_congestion = on_congestion
+        self.on_ready = on_ready
+        self.weights = dict(CHANNEL_WEIGHTS if weights is None else weights)
+        self.channels = {protocol.CHANNEL_CONTROL: deque()}
+        self.channels.update((channel, deque()) for channel in self.weights)
+        self.virtual_time = dict.fromkeys(self.weights, 0.0)
+        self.clock = 0.0
+        self.queued_bytes = 0
+        self.stream_bytes = 0
+        self.stream_sizes = {}  # id(stream) -> declared bytes not produced yet
+        self.congested = False
+        self.closed = False
+        self.streams = {}
+        self.parked = set()  # channels whose head stream is waiting on a Future
+        self.condition = threading.Condition()
+        
+    def put(self, item, channel=None, timeout=None, size=0):
+        """Queue a frame or stream, blocking while the queue is full.
+        
+        Frames are queued on their own channel; streams go to the bulk
+        channel unless told otherwise, and size is roughly how many bytes
+        a stream will produce. Pass timeout=0 from the GUI thread so a full
+        queue never blocks it. Returns False if the queue was closed or the
+        timeout expired.
+        """
+        if isinstance(item, Frame):
+            stream_size = 0
+            size = item.size
+            channel = item.channel
+        else:
+            stream_size = size
+            size = 0
+            channel = protocol.CHANNEL_BULK if channel is None else channel
+        with self.condition:
+            # Always admit a frame into an empty queue so oversized frames cannot deadlock
+            if not self.condition.wait_for(
+                lambda: self.closed or not self.queued_bytes or self.queued_bytes + size <= self.max_bytes,
+                timeout
+            ):
+                return False
+            if self.closed:
+                return False
+            items = self.channels[channel]
+            if not items and channel in self.virtual_time:
+                # An idle channel rejoins at the current clock instead of banking credit
+                self.virtual_time[channel] = max(self.virtual_time[channel], self.clock)
+            items.append(item)
+            self.queued_bytes += size
+            if stream_size:
+                self.stream_sizes[id(item)] = stream_size
+                self.stream_bytes += stream_size
+            self.condition.notify_all()
+            changed = self.check_congestion()
+        if changed is not None and self.on_congestion:
+            self.on_congestion(changed)
+        if self.on_ready:
+            self.on_ready()
+        return True
+        
+    def next_channel(self):
+        """Pick the channel to serve next; must be called with the lock held."""
+        if self.channels[protocol.CHANNEL_CONTROL] and protocol.CHANNEL_CONTROL not in self.parked:
+            return protocol.CHANNEL_CONTROL
+        ready = [channel for channel in self.virtual_time
+                 if self.channels[channel] and channel not in self.parked]
+        if not ready:
+            return None
+        return min(ready, key=self.virtual_time.__getitem__)
+        
+    def has_pending(self):
+        """Return True if any frame or stream is waiting to be written."""
+        with self.condition:
+            return self.next_channel() is not None
+            
+    def get(self, block=True):
+        """Take the next item to write as (channel, item).
+        
+        Frames are removed from the queue. Streams stay at the head of their
+        channel until they are finished, so they are revisited between every
+        frame they produce. Returns (None, None) once the queue is closed, or
+        straight away when nothing is queued and block is False.
+        """
+        with self.condition:
+            if block:
+                self.condition.wait_for(lambda: self.closed or self.next_channel() is not None)
+            if self.closed or self.next_channel() is None:
+                return None, None
+            channel = self.next_channel()
+            items = self.channels[channel]
+            item = items[0]
+            if not isinstance(item, Frame):
+                return channel, item
+            items.popleft()
+            self.queued_bytes -= item.size
+            self.condition.notify_all()
+            changed = self.check_congestion()
+        if changed is not None and self.on_congestion:
+            self.on_congestion(changed)
+        return channel, item
+        
+    def check_congestion(self):
+        """Update the congested flag; returns its new value if it changed, else None.
+        
+        Must be called with the lock held.
+        """
+        pending = self.queued_bytes + self.stream_bytes
+        if not self.congested and pending >= self.high_water:
+            self.congested = True
+            return True
+        if self.congested and pending <= self.low_water:
+            self.congested = False
+            return False
+        return None
+        
+    def release_stream(self, stream, size=None):
+        """Stop counting bytes a stream has produced; all of what is left when size is None."""
+        with self.condition:
+            remaining = self.stream_sizes.get(id(stream))
+            if remaining is None:
+                return
+            released = remaining if size is None else min(size, remaining)
+            if released == remaining:
+                del self.stream_sizes[id(stream)]
+            else:
+                self.stream_sizes[id(stream)] = remaining - released
+            self.stream_bytes -= released
+            changed = self.check_congestion()
+        if changed is not None and self.on_congestion:
+            self.on_congestion(changed)
+        
+    def charge(self, channel, size):
+        """Account bytes written on a channel against its weight."""
+        with self.condition:
+            if channel in self.virtual_time:
+                # The clock follows the start tag of the frame just served
+                self.clock = self.virtual_time[channel]
+                self.virtual_time[channel] += size / self.weights[channel]
+                
+    def next_frame(self):
+        """Return the next (channel, frame) to write without blocking.
+        
+        Streams are expanded here, one frame per call. Returns (None, None)
+        when nothing is ready to be written.
+        """
+        while True:
+            channel, item = self.get(block=False)
+            if item is None or isinstance(item, Frame):
+                return channel, item
+            frame = self.next_stream_frame(channel, item)
+            if frame is not None:
+                return channel, frame
+                
+    def next_stream_frame(self, channel, stream):
+        """Pull the next frame from a stream, or None once it is finished.
+        
+        A failing producer (such as a file that disappears mid-transfer) only
+        drops its own stream.
+        """
+        frames = self.streams.get(id(stream))
+        if frames is None:
+            frames = self.streams[id(stream)] = iter(stream)
+        try:
+            frame = next(frames)
+            if not isinstance(frame, Frame):
+                self.park(channel, frame)
+                return None
+            self.release_stream(stream, frame.size)
+            return frame
+        except StopIteration:
+            pass
+        except Exception as e:
+            logger.error("❌ Outbound stream failed: %s", e)
+            close = getattr(frames, 'close', None)
+            if close:
+                close()
+        self.finish_stream(channel, stream)
+        return None
+        
+    def park(self, channel, pending):
+        """Pass over a channel until the Future its head stream is waiting on is done."""
+        with self.condition:
+            self.parked.add(channel)
+        pending.add_done_callback(lambda _: self.unpark(channel))
+        
+    def unpark(self, channel):
+        """Serve a parked channel again; safe to call from any thread."""
+        with self.condition:
+            if channel not in self.parked:
+                return
+            self.parked.discard(channel)
+            if channel in self.virtual_time:
+                # Like an idle channel, it rejoins at the current clock
+                self.virtual_time[channel] = max(self.virtual_time[channel], self.clock)
+            self.condition.notify_all()
+        if self.on_ready:
+            self.on_ready()
+            
+    def finish_stream(self, channel, stream):
+        """Remove an exhausted stream from its channel."""
+        self.streams.pop(id(stream), None)
+        self.release_stream(stream)
+        with self.condition:
+            items = self.channels[channel]
+            if items and items[0] is stream:
+                items.popleft()
+                
+    def close(self):
+        """Close the queue and wake every waiting thread."""
+        with self.condition:
+            self.closed = True
+            streams = [item for items in self.channels.values() for item in items
+                       if not isinstance(item, Frame)]
+            for items in self.channels.values():
+                items.clear()
+            self.queued_bytes = 0
+            self.stream_bytes = 0
+            self.stream_sizes.clear()
+            self.parked.clear()
+            self.condition.notify_all()
+        for stream in streams:
+            close = getattr(stream, 'close', None)
+            try:
+                if close:
+                    close()
+            except ValueError:
+                # The generator is running right now; it stops on its own
+                pass
+
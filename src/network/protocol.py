@@ -0,0 +1,236 @@
+"""
+Binary wire protocol for Vortex Tunnel.
+Defines the fixed frame header and the payload encodings for each message type.
+"""
+
+import struct
+
+from network import stroke_codec
+
+
+# Frame header: type (u8), flags (u8), channel (u16), payload length (u32), sequence (u32)
+HEADER = struct.Struct('!BBHII')
+HEADER_SIZE = HEADER.size
+MAX_PAYLOAD_SIZE = 0xFFFFFFFF
+
+# Default limit on a single frame's payload; larger messages are sent as sub-frames
+MAX_FRAME_SIZE = 1024 * 1024
+
+# Message types
+MSG_CHAT = 0x01
+MSG_STROKE_SEGMENT = 0x02
+MSG_CLEAR_CANVAS = 0x03
+MSG_FILE_OFFER = 0x04
+MSG_FILE_CHUNK = 0x05
+MSG_FILE_END = 0x06
+MSG_STROKE_END = 0x07
+MSG_HELLO = 0x08
+MSG_ACK = 0x09
+MSG_PING = 0x0A
+MSG_PONG = 0x0B
+MSG_ORIGIN = 0x0C  # a message wrapped with its origin node and op sequence
+
+# Datagram types, sent over the lossy side channel where only the latest value counts
+DGRAM_CURSOR = 0x01
+DGRAM_PREVIEW = 0x02  # the points of a stroke in progress that have not been sent as a segment yet
+
+# Frame flags
+FLAG_NONE = 0x00
+FLAG_MORE = 0x01  # more sub-frames of the same message follow on this channel
+
+# Channels, in priority order
+CHANNEL_CONTROL = 0  # connection management, never delayed
+CHANNEL_INTERACTIVE = 1  # chat, drawing and cursors
+CHANNEL_BULK = 2  # file transfers
+
+# Payload layouts
+STROKE_END = struct.Struct('!I')  # stroke id
+FILE_OFFER = struct.Struct('!IQ')  # transfer id, file size (name follows)
+FILE_CHUNK = struct.Struct('!IQ')  # transfer id, offset (data follows)
+FILE_END = struct.Struct('!I')  # transfer id (sha256 digest follows)
+HELLO = struct.Struct('!QQQ')  # session id, peer session id, last sequence received
+ACK = struct.Struct('!Q')  # last sequence received
+PING = struct.Struct('!Q')  # sender's clock in microseconds, echoed back in the pong
+ORIGIN = struct.Struct('!IQB')  # origin node id, op sequence, wrapped message type (payload follows)
+
+# Datagram header: sender id (u32), sequence (u32), datagram type (u8); the payload follows
+DATAGRAM = struct.Struct('!IIB')
+CURSOR = struct.Struct('!ii')  # x, y
+# Keeps a datagram inside one packet of Tailscale's 1280-byte MTU
+MAX_DATAGRAM_SIZE = 1200
+PREVIEW_MAX_POINTS = 128
+
+
+def encode_header(msg_type, length, flags=FLAG_NONE, channel=CHANNEL_CONTROL, seq=0):
+    """Pack a frame header."""
+    if length > MAX_PAYLOAD_SIZE:
+        raise ValueError(f"Payload too large for a single frame: {length} bytes")
+    return HEADER.pack(msg_type, flags, channel, length, seq)
+
+
+def decode_header(buffer, offset=0):
+    """Unpack a frame header into (type, flags, channel, length, sequence)."""
+    return HEADER.unpack_from(buffer, offset)
+
+
+def encode_chat(text):
+    """Encode a chat message payload."""
+    return text.encode('utf-8')
+
+
+def decode_chat(payload):
+    """Decode a chat message payload."""
+    return str(payload, 'utf-8')
+
+
+def encode_drawing(data, palette):
+    """Encode a canvas drawing operation into (message type, payload).
+    
+    Stroke segments are compressed with the sender's session palette. With
+    no palette the segment is self-contained, carrying its style inline, so
+    one payload can be sent or relayed to any number of peers.
+    """
+    if data['type'] == 'stroke_segment':
+        if palette is None:
+            palette = stroke_codec.StrokePalette()
+        return MSG_STROKE_SEGMENT, stroke_codec.encode_stroke(data, palette)
+    elif data['type'] == 'stroke_end':
+        return MSG_STROKE_END, STROKE_END.pack(data['stroke_id'])
+    elif data['type'] == 'clear_canvas':
+        return MSG_CLEAR_CANVAS, b''
+    raise ValueError(f"Unknown drawing operation: {data['type']}")
+
+
+def decode_drawing(msg_type, payload, palette):
+    """Decode a drawing payload back into the canvas operation dict.
+    
+    Stroke segments are decoded with the receiver's session palette.
+    """
+    if msg_type == MSG_STROKE_SEGMENT:
+        return stroke_codec.decode_stroke(payload, palette)
+    elif msg_type == MSG_STROKE_END:
+        (stroke_id,) = STROKE_END.unpack_from(payload)
+        return {'type': 'stroke_end', 'stroke_id': stroke_id}
+    return {'type': 'clear_canvas'}
+
+
+def encode_file_offer(transfer_id, file_size, file_name):
+    """Encode a file offer announcing a transfer."""
+    return FILE_OFFER.pack(transfer_id, file_size) + file_name.encode('utf-8')
+
+
+def decode_file_offer(payload):
+    """Decode a file offer into (transfer id, size, name)."""
+    transfer_id, file_size = FILE_OFFER.unpack_from(payload)
+    return transfer_id, file_size, str(payload[FILE_OFFER.size:], 'utf-8')
+
+
+def encode_file_chunk_header(transfer_id, offset):
+    """Encode the prefix of a file chunk; the raw data is sent after it."""
+    return FILE_CHUNK.pack(transfer_id, offset)
+
+
+def decode_file_chunk(payload):
+    """Decode a file chunk into (transfer id, offset, data view)."""
+    transfer_id, offset = FILE_CHUNK.unpack_from(payload)
+    return transfer_id, offset, payload[FILE_CHUNK.size:]
+
+
+def encode_file_end(transfer_id, digest):
+    """Encode the end-of-transfer frame carrying the file checksum."""
+    return FILE_END.pack(transfer_id) + digest
+
+
+def decode_file_end(payload):
+    """Decode an end-of-transfer frame into (transfer id, digest)."""
+    (transfer_id,) = FILE_END.unpack_from(payload)
+    return transfer_id, payload[FILE_END.size:]
+
+
+def encode_hello(session_id, peer_session_id, received_seq):
+    """Encode the session hello sent at the start of every connection."""
+    return HELLO.pack(session_id, peer_session_id, received_seq)
+
+
+def decode_hello(payload):
+    """Decode a session hello into (session id, peer session id, last sequence received)."""
+    return HELLO.unpack(payload)
+
+
+def encode_ack(received_seq):
+    """Encode a cumulative acknowledgement."""
+    return ACK.pack(received_seq)
+
+
+def decode_ack(payload):
+    """Decode a cumulative acknowledgement."""
+    return ACK.unpack(payload)[0]
+
+
+def encode_ping(timestamp_us):
+    """Encode a heartbeat ping (the pong echoes the same payload)."""
+    return PING.pack(timestamp_us)
+
+
+def decode_ping(payload):
+    """Decode the timestamp carried by a ping or pong."""
+    return PING.unpack(payload)[0]
+
+
+def encode_origin(origin_id, op_seq, msg_type):
+    """Encode the origin envelope that goes in front of a wrapped message's payload."""
+    return ORIGIN.pack(origin_id, op_seq, msg_type)
+
+
+def decode_origin(payload):
+    """Decode an origin envelope into (origin id, op sequence, message type, wrapped payload)."""
+    origin_id, op_seq, msg_type = ORIGIN.unpack_from(payload)
+    return origin_id, op_seq, msg_type, payload[ORIGIN.size:]
+
+
+def encode_datagram(sender_id, seq, dgram_type, payload):
+    """Encode a side channel datagram."""
+    datagram = DATAGRAM.pack(sender_id, seq, dgram_type) + payload
+    if len(datagram) > MAX_DATAGRAM_SIZE:
+        raise ValueError(f"Datagram too large: {len(datagram)} bytes")
+    return datagram
+
+
+def decode_datagram(data):
+    """Decode a side channel datagram into (sender id, sequence, datagram type, payload)."""
+    if len(data) < DATAGRAM.size:
+        raise ValueError(f"Datagram too short: {len(data)} bytes")
+    sender_id, seq, dgram_type = DATAGRAM.unpack_from(data)
+    return sender_id, seq, dgram_type, memoryview(data)[DATAGRAM.size:]
+
+
+def encode_ephemeral(data):
+    """Encode a cursor position or stroke preview into (datagram type, payload).
+    
+    Previews are self-contained stroke encodings of at most the last
+    PREVIEW_MAX_POINTS points, so any one datagram can be drawn on its own.
+    Older points are dropped until the preview fits in one datagram.
+    """
+    if data['type'] == 'cursor':
+        return DGRAM_CURSOR, CURSOR.pack(data['x'], data['y'])
+    elif data['type'] == 'stroke_preview':
+        points = data['points'][-2 * PREVIEW_MAX_POINTS:]
+        while True:
+            payload = stroke_codec.encode_stroke(dict(data, points=points), stroke_codec.StrokePalette())
+            if DATAGRAM.size + len(payload) <= MAX_DATAGRAM_SIZE or len(points) <= 2:
+                return DGRAM_PREVIEW, payload
+            # Points far apart take up to five bytes a coordinate; keep the newer half
+            points = points[len(points) // 4 * 2:]
+    raise ValueError(f"Unknown ephemeral update: {data['type']}")
+
+
+def decode_ephemeral(dgram_type, payload):
+    """Decode a datagram payload back into the cursor or stroke preview dict."""
+    if dgram_type == DGRAM_CURSOR:
+        x, y = CURSOR.unpack_from(payload)
+        return {'type': 'cursor', 'x': x, 'y': y}
+    elif dgram_type == DGRAM_PREVIEW:
+        data = stroke_codec.decode_stroke(payload, stroke_codec.StrokePalette())
+        data['type'] = 'stroke_preview'
+        return data
+    raise ValueError(f"Unknown datagram type: {dgram_type}")
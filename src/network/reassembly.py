@@ -0,0 +1,68 @@
+"""
+Sub-frame reassembly for Vortex Tunnel.
+Rebuilds messages that were split into several frames, within a fixed memory budget.
+"""
+
+from network import protocol
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Most bytes held across all partially received messages at once
+REASSEMBLY_BUDGET = 16 * 1024 * 1024
+
+
+class Reassembler:
+    """Joins sub-frames back into whole messages.
+    
+    Sub-frames of one message arrive back to back on their channel, each but
+    the last flagged FLAG_MORE. Message types listed as streaming skip
+    reassembly: every sub-frame goes straight to the handler, which consumes
+    it incrementally and checks FLAG_MORE itself. Everything else is buffered
+    until complete; a message that would push the bytes held above the
+    budget is dropped and its remaining sub-frames skipped.
+    """
+    
+    def __init__(self, budget=REASSEMBLY_BUDGET, streaming_types=()):
+        self.budget = budget
+        self.streaming_types = frozenset(streaming_types)
+        self.partial = {}
+        self.buffered = 0
+        
+    def feed(self, msg_type, flags, channel, payload):
+        """Take one frame and return the payload to dispatch, or None if there is none yet."""
+        more = flags & protocol.FLAG_MORE
+        partial = self.partial.get(channel)
+        if partial is None and (not more or msg_type in self.streaming_types):
+            # Whole messages and streamed sub-frames pass through without a copy
+            return payload
+            
+        if partial is None:
+            partial = self.partial[channel] = [msg_type, bytearray()]
+        elif partial[0] != msg_type:
+            raise ValueError(f"Sub-frame of type {msg_type} interrupts a type {partial[0]} message")
+            
+        buffer = partial[1]
+        if buffer is not None:
+            if self.buffered + len(payload) > self.budget:
+                logger.warning("❌ Dropping a type %d message: reassembly budget of %d bytes exceeded", msg_type, self.budget)
+                self.buffered -= len(buffer)
+                buffer = partial[1] = None
+            else:
+                buffer += payload
+                self.buffered += len(payload)
+                
+        if more:
+            return None
+        del self.partial[channel]
+        if buffer is None:
+            return None
+        self.buffered -= len(buffer)
+        return memoryview(buffer)
+        
+    def reset(self):
+        """Discard every partially received message."""
+        self.partial.clear()
+        self.buffered = 0
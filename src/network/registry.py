@@ -0,0 +1,46 @@
+"""
+Message type registry for Vortex Tunnel.
+Routes received messages to the decoder and handler registered for their type.
+"""
+
+
+# Message types travel in one header byte
+MAX_MESSAGE_TYPE = 0xFF
+
+
+class MessageRegistry:
+    """Maps message type IDs to decoder and handler pairs.
+    
+    Each module registers the types it understands, so adding a message kind
+    never touches the receive path. Lookup is a single list index. The
+    decoder runs only for registered types, just before the handler, so
+    unknown or ignored messages are never parsed.
+    """
+    
+    def __init__(self):
+        self.entries = [None] * (MAX_MESSAGE_TYPE + 1)
+        
+    def register(self, msg_type, handler, decoder=None):
+        """Route msg_type to handler, passing the payload through decoder if given."""
+        if not 0 <= msg_type <= MAX_MESSAGE_TYPE:
+            raise ValueError(f"Message type {msg_type} does not fit in one byte")
+        if self.entries[msg_type] is not None:
+            raise ValueError(f"Message type {msg_type} is already registered")
+        self.entries[msg_type] = (decoder, handler)
+        
+    def unregister(self, msg_type):
+        """Stop routing msg_type."""
+        self.entries[msg_type] = None
+        
+    def is_registered(self, msg_type):
+        """Return True if msg_type has a handler."""
+        return self.entries[msg_type] is not None
+        
+    def dispatch(self, msg_type, payload):
+        """Decode and handle one message; returns False if its type is not registered."""
+        entry = self.entries[msg_type]
+        if entry is None:
+            return False
+        decoder, handler = entry
+        handler(payload if decoder is None else decoder(payload))
+        return True
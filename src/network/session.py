@@ -0,0 +1,101 @@
+"""
+Reliable session state for Vortex Tunnel.
+Numbers outgoing frames, tracks cumulative acknowledgements and keeps every
+unacknowledged frame so a reconnected session can replay what the peer missed.
+"""
+
+import os
+from collections import deque
+
+from network import protocol
+
+
+SEQUENCE_MASK = 0xFFFFFFFF
+
+# Session control frames belong to one connection: never numbered, kept or replayed
+UNSEQUENCED_TYPES = frozenset({
+    protocol.MSG_HELLO, protocol.MSG_ACK, protocol.MSG_PING, protocol.MSG_PONG
+})
+
+# Acknowledge after this many frames, or after ACK_DELAY seconds, whichever comes first
+ACK_EVERY = 32
+ACK_DELAY = 0.05
+
+
+class Session:
+    """Sequencing state that outlives individual connections to one peer.
+    
+    Frames are numbered as they are written and kept until the peer
+    acknowledges them. Every connection starts with a hello carrying both
+    session ids and the last sequence received; when both peers recognise
+    each other the session resumes and only unacknowledged frames are sent
+    again, otherwise both start over.
+    """
+    
+    def __init__(self, max_unacked_bytes=8 * 1024 * 1024):
+        self.session_id = int.from_bytes(os.urandom(8), 'big') or 1
+        self.peer_session_id = 0
+        self.max_unacked_bytes = max_unacked_bytes
+        self.reset()
+        
+    def reset(self):
+        """Forget all sequencing state, as for a peer never seen before."""
+        self.next_seq = 1
+        self.received_seq = 0
+        self.acked_seq = 0
+        self.unacked = deque()
+        self.unacked_bytes = 0
+        
+    def hello(self):
+        """Return the hello payload for a new connection."""
+        return protocol.encode_hello(self.session_id, self.peer_session_id, self.received_seq)
+        
+    def resume(self, payload):
+        """Apply the peer's hello and return True if the session carries on.
+        
+        Both peers evaluate the same condition, so they always agree on
+        whether to resume or to start over.
+        """
+        peer_id, peer_knows, peer_received = protocol.decode_hello(payload)
+        if self.peer_session_id and peer_id == self.peer_session_id and peer_knows == self.session_id:
+            if peer_received >= self.next_seq:
+                raise ValueError(f"Peer acknowledges sequence {peer_received} that was never sent")
+            self.acknowledge(peer_received)
+            return True
+        self.peer_session_id = peer_id
+        self.reset()
+        return False
+        
+    def number(self, frame):
+        """Assign the next sequence number to a frame and keep it for replay."""
+        seq = self.next_seq
+        self.next_seq += 1
+        self.unacked.append((seq, frame))
+        self.unacked_bytes += frame.size
+        return seq
+        
+    def acknowledge(self, seq):
+        """Drop every kept frame up to and including seq."""
+        unacked = self.unacked
+        while unacked and unacked[0][0] <= seq:
+            self.unacked_bytes -= unacked.popleft()[1].size
+            
+    def window_full(self):
+        """Return True while too much unacknowledged data is outstanding."""
+        return self.unacked_bytes >= self.max_unacked_bytes
+        
+    def receive(self, wire_seq):
+        """Record an incoming sequenced frame; frames must arrive without gaps."""
+        expected = self.received_seq + 1
+        if wire_seq != expected & SEQUENCE_MASK:
+            raise ValueError(f"Expected sequence {expected & SEQUENCE_MASK}, got {wire_seq}")
+        self.received_seq = expected
+        
+    def ack_due(self):
+        """Return how many received frames have not been acknowledged yet."""
+        return self.received_seq - self.acked_seq
+        
+    def take_ack(self):
+        """Return an acknowledgement payload for everything received so far."""
+        self.acked_seq = self.received_seq
+        return protocol.encode_ack(self.received_seq)
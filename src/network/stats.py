@@ -0,0 +1,63 @@
+"""
+Link statistics for Vortex Tunnel.
+Tracks smoothed round-trip time, jitter and throughput for a peer link.
+"""
+
+
+class LinkStats:
+    """Live measurements of the link to one peer.
+    
+    Round-trip time is smoothed the way TCP smooths it (gain 1/8). Jitter is
+    the mean deviation between consecutive RTT samples (gain 1/16, as in
+    RTP). Throughput is measured per direction over each sampling interval.
+    """
+    
+    def __init__(self):
+        self.rtt = None
+        self.last_rtt = None
+        self.jitter = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.send_rate = 0.0
+        self.receive_rate = 0.0
+        self.sample_time = None
+        self.sample_sent = 0
+        self.sample_received = 0
+        
+    def record_rtt(self, rtt):
+        """Fold a new round-trip sample, in seconds, into the estimates."""
+        if self.rtt is None:
+            self.rtt = rtt
+        else:
+            self.rtt += (rtt - self.rtt) / 8
+            self.jitter += (abs(rtt - self.last_rtt) - self.jitter) / 16
+        self.last_rtt = rtt
+        
+    def record_sent(self, size):
+        """Count bytes written to the link."""
+        self.bytes_sent += size
+        
+    def record_received(self, size):
+        """Count bytes read from the link."""
+        self.bytes_received += size
+        
+    def sample_rates(self, now):
+        """Update per-direction throughput from the bytes moved since the last sample."""
+        if self.sample_time is not None and now > self.sample_time:
+            elapsed = now - self.sample_time
+            self.send_rate = (self.bytes_sent - self.sample_sent) / elapsed
+            self.receive_rate = (self.bytes_received - self.sample_received) / elapsed
+        self.sample_time = now
+        self.sample_sent = self.bytes_sent
+        self.sample_received = self.bytes_received
+        
+    def snapshot(self):
+        """Return the current measurements as a plain dict."""
+        return {
+            'rtt_ms': None if self.rtt is None else self.rtt * 1000,
+            'jitter_ms': self.jitter * 1000,
+            'send_rate': self.send_rate,
+            'receive_rate': self.receive_rate,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received
+        }
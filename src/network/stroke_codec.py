@@ -0,0 +1,154 @@
+"""
+Compact stroke codec for Vortex Tunnel.
+Encodes stroke segments as zigzag-varint point deltas with a per-session style palette.
+"""
+
+from array import array
+
+
+class StrokePalette:
+    """Per-session table interning (color, width) styles as small indices.
+    
+    Each peer keeps one palette for what it sends and one for what it receives.
+    The first stroke to use a style carries its definition; later strokes only
+    carry the index.
+    """
+    
+    def __init__(self):
+        self.indices = {}
+        self.styles = []
+        
+    def intern(self, color, width):
+        """Return (index, is_new) for a style, adding it if needed."""
+        key = (color, width)
+        index = self.indices.get(key)
+        if index is not None:
+            return index, False
+        index = len(self.styles)
+        self.indices[key] = index
+        self.styles.append(key)
+        return index, True
+        
+    def define(self, index, color, width):
+        """Record a style definition received from the peer.
+        
+        An index may be defined again: self-contained segments, encoded with
+        a fresh palette so they can be relayed, always define index 0.
+        """
+        if index > len(self.styles):
+            raise ValueError(f"Palette definition out of order: {index}")
+        if index == len(self.styles):
+            self.styles.append((color, width))
+        else:
+            old = self.styles[index]
+            if self.indices.get(old) == index:
+                del self.indices[old]
+            self.styles[index] = (color, width)
+        self.indices[(color, width)] = index
+        
+    def lookup(self, index):
+        """Return the (color, width) style for an index."""
+        try:
+            return self.styles[index]
+        except IndexError:
+            raise ValueError(f"Unknown palette index: {index}") from None
+
+
+def write_varint(out, value):
+    """Append an unsigned LEB128 varint to a bytearray."""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    """Read an unsigned LEB128 varint, returning (value, new offset)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_stroke(segment, palette):
+    """Encode a stroke segment dict into bytes.
+    
+    Layout: stroke id, style reference (with an inline definition the first
+    time a style is used), point count, the first point as absolute
+    coordinates and every following point as a delta from the previous one.
+    All integers are varints; signed values are zigzag encoded.
+    """
+    out = bytearray()
+    write_varint(out, segment['stroke_id'])
+    
+    index, is_new = palette.intern(segment['color'], segment['width'])
+    write_varint(out, (index << 1) | is_new)
+    if is_new:
+        out += int(segment['color'].lstrip('#'), 16).to_bytes(3, 'big')
+        write_varint(out, segment['width'])
+        
+    points = segment['points']
+    write_varint(out, len(points) // 2)
+    last_x = last_y = 0
+    for i in range(0, len(points), 2):
+        x = points[i]
+        y = points[i + 1]
+        dx = x - last_x
+        dy = y - last_y
+        last_x = x
+        last_y = y
+        # Inlined zigzag + varint: this loop is the hot path of every stroke
+        value = (dx << 1) if dx >= 0 else ((-dx << 1) - 1)
+        while value > 0x7F:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+        value = (dy << 1) if dy >= 0 else ((-dy << 1) - 1)
+        while value > 0x7F:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_stroke(payload, palette):
+    """Decode bytes produced by encode_stroke back into a stroke segment dict."""
+    data = bytes(payload)
+    stroke_id, offset = read_varint(data, 0)
+    
+    style, offset = read_varint(data, offset)
+    index = style >> 1
+    if style & 1:
+        color = f"#{int.from_bytes(data[offset:offset + 3], 'big'):06x}"
+        width, offset = read_varint(data, offset + 3)
+        palette.define(index, color, width)
+    else:
+        color, width = palette.lookup(index)
+        
+    count, offset = read_varint(data, offset)
+    # Every coordinate takes at least one byte, so a bogus count is caught before allocating
+    if count * 2 > len(data) - offset:
+        raise ValueError(f"Stroke declares {count} points but carries {len(data) - offset} bytes")
+    points = array('i', [0]) * (count * 2)
+    for i in range(count * 2):
+        # Most freehand deltas fit in a single byte
+        value = data[offset]
+        if value < 0x80:
+            offset += 1
+        else:
+            value, offset = read_varint(data, offset)
+        # x and y deltas alternate, so accumulate against the coordinate two slots back
+        points[i] = (points[i - 2] if i >= 2 else 0) + ((value >> 1) ^ -(value & 1))
+        
+    return {
+        'type': 'stroke_segment',
+        'stroke_id': stroke_id,
+        'color': color,
+        'width': width,
+        'points': points
+    }
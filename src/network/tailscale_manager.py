@@ -3,382 +3,586 @@ Tailscale manager for peer-to-peer networking.
 Handles connection establishment and data transmission between peers.
 """
 
+import asyncio
+import functools
 import os
-import json
-import socket
-import threading
-import time
-from PyQt6.QtCore import QObject, pyqtSignal, QThread
-from PyQt6.QtWidgets import QMessageBox
+from concurrent.futures import Future, ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from network import protocol
+from network.datagram import DatagramChannel
+from network.file_transfer import CHUNK_SIZE, FileSender, FileReceiver
+from network.hub import Hub
+from network.inbound import InboundQueue
+from network.mesh import Mesh
+from network.outbound import Frame, OutboundQueue, fragment_frames
+from network.reassembly import Reassembler
+from network.registry import MessageRegistry
+from network.stroke_codec import StrokePalette
+from network.session import Session
+from network.stats import LinkStats
+from network.tailscale_status import TailscaleProbe
+from network.transport import NetworkEngine, PeerConnection, exchange_hello, race_connect
+from utils.config_manager import ConfigManager
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
 
 
 class TailscaleManager(QObject):
-    """Manages Tailscale connections and peer communication."""
+    """Manages Tailscale connections and peer communication.
+    
+    All sockets run on the network engine's background event loop, so none of
+    the public methods block the GUI. Signals emitted from the loop are
+    delivered to Qt widgets as queued events on the GUI thread.
+    
+    A session and its outbound queue outlive individual connections: when the
+    connection drops the manager reconnects on its own, and frames the peer
+    has not acknowledged are replayed once the session resumes.
+    
+    Cursor positions and stroke previews go over an optional UDP side channel
+    instead, where a lost datagram is simply replaced by the next one; see
+    network.datagram.
+    
+    In the hub role the manager serves any number of peers instead, relaying
+    chat and drawing between them; see network.hub. In the mesh role it links
+    straight to every other node of the session; see network.mesh.
+    """
     
     # Signals
     connection_status_changed = pyqtSignal(bool)
+    connection_failed = pyqtSignal(str)  # error message
+    connection_interrupted = pyqtSignal()
     message_received = pyqtSignal(str)
-    drawing_data_received = pyqtSignal(dict)
-    file_received = pyqtSignal(str, bytes)
+    drawing_batch_received = pyqtSignal(list)  # drawing messages, in order
+    file_received = pyqtSignal(str, str)  # file_name, file_path
+    file_send_progress = pyqtSignal(str, int, int)  # file_name, bytes_sent, file_size
+    send_congestion_changed = pyqtSignal(bool)
+    link_stats_updated = pyqtSignal(dict)  # LinkStats.snapshot()
+    ephemeral_batch_received = pyqtSignal(list)  # latest cursor and preview per peer
+    inbound_ready = pyqtSignal()  # emitted from the network thread
     
     def __init__(self):
         super().__init__()
+        self.config = ConfigManager()
         self.connected = False
-        self.peer_socket = None
-        self.listener_socket = None
-        self.listener_thread = None
+        self.connection = None
+        self.connect_future = None
+        self.session = None
+        self.group = None
+        self.datagrams = None
+        self.link_stats = LinkStats()
+        self.role = None
+        self.profile = None
         self.peer_address = None
         self.local_port = 8081
+        self.reconnect_timeout = 120
+        self.max_frame_size = protocol.MAX_FRAME_SIZE
+        self.reassembler = Reassembler()
+        self.receiving_from = None  # sender of the message being dispatched, None for the one peer
+        self.file_receiver = FileReceiver()
+        self.outbound_queue = None
+        self.send_palette = StrokePalette()
+        self.receive_palette = StrokePalette()
+        self.engine = NetworkEngine()
+        # Files being sent are read and hashed here rather than on the network loop
+        self.file_reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='vortex-file-reader')
+        self.tailscale = TailscaleProbe()
+        
+        # Received messages reach the GUI in batches, one drain per event-loop tick
+        self.inbound = InboundQueue(request_drain=self.inbound_ready.emit)
+        self.inbound_ready.connect(self.drain_inbound)
+        self.registry = MessageRegistry()
+        self.register_core_messages()
+        
+    def register_core_messages(self):
+        """Register the chat, drawing and file message types."""
+        self.register_message_type(
+            protocol.MSG_CHAT, self.emit_messages, decoder=protocol.decode_chat, kind='chat'
+        )
+        for msg_type in (protocol.MSG_STROKE_SEGMENT, protocol.MSG_STROKE_END, protocol.MSG_CLEAR_CANVAS):
+            self.register_message_type(
+                msg_type, self.drawing_batch_received.emit,
+                decoder=functools.partial(self.decode_drawing, msg_type), kind='drawing'
+            )
+        # File data is written to disk on the network thread as it arrives
+        self.registry.register(protocol.MSG_FILE_OFFER, self.on_file_offer)
+        self.registry.register(protocol.MSG_FILE_CHUNK, self.on_file_chunk)
+        self.registry.register(protocol.MSG_FILE_END, self.on_file_end)
+        # Messages a hub passes on arrive wrapped with the member that sent them
+        self.registry.register(protocol.MSG_ORIGIN, self.on_origin)
+        self.inbound.register('file', self.emit_files)
+        self.inbound.register('ephemeral', self.emit_ephemeral)
+        
+    def register_message_type(self, msg_type, batch_handler, decoder=None, kind=None):
+        """Deliver a received message type to a handler on the GUI thread.
+        
+        The decoder runs on the network thread as each message arrives; the
+        handler gets a list of decoded messages once per event-loop tick.
+        Types sharing a kind are batched together in arrival order.
+        Register before connecting.
+        """
+        kind = msg_type if kind is None else kind
+        put = self.inbound.put
+        self.inbound.register(kind, batch_handler)
+        self.registry.register(msg_type, lambda item: put(kind, item), decoder)
         
     def connect(self, profile):
-        """Connect to peer using Tailscale."""
+        """Start connecting to the peer in the background.
+        
+        Returns straight away; the outcome is reported through
+        connection_status_changed or connection_failed.
+        """
+        logger.info("🔗 Starting connection process for profile: %s", profile)
+        
+        # Get peer address based on profile
+        self.profile = profile
+        self.peer_address = self.get_peer_address(profile)
+        logger.info("📍 Peer address: %s", self.peer_address)
+        
+        # Get connection role from config
+        config = self.config
+        self.role = config.get_connection_role()
+        logger.info("🎭 Connection role: %s", self.role)
+        
+        # Queued behind any teardown a disconnect just asked for, so that
+        # teardown can never undo this attempt
+        self.engine.call_soon(self.start_session)
+        
+    def start_session(self):
+        """Set up the session or group for the configured role and start connecting; runs on the loop."""
+        config = self.config
+        self.max_frame_size = config.get_max_frame_size()
+        self.reassembler = Reassembler(budget=config.get_reassembly_budget())
+        
+        if self.role in ('hub', 'mesh'):
+            group_class = Hub if self.role == 'hub' else Mesh
+            self.group = group_class(
+                self.process_received_data, on_stats=self.link_stats_updated.emit,
+                max_frame_size=self.max_frame_size, reassembly_budget=config.get_reassembly_budget(),
+                member_timeout=self.reconnect_timeout
+            )
+            self.connect_future = asyncio.ensure_future(self.start_group())
+            return
+            
+        self.session = Session()
+        self.link_stats = LinkStats()
+        self.connect_future = asyncio.ensure_future(self.establish())
+        
+    async def establish(self, timeout=30):
+        """Bring up a connection for the configured role and start or resume the session."""
+        role = self.role
         try:
-            import time  # Move import to top of function
-            print(f"🔗 Starting connection process for profile: {profile}")
-            
-            # Check if Tailscale is running
-            if not self.check_tailscale_status():
-                raise Exception("Tailscale is not running. Please start Tailscale first.")
-            print("✅ Tailscale is running")
-                
-            # Get peer address based on profile
-            self.peer_address = self.get_peer_address(profile)
-            print(f"📍 Peer address: {self.peer_address}")
-            
-            # Get connection role from config
-            from utils.config_manager import ConfigManager
-            config = ConfigManager()
-            role = config.get_connection_role()
-            print(f"🎭 Connection role: {role}")
+            status = await self.require_tailscale()
+            self.peer_address = self.resolve_peer_address(status)
+            
+            # Host only listens and client only dials; auto does both at once
+            # and keeps whichever connection completes first
+            logger.info("🏁 Connecting to %s:%s as %s...", self.peer_address, self.local_port, role)
+            if self.datagrams is None:
+                await self.open_side_channel([self.peer_address])
+            connection = await race_connect(
+                self.peer_address, self.local_port,
+                listen=role != 'client', dial=role != 'host', timeout=timeout,
+                max_frame_size=self.max_frame_size
+            )
+            try:
+                resumed = await exchange_hello(connection, self.session)
+            except BaseException:
+                connection.close()
+                raise
+            self.attach(connection, resumed)
+            
+        except asyncio.CancelledError:
+            logger.info("🛑 Connection attempt cancelled")
+            raise
+        except Exception as e:
+            logger.error("❌ Connection failed: %s", e)
+            self.connect_future = None
+            self.close_connection()
+            self.connection_failed.emit(f"Connection failed: {str(e)}")
             
-            if role == 'host':
-                # Act as host - listen for connections
-                print("🎧 Acting as HOST - listening for connections...")
-                self.start_listener()
-                print("✅ Host listener started - waiting for peer to connect")
-                print(f"⏳ Host is now listening on port {self.local_port}...")
-                # Wait for connection to be established
-                self.wait_for_connection()
-                return
-            elif role == 'client':
-                # Act as client - connect to host
-                print("🔌 Acting as CLIENT - connecting to host...")
-                # Wait a moment for host to start listening
-                print("⏳ Waiting 2 seconds for host to start listening...")
-                time.sleep(2)
-                self.connect_to_peer()
-                print("✅ Client connection successful")
+    async def start_group(self):
+        """Start serving peers as a hub, or join the other nodes of a mesh."""
+        try:
+            status = await self.require_tailscale()
+            if self.role == 'hub':
+                await self.group.start('0.0.0.0', self.local_port)
             else:
-                # Auto mode - try client first, then host
-                print("🔄 Auto mode - trying client first...")
-                try:
-                    time.sleep(1)  # Wait a moment for other side to start listening
-                    self.connect_to_peer()
-                    print("✅ Auto mode: Successfully connected as client")
-                except Exception as connect_error:
-                    print(f"❌ Auto mode: Client connection failed, switching to host mode: {connect_error}")
-                    self.start_listener()
-                    print("✅ Auto mode: Now listening as host")
-                    self.wait_for_connection()
-                    return
-                
+                await self.start_mesh(status)
+        except asyncio.CancelledError:
+            logger.info("🛑 %s start cancelled", self.role.title())
+            raise
         except Exception as e:
-            print(f"❌ Connection failed: {e}")
-            raise Exception(f"Connection failed: {str(e)}")
-            
-    def wait_for_connection(self):
-        """Wait for connection to be established (for host mode)."""
-        print("⏳ Waiting for peer connection...")
-        max_wait = 30  # Wait up to 30 seconds
-        wait_time = 0
-        while not self.connected and wait_time < max_wait:
-            time.sleep(0.5)
-            wait_time += 0.5
-            print(f"⏳ Still waiting... ({wait_time:.1f}s) - connected: {self.connected}, socket: {self.peer_socket is not None}")
-            
-        if self.connected:
-            print("✅ Connection established!")
-            print(f"🔍 Final connection state - connected: {self.connected}, socket: {self.peer_socket is not None}")
+            logger.error("❌ %s failed to start: %s", self.role.title(), e)
+            self.connect_future = None
+            self.close_connection()
+            self.connection_failed.emit(f"{self.role.title()} failed to start: {str(e)}")
         else:
-            print("❌ Connection timeout - no peer connected")
-            raise Exception("Connection timeout - no peer connected within 30 seconds")
+            self.connect_future = None
+            self.connected = True
+            self.connection_status_changed.emit(True)
             
+    async def start_mesh(self, status):
+        """Listen for the other mesh nodes and dial the ones this node should."""
+        self_node = status.self_node
+        self_address = self_node.addresses[0] if self_node and self_node.addresses else None
+        await self.group.start('0.0.0.0', self.local_port, self_address=self_address)
+        addresses = []
+        for name in self.config.get_mesh_peers() or [self.peer_address]:
+            peer = status.find_peer(name)
+            address = peer.addresses[0] if peer and peer.addresses else name
+            addresses.append(address)
+            if self.group.add_peer(address, self.local_port):
+                logger.info("🕸️ Dialing mesh node %s", address)
+            else:
+                logger.info("🕸️ Waiting for mesh node %s to dial in", address)
+        await self.open_side_channel(addresses)
+        
+    async def open_side_channel(self, addresses):
+        """Open the UDP side channel to the given peers, if it is enabled.
+        
+        The channel is optional: if it cannot be opened, cursors and previews
+        are simply not shown, and nothing else is affected.
+        """
+        if not self.config.get_side_channel():
+            return
+        channel = DatagramChannel(self.on_datagram)
+        try:
+            await channel.open('0.0.0.0', self.local_port)
+        except OSError as e:
+            logger.warning("❌ Side channel unavailable: %s", e)
+            return
+        for address in addresses:
+            channel.add_peer(address, self.local_port)
+        self.datagrams = channel
+                
+    async def require_tailscale(self):
+        """Return the Tailscale status, raising if Tailscale is not running."""
+        # Usually answered from the cache filled when the app started
+        status = await self.tailscale.get_status()
+        if not status.running:
+            self.tailscale.invalidate()
+            raise Exception("Tailscale is not running. Please start Tailscale first.")
+        logger.info("✅ Tailscale is running")
+        return status
+        
+    def attach(self, connection, resumed):
+        """Run the session over an established stream; runs on the loop."""
+        if resumed:
+            logger.info("🔁 Session resumed, replaying %d unacknowledged frames", len(self.session.unacked))
+        else:
+            # A new session: nothing queued or half-received for the old one still applies
+            logger.info("🆕 New session started")
+            self.reset_palettes()
+            self.reassembler.reset()
+            self.file_receiver.abort_all()
+            if self.outbound_queue:
+                self.outbound_queue.close()
+            self.outbound_queue = OutboundQueue(on_congestion=self.send_congestion_changed.emit)
+        self.connection = PeerConnection(
+            connection, self.outbound_queue, self.on_frame,
+            on_closed=self.on_connection_closed, session=self.session,
+            stats=self.link_stats, on_stats=self.on_link_stats
+        )
+        self.connection.task = asyncio.ensure_future(self.connection.run())
+        self.connected = True
+        self.connection_status_changed.emit(True)
+        
+    def on_frame(self, msg_type, flags, channel, payload):
+        """Handle a frame read by the connection, joining split messages first."""
+        payload = self.reassembler.feed(msg_type, flags, channel, payload)
+        if payload is not None:
+            self.process_received_data(msg_type, payload)
+        
+    def on_link_stats(self, stats):
+        """Publish fresh link measurements after every heartbeat."""
+        self.link_stats_updated.emit(stats.snapshot())
+        
+    def on_connection_closed(self, connection):
+        """Reconnect in the background when the connection drops."""
+        if connection is not self.connection:
+            return
+        self.connection = None
+        self.connected = False
+        if self.session is None:
+            return
+        logger.warning("🔁 Connection lost - reconnecting...")
+        self.connection_interrupted.emit()
+        self.connect_future = asyncio.ensure_future(self.establish(self.reconnect_timeout))
+        
     def disconnect(self):
-        """Disconnect from peer."""
+        """Disconnect from peer and end the session."""
         self.connected = False
+        if self.outbound_queue:
+            self.outbound_queue.close()
+        self.engine.call_soon(self.close_connection)
         
-        if self.peer_socket:
-            try:
-                self.peer_socket.close()
-            except:
-                pass
-            self.peer_socket = None
-            
-        if self.listener_socket:
-            try:
-                self.listener_socket.close()
-            except:
-                pass
-            self.listener_socket = None
-            
-        if self.listener_thread and self.listener_thread.is_alive():
-            self.listener_thread.join(timeout=1)
-            
+    def close_connection(self):
+        """Cancel any connection attempt and end the session; runs on the loop."""
+        self.session = None
+        if self.connect_future:
+            self.connect_future.cancel()
+            self.connect_future = None
+        connection = self.connection
+        self.connection = None
+        if connection:
+            connection.close()
+        if self.group:
+            self.group.close()
+            self.group = None
+        if self.datagrams:
+            self.datagrams.close()
+            self.datagrams = None
+        if self.outbound_queue:
+            self.outbound_queue.close()
+        self.connected = False
+        self.file_receiver.abort_all()
         self.connection_status_changed.emit(False)
         
+    def shutdown(self):
+        """Disconnect and stop the network engine."""
+        self.disconnect()
+        self.engine.stop()
+        self.file_reader.shutdown(wait=False, cancel_futures=True)
+        
     def check_tailscale_status(self):
-        """Check if Tailscale is running and accessible."""
+        """Check if Tailscale is running and accessible; blocks, so not for the GUI thread."""
         try:
-            # Try to get Tailscale status using full path
-            import subprocess
-            import os
-            
-            # Try different possible paths for tailscale
-            possible_paths = [
-                'tailscale',  # If in PATH
-                r'C:\Program Files\Tailscale\tailscale.exe',
-                r'C:\Program Files (x86)\Tailscale\tailscale.exe'
-            ]
-            
-            for path in possible_paths:
-                try:
-                    result = subprocess.run(
-                        [path, 'status'], 
-                        capture_output=True, 
-                        text=True, 
-                        timeout=5
-                    )
-                    if result.returncode == 0:
-                        return True
-                except:
-                    continue
-                    
-            return False
-        except:
+            return self.engine.submit(self.tailscale.get_status()).result().running
+        except Exception:
             return False
             
+    def probe_tailscale(self):
+        """Refresh the cached Tailscale status in the background."""
+        self.engine.submit(self.tailscale.get_status())
+        
+    def resolve_peer_address(self, status):
+        """Match the configured peer against the tailnet and return the address to dial.
+        
+        A peer may be configured by host name as well as by address. When the
+        profile still has only a default address, that is not in the tailnet,
+        and exactly one other node is online, that node is taken as the peer
+        and saved for the profile. An address the user set is never replaced.
+        """
+        peer = status.find_peer(self.peer_address)
+        if peer is None:
+            online = status.online_peers()
+            if len(online) != 1 or not online[0].addresses:
+                return self.peer_address
+            if self.config.has_peer_address(self.profile):
+                logger.warning("🔍 %s is not in the tailnet; check the peer address for %s",
+                               self.peer_address, self.profile)
+                return self.peer_address
+            peer = online[0]
+            logger.info("📍 %s is not in the tailnet, using %s instead", self.peer_address, peer.host_name)
+            self.config.set_peer_address(self.profile, peer.addresses[0])
+        if not peer.online:
+            logger.warning("💤 Tailscale reports %s as offline", peer.host_name)
+        elif peer.direct:
+            logger.info("🛰️ %s is reachable directly at %s", peer.host_name, peer.current_address)
+        else:
+            logger.info("🛰️ %s is relayed through DERP %s", peer.host_name, peer.relay)
+        if self.peer_address in peer.addresses:
+            return self.peer_address
+        return peer.addresses[0] if peer.addresses else self.peer_address
+        
     def get_peer_address(self, profile):
         """Get the peer's Tailscale IP address."""
         # Get the configured peer address from settings
-        from utils.config_manager import ConfigManager
-        config = ConfigManager()
-        return config.get_peer_address(profile)
+        return self.config.get_peer_address(profile)
             
-    def start_listener(self):
-        """Start listening for incoming connections."""
-        try:
-            print(f"🔧 Creating socket for port {self.local_port}...")
-            self.listener_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.listener_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            
-            print(f"🔧 Binding socket to 0.0.0.0:{self.local_port}...")
-            self.listener_socket.bind(('0.0.0.0', self.local_port))
-            
-            print(f"🔧 Starting to listen on port {self.local_port}...")
-            self.listener_socket.listen(1)
-            print(f"✅ Successfully listening on port {self.local_port}")
-            
-            # Start listener thread
-            self.listener_thread = threading.Thread(target=self.listen_for_connections)
-            self.listener_thread.daemon = True
-            self.listener_thread.start()
-            print("✅ Listener thread started")
-            
-        except Exception as e:
-            print(f"❌ Failed to start listener: {e}")
-            raise Exception(f"Failed to start listener: {str(e)}")
-            
-    def listen_for_connections(self):
-        """Listen for incoming connections in a separate thread."""
-        print("👂 Listening for incoming connections...")
-        while True:  # Keep listening until we get a connection
-            try:
-                client_socket, address = self.listener_socket.accept()
-                print(f"✅ Peer connected from {address}")
-                self.peer_socket = client_socket
-                self.connected = True
-                self.connection_status_changed.emit(True)
-                print("✅ Connection state set to True (listener)")
-                self.handle_peer_connection()
-                break  # Exit the loop once we have a connection
-            except Exception as e:
-                print(f"❌ Listener error: {e}")
-                break
-                
-    def connect_to_peer(self):
-        """Connect to the peer."""
-        try:
-            print(f"🔌 Connecting to {self.peer_address}:{self.local_port}")
-            self.peer_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.peer_socket.connect((self.peer_address, self.local_port))
-            print("✅ Socket connected successfully")
-            
-            # Set connection state
-            self.connected = True
-            self.connection_status_changed.emit(True)
-            print("✅ Connection state set to True")
-            
-            # Start receiving thread
-            receive_thread = threading.Thread(target=self.receive_data)
-            receive_thread.daemon = True
-            receive_thread.start()
-            print("✅ Receive thread started")
-            
-        except Exception as e:
-            print(f"❌ Connection failed: {e}")
-            self.peer_socket = None
-            self.connected = False
-            raise Exception(f"Failed to connect to peer: {str(e)}")
-            
-    def handle_peer_connection(self):
-        """Handle incoming peer connection."""
-        print("🤝 Handling incoming peer connection...")
-        # Start receiving thread
-        receive_thread = threading.Thread(target=self.receive_data)
-        receive_thread.daemon = True
-        receive_thread.start()
-        print("✅ Receive thread started for incoming connection")
-        
-    def receive_data(self):
-        """Receive data from peer."""
-        print("📥 Starting receive data loop...")
-        while self.connected and self.peer_socket:
-            try:
-                print("📥 Waiting for data length...")
-                # Receive data length first
-                length_data = self.peer_socket.recv(8)
-                if not length_data:
-                    print("❌ No length data received, connection closed")
-                    break
-                    
-                data_length = int.from_bytes(length_data, 'big')
-                print(f"📥 Received data length: {data_length} bytes")
-                
-                # Receive actual data
-                data = b''
-                while len(data) < data_length:
-                    chunk = self.peer_socket.recv(data_length - len(data))
-                    if not chunk:
-                        print("❌ Connection closed while receiving data")
-                        break
-                    data += chunk
-                    
-                if data:
-                    print(f"📥 Received {len(data)} bytes of data")
-                    self.process_received_data(data)
-                else:
-                    print("❌ No data received")
-                    
-            except Exception as e:
-                print(f"❌ Error receiving data: {e}")
-                break
-                
-        print("📥 Receive data loop ended")
-        if self.connected:  # Only disconnect if we're still connected
-            self.disconnect()
+    def reset_palettes(self):
+        """Start fresh stroke style palettes for a new session; runs on the loop."""
+        self.send_palette = StrokePalette()
+        self.receive_palette = StrokePalette()
+        
+    def can_send(self):
+        """Return True while a session is up, even if it is reconnecting."""
+        if self.group:
+            return self.connected
+        return bool(self.outbound_queue and not self.outbound_queue.closed)
+        
+    def is_congested(self):
+        """Return True while the outbound queue is above its high watermark."""
+        return bool(self.outbound_queue and self.outbound_queue.congested)
+        
+    def process_received_data(self, msg_type, payload, sender=None):
+        """Decode and route a received message through the registry.
         
-    def process_received_data(self, data):
-        """Process received data and emit appropriate signals."""
+        sender is the origin id of the node that sent it, when it did not
+        come straight from the one peer of the session.
+        """
+        self.receiving_from = sender
         try:
-            print(f"🔍 Processing received data: {data[:100]}...")  # Show first 100 chars
-            message = json.loads(data.decode('utf-8'))
-            message_type = message.get('type')
-            content = message.get('content', '')
-            
-            print(f"📥 Processing received data - type: {message_type}, content: {content}")
-            
-            if message_type == 'chat':
-                print(f"💬 Emitting chat message: {content}")
-                self.message_received.emit(content)
-            elif message_type == 'drawing':
-                print(f"🎨 Emitting drawing data")
-                self.drawing_data_received.emit(message.get('data', {}))
-            elif message_type == 'file':
-                file_name = message.get('name', 'unknown')
-                file_data = message.get('data', b'')
-                print(f"📁 Emitting file: {file_name}")
-                self.file_received.emit(file_name, file_data)
-            else:
-                print(f"❓ Unknown message type: {message_type}")
-                
+            if not self.registry.dispatch(msg_type, payload):
+                logger.warning("❓ Unknown message type: %d", msg_type)
         except Exception as e:
-            print(f"❌ Error processing received data: {e}")
-            print(f"❌ Raw data: {data}")
-            
+            logger.error("❌ Error processing received frame type %d: %s", msg_type, e)
+        finally:
+            self.receiving_from = None
+            
+    def on_origin(self, payload):
+        """Unwrap a message a hub relayed and process it as sent by its origin."""
+        origin_id, _, msg_type, payload = protocol.decode_origin(payload)
+        self.process_received_data(msg_type, payload, origin_id)
+            
+    def decode_drawing(self, msg_type, payload):
+        """Decode a drawing message against the current session's palette, noting its sender."""
+        data = protocol.decode_drawing(msg_type, payload, self.receive_palette)
+        if self.receiving_from is not None:
+            data['sender'] = self.receiving_from
+        return data
+        
+    def on_datagram(self, sender_id, dgram_type, payload):
+        """Queue a cursor or preview update from the side channel for the GUI."""
+        data = protocol.decode_ephemeral(dgram_type, payload)
+        data['sender'] = sender_id
+        self.inbound.put('ephemeral', data)
+        
+    def on_file_offer(self, payload):
+        """Start receiving a file offered by the peer."""
+        transfer = self.file_receiver.handle_offer(payload)
+        logger.info("📁 Receiving file: %s (%d bytes)", transfer.file_name, transfer.file_size)
+        
+    def on_file_chunk(self, payload):
+        """Write a received file chunk in place."""
+        self.file_receiver.handle_chunk(payload)
+        
+    def on_file_end(self, payload):
+        """Finish a received file and queue it for the GUI."""
+        transfer = self.file_receiver.handle_end(payload)
+        logger.info("📁 Received file: %s", transfer.file_name)
+        self.inbound.put('file', (transfer.file_name, transfer.path))
+        
+    def drain_inbound(self):
+        """Hand queued received messages to the GUI; runs on the GUI thread."""
+        self.inbound.drain()
+        
+    def emit_messages(self, messages):
+        """Emit a batch of received chat messages one by one."""
+        for content in messages:
+            self.message_received.emit(content)
+            
+    def emit_files(self, files):
+        """Emit a batch of received files one by one."""
+        for file_name, path in files:
+            self.file_received.emit(file_name, path)
+            
+    def emit_ephemeral(self, updates):
+        """Emit the latest cursor and preview of each peer from a batch of updates."""
+        latest = {(data['sender'], data['type']): data for data in updates}
+        self.ephemeral_batch_received.emit(list(latest.values()))
+        
     def send_message(self, message):
         """Send a chat message to the peer."""
-        print(f"🔤 Sending chat message: {message}")
-        print(f"🔍 Connection status - connected: {self.connected}, socket: {self.peer_socket is not None}")
-        
-        # Force check connection status
-        if self.peer_socket and self.peer_socket.fileno() != -1:
-            print("✅ Socket is valid and connected")
-            self.connected = True
+        if self.can_send():
+            self.send_data(protocol.MSG_CHAT, protocol.encode_chat(message))
         else:
-            print("❌ Socket is invalid or disconnected")
-            self.connected = False
-            
-        if self.connected and self.peer_socket:
-            data = {
-                'type': 'chat',
-                'content': message
-            }
-            print(f"📤 Sending data: {data}")
-            self.send_data(data)
-            print(f"✅ Chat message sent successfully")
-        else:
-            print(f"❌ Cannot send message - connected: {self.connected}, socket: {self.peer_socket is not None}")
+            logger.warning("❌ Cannot send message - not connected")
             
     def send_drawing_data(self, drawing_data):
         """Send drawing data to the peer."""
-        print(f"🎨 Sending drawing data: {len(drawing_data)} points")
-        if self.connected and self.peer_socket:
-            data = {
-                'type': 'drawing',
-                'data': drawing_data
-            }
-            self.send_data(data)
-            print(f"✅ Drawing data sent successfully")
+        queue = self.outbound_queue
+        if not self.can_send():
+            logger.debug("❌ Cannot send drawing - not connected")
+        elif self.group:
+            # A group sends each stroke to many peers, so it must be self-contained
+            self.send_data(*protocol.encode_drawing(drawing_data, None))
         else:
-            print(f"❌ Cannot send drawing - connected: {self.connected}, socket: {self.peer_socket is not None}")
+            # The send palette belongs to the session the queue is written to, and a
+            # new session replaces both on the loop, so strokes are encoded there too
+            size = protocol.HEADER_SIZE + len(drawing_data.get('points', ()))
+            if not queue.put(self.drawing_frames(drawing_data), channel=protocol.CHANNEL_INTERACTIVE,
+                             timeout=0, size=size):
+                logger.warning("📦 Send queue full - dropping %s", drawing_data['type'])
+            
+    def drawing_frames(self, drawing_data):
+        """Yield the frames of a drawing message, encoded when the write loop reaches it."""
+        frame = Frame(*protocol.encode_drawing(drawing_data, self.send_palette))
+        if frame.length > self.max_frame_size:
+            yield from fragment_frames(frame, self.max_frame_size)
+        else:
+            yield frame
+            
+    def send_ephemeral(self, data):
+        """Send a cursor position or stroke preview over the side channel, if it is open."""
+        datagrams = self.datagrams
+        if datagrams is None:
+            return
+        # Previews are trimmed to fit, so every encoded update can be sent
+        datagrams.send(*protocol.encode_ephemeral(data))
             
     def send_file(self, file_path, file_name):
-        """Send a file to the peer."""
-        print(f"📁 Sending file: {file_name}")
-        if self.connected and self.peer_socket and os.path.exists(file_path):
+        """Queue a file to be streamed to the peer in chunks."""
+        logger.info("📁 Sending file: %s", file_name)
+        if self.group:
+            logger.warning("❌ File transfer is not available in %s mode", self.role)
+            return
+        if self.can_send() and os.path.exists(file_path):
             try:
-                with open(file_path, 'rb') as f:
-                    file_data = f.read()
+                # Chunks always fit in one frame, so file data never needs reassembly
+                chunk_size = min(CHUNK_SIZE, self.max_frame_size - protocol.FILE_CHUNK.size)
+                sender = FileSender(file_path, file_name, chunk_size=chunk_size)
+                if not self.outbound_queue.put(self.file_frames(sender), timeout=0, size=sender.file_size):
+                    logger.warning("❌ Cannot send file - the send queue is full")
                     
-                data = {
-                    'type': 'file',
-                    'name': file_name,
-                    'data': file_data
-                }
-                self.send_data(data)
-                print(f"✅ File sent successfully")
-                
             except Exception as e:
-                print(f"Error sending file: {e}")
+                logger.error("❌ Error sending file: %s", e)
         else:
-            print(f"❌ Cannot send file - connected: {self.connected}, socket: {self.peer_socket is not None}")
+            logger.warning("❌ Cannot send file - not connected or file missing")
             
-    def send_data(self, data):
-        """Send data to the peer."""
+    def file_frames(self, sender):
+        """Yield the frames of a file transfer, reporting progress as chunks go out.
+        
+        Progress is reported once per whole percent rather than per chunk,
+        so a large file does not flood the GUI thread with signals. The last
+        report means every frame is written out, not that the peer has it.
+        """
+        reported = 0
+        for item in sender.frames(self.file_reader):
+            if isinstance(item, Future):
+                # The next chunk is still being read; the queue serves others meanwhile
+                yield item
+                continue
+            msg_type, payload = item
+            yield Frame(msg_type, payload, channel=protocol.CHANNEL_BULK)
+            if msg_type == protocol.MSG_FILE_CHUNK and sender.bytes_sent < sender.file_size:
+                percent = sender.bytes_sent * 100 // sender.file_size
+                if percent > reported:
+                    reported = percent
+                    self.file_send_progress.emit(sender.file_name, sender.bytes_sent, sender.file_size)
+        self.file_send_progress.emit(sender.file_name, sender.file_size, sender.file_size)
+        logger.info("✅ File written out: %s", sender.file_name)
+        
+    def send_data(self, msg_type, payload, channel=protocol.CHANNEL_INTERACTIVE):
+        """Queue a framed payload for the connection's write loop.
+        
+        The payload is either a single buffer or a tuple of buffers that are
+        written back to back. A payload larger than the maximum frame size is
+        queued as a stream of sub-frames. Never blocks: when the queue is
+        full the message is dropped, and congestion has already been reported
+        through send_congestion_changed. Returns True if it was queued.
+        """
         try:
-            json_data = json.dumps(data).encode('utf-8')
-            data_length = len(json_data)
-            
-            print(f"📦 Sending {data_length} bytes of data")
-            
-            # Send length first
-            self.peer_socket.send(data_length.to_bytes(8, 'big'))
-            
-            # Send data
-            self.peer_socket.send(json_data)
-            
-            print(f"✅ Data sent successfully")
+            group = self.group
+            if group:
+                return group.send(msg_type, payload, channel)
+            frame = Frame(msg_type, payload, channel=channel)
+            logger.debug("📦 Queueing frame type %d: %d bytes", msg_type, frame.size)
+            if not self.outbound_queue:
+                return False
+            if frame.length > self.max_frame_size:
+                queued = self.outbound_queue.put(
+                    fragment_frames(frame, self.max_frame_size), channel=channel, timeout=0, size=frame.size
+                )
+            else:
+                queued = self.outbound_queue.put(frame, timeout=0)
+            if not queued and not self.outbound_queue.closed:
+                logger.warning("📦 Send queue full - dropping frame type %d", msg_type)
+            return queued
             
         except Exception as e:
-            print(f"❌ Error sending data: {e}")
-            self.disconnect() 
\ No newline at end of file
+            logger.error("❌ Error sending data: %s", e)
+            return False
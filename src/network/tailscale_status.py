@@ -0,0 +1,171 @@
+"""
+Tailscale status probing for Vortex Tunnel.
+Runs `tailscale status --json` without blocking and keeps the parsed peer table.
+"""
+
+import asyncio
+import json
+import time
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Places the tailscale CLI is tried, in order; the first that answers is remembered
+TAILSCALE_PATHS = (
+    'tailscale',  # If in PATH
+    r'C:\Program Files\Tailscale\tailscale.exe',
+    r'C:\Program Files (x86)\Tailscale\tailscale.exe'
+)
+
+# Reuse a status result for this many seconds
+STATUS_TTL = 30.0
+PROBE_TIMEOUT = 5.0
+
+
+class TailscalePeer:
+    """One node in the tailnet, as reported by tailscale status."""
+    
+    def __init__(self, host_name, dns_name, addresses, online, relay='', current_address=''):
+        self.host_name = host_name
+        self.dns_name = dns_name
+        self.addresses = addresses
+        self.online = online
+        self.relay = relay
+        self.current_address = current_address
+        
+    @property
+    def direct(self):
+        """True when traffic flows straight to the peer rather than through a DERP relay."""
+        return bool(self.current_address)
+        
+    @classmethod
+    def from_json(cls, node):
+        """Build a peer from one node entry of `tailscale status --json`."""
+        return cls(
+            node.get('HostName', ''),
+            node.get('DNSName', '').rstrip('.'),
+            list(node.get('TailscaleIPs') or ()),
+            bool(node.get('Online')),
+            relay=node.get('Relay', ''),
+            current_address=node.get('CurAddr', '')
+        )
+
+
+class TailscaleStatus:
+    """A parsed `tailscale status --json` result."""
+    
+    def __init__(self, backend_state='', self_node=None, peers=()):
+        self.backend_state = backend_state
+        self.self_node = self_node
+        self.peers = list(peers)
+        
+    @property
+    def running(self):
+        """True when the local node is up and connected to the tailnet."""
+        return self.backend_state == 'Running'
+        
+    @classmethod
+    def from_json(cls, data):
+        """Parse the decoded JSON output of `tailscale status --json`."""
+        self_node = data.get('Self')
+        return cls(
+            data.get('BackendState', ''),
+            TailscalePeer.from_json(self_node) if self_node else None,
+            [TailscalePeer.from_json(node) for node in (data.get('Peer') or {}).values()]
+        )
+        
+    def find_peer(self, name_or_address):
+        """Return the peer with this address, host name or DNS name, or None."""
+        key = name_or_address.lower()
+        for peer in self.peers:
+            if (name_or_address in peer.addresses or key == peer.host_name.lower()
+                    or key == peer.dns_name.lower() or key == peer.dns_name.split('.')[0].lower()):
+                return peer
+        return None
+        
+    def online_peers(self):
+        """Return the peers that are currently online."""
+        return [peer for peer in self.peers if peer.online]
+
+
+class TailscaleProbe:
+    """Asynchronous, cached access to the local Tailscale status.
+    
+    The CLI runs as a subprocess on the event loop, never on the GUI thread.
+    A result is reused for ttl seconds and concurrent callers share one
+    probe, so connecting and reconnecting rarely wait on a subprocess at all.
+    """
+    
+    def __init__(self, paths=TAILSCALE_PATHS, ttl=STATUS_TTL, timeout=PROBE_TIMEOUT):
+        self.paths = tuple(paths)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.executable = None
+        self.status = None
+        self.checked_at = None
+        self.pending = None
+        
+    def cached(self):
+        """Return the last status if it is still fresh, otherwise None."""
+        if self.status is not None and time.monotonic() - self.checked_at < self.ttl:
+            return self.status
+        return None
+        
+    def invalidate(self):
+        """Forget the cached status so the next request probes again."""
+        self.status = None
+        
+    async def get_status(self):
+        """Return a fresh status, probing only when the cached one has expired."""
+        status = self.cached()
+        if status is not None:
+            return status
+        if self.pending is None:
+            self.pending = asyncio.ensure_future(self.probe())
+            self.pending.add_done_callback(self.probe_done)
+        return await asyncio.shield(self.pending)
+        
+    def probe_done(self, future):
+        """Cache the result of a finished probe."""
+        self.pending = None
+        if not future.cancelled() and future.exception() is None:
+            self.status = future.result()
+            self.checked_at = time.monotonic()
+            
+    async def probe(self):
+        """Run the CLI and parse its output; an unreachable CLI gives an empty status."""
+        paths = (self.executable,) if self.executable else self.paths
+        for path in paths:
+            output = await self.run(path)
+            if output is None:
+                continue
+            self.executable = path
+            try:
+                return TailscaleStatus.from_json(json.loads(output))
+            except (ValueError, AttributeError) as e:
+                logger.warning("❌ Could not parse tailscale status: %s", e)
+                return TailscaleStatus()
+        # Search every path again next time in case Tailscale was installed or moved
+        self.executable = None
+        return TailscaleStatus()
+        
+    async def run(self, path):
+        """Run `tailscale status --json` and return its output, or None if it could not run."""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                path, 'status', '--json',
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError:
+            return None
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("⏱️ %s status timed out after %.1fs", path, self.timeout)
+            process.kill()
+            await process.wait()
+            return None
+        # A stopped daemon exits non-zero but still reports its state
+        return output or None
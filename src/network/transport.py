@@ -0,0 +1,568 @@
+"""
+Asyncio transport engine for Vortex Tunnel.
+Runs every socket on one background event loop and moves frames between peers and their outbound queues.
+"""
+
+import asyncio
+import ipaddress
+import socket
+import threading
+from collections import deque
+
+from network import protocol
+from network.outbound import Frame
+from network.session import ACK_DELAY, ACK_EVERY, SEQUENCE_MASK, UNSEQUENCED_TYPES
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Ping the peer this often, and drop the link after this long without hearing from it
+HEARTBEAT_INTERVAL = 1.0
+HEARTBEAT_TIMEOUT = 10.0
+
+# Reusable receive buffer per connection; larger frames get a buffer of their own
+RECEIVE_BUFFER_SIZE = 256 * 1024
+
+
+class NetworkEngine:
+    """Runs an asyncio event loop on a single background thread.
+    
+    All listeners, connections and timers live on this loop; other threads
+    hand work to it through submit and call_soon.
+    """
+    
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        
+    def start(self):
+        """Start the loop thread if it is not running yet."""
+        if self.loop is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.run_loop, args=(self.loop,), name="vortex-network", daemon=True)
+        self.thread.start()
+        
+    def run_loop(self, loop):
+        """Run the event loop until stop is called, then close it."""
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+            
+    def submit(self, coro):
+        """Schedule a coroutine from any thread and return a concurrent future for it."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+        
+    def call_soon(self, callback, *args):
+        """Run a callback on the loop thread from any thread."""
+        self.start()
+        self.loop.call_soon_threadsafe(callback, *args)
+        
+    def stop(self):
+        """Cancel everything still running on the loop and stop its thread."""
+        if self.loop is None:
+            return
+        loop, thread = self.loop, self.thread
+        self.loop = None
+        self.thread = None
+        future = asyncio.run_coroutine_threadsafe(self.shutdown(), loop)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(loop.stop))
+        if thread is not threading.current_thread():
+            thread.join(timeout=1)
+            
+    async def shutdown(self):
+        """Cancel and await every other task on the loop."""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class FrameProtocol(asyncio.BufferedProtocol):
+    """Reads frames straight into a reusable receive buffer.
+    
+    asyncio reads the socket with recv_into into the free tail of the buffer,
+    and every complete frame is handed to the handler as a memoryview slice
+    of it, so payload bytes are never copied after the kernel copies them in.
+    The slice is only valid during the handler call; anything kept must be
+    copied. A frame that does not fit the buffer is read in place into a
+    buffer of exactly its size.
+    
+    Frames that arrive before a handler is attached (such as the session
+    hello) are copied into a backlog. A header announcing more than
+    max_frame_size bytes ends the connection before anything is allocated.
+    """
+    
+    def __init__(self, on_connected=None, buffer_size=RECEIVE_BUFFER_SIZE,
+                 max_frame_size=protocol.MAX_FRAME_SIZE):
+        self.on_connected = on_connected
+        self.max_frame_size = max_frame_size
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        self.large = None
+        self.large_view = None
+        self.large_filled = 0
+        self.large_header = None
+        self.handler = None
+        self.backlog = deque()
+        self.backlog_ready = asyncio.Event()
+        self.writable = asyncio.Event()
+        self.writable.set()
+        self.transport = None
+        self.closed = asyncio.get_running_loop().create_future()
+        
+    def connection_made(self, transport):
+        """Remember the transport and announce the connection."""
+        self.transport = transport
+        if self.on_connected:
+            self.on_connected(self)
+            
+    def connection_lost(self, exc):
+        """Resolve the closed future and release anyone waiting to write."""
+        self.writable.set()
+        self.backlog_ready.set()
+        if not self.closed.done():
+            self.closed.set_result(exc)
+            
+    def pause_writing(self):
+        """Called by the transport when its write buffer is above the high-water mark."""
+        self.writable.clear()
+        
+    def resume_writing(self):
+        """Called by the transport once its write buffer has drained."""
+        self.writable.set()
+        
+    async def drain(self):
+        """Wait until the transport can take more data."""
+        if self.closed.done():
+            raise ConnectionResetError("Connection lost")
+        await self.writable.wait()
+        
+    def get_buffer(self, sizehint):
+        """Return the free space asyncio should read into."""
+        if self.large is not None:
+            return self.large_view[self.large_filled:]
+        return self.view[self.end:]
+        
+    def buffer_updated(self, nbytes):
+        """Parse the frames completed by the bytes just read."""
+        try:
+            if self.large is not None:
+                self.large_filled += nbytes
+                if self.large_filled == len(self.large):
+                    header = self.large_header
+                    payload = self.large_view
+                    self.large = self.large_view = self.large_header = None
+                    self.deliver(*header, payload)
+                return
+            self.end += nbytes
+            self.parse()
+        except Exception as e:
+            # A frame the session cannot accept ends the connection
+            if not self.closed.done():
+                self.closed.set_result(e)
+            self.transport.close()
+            
+    def parse(self):
+        """Deliver every complete frame in the buffer and make room for the next one."""
+        buffer = self.buffer
+        view = self.view
+        while self.end - self.start >= protocol.HEADER_SIZE and not self.transport.is_closing():
+            msg_type, flags, channel, length, seq = protocol.decode_header(buffer, self.start)
+            if length > self.max_frame_size:
+                raise ValueError(f"Peer sent a {length} byte frame, limit is {self.max_frame_size}")
+            payload_start = self.start + protocol.HEADER_SIZE
+            frame_end = payload_start + length
+            if frame_end <= self.end:
+                self.start = frame_end
+                self.deliver(msg_type, flags, channel, seq, view[payload_start:frame_end])
+                continue
+            if protocol.HEADER_SIZE + length > len(buffer):
+                # Too big for the shared buffer: read the rest of it in place into its own buffer
+                have = self.end - payload_start
+                self.large = bytearray(length)
+                self.large_view = memoryview(self.large)
+                self.large_view[:have] = view[payload_start:self.end]
+                self.large_filled = have
+                self.large_header = (msg_type, flags, channel, seq)
+                self.start = self.end = 0
+                return
+            break
+            
+        remaining = self.end - self.start
+        if not remaining:
+            self.start = self.end = 0
+            return
+        needed = protocol.HEADER_SIZE
+        if remaining >= protocol.HEADER_SIZE:
+            needed += protocol.decode_header(buffer, self.start)[3]
+        if self.start + needed > len(buffer):
+            # The partial frame would run off the end: move it to the front
+            view[:remaining] = view[self.start:self.end]
+            self.start = 0
+            self.end = remaining
+            
+    def deliver(self, msg_type, flags, channel, seq, payload):
+        """Hand a complete frame to the handler, or keep a copy until there is one."""
+        if self.handler:
+            self.handler(msg_type, flags, channel, seq, payload)
+        else:
+            self.backlog.append((msg_type, flags, channel, seq, bytes(payload)))
+            self.backlog_ready.set()
+            
+    async def next_backlogged(self):
+        """Wait for the next frame that arrived before a handler was attached."""
+        while not self.backlog:
+            if self.closed.done():
+                raise ConnectionResetError("Connection closed during handshake")
+            self.backlog_ready.clear()
+            await self.backlog_ready.wait()
+        return self.backlog.popleft()
+        
+    def set_handler(self, handler):
+        """Attach the frame handler and feed it everything in the backlog."""
+        self.handler = handler
+        while self.backlog and self.handler is handler:
+            handler(*self.backlog.popleft())
+            
+    def write_frame(self, frame, seq=0):
+        """Write one frame with its header and payload buffers gathered together."""
+        self.transport.writelines((frame.header(seq & SEQUENCE_MASK), *frame.parts))
+        
+    def close(self):
+        """Close the underlying transport."""
+        if self.transport:
+            self.transport.close()
+
+
+async def exchange_hello(connection, session, timeout=10):
+    """Swap session hellos over a fresh FrameProtocol connection.
+    
+    Returns True if the peer resumed the existing session and False if both
+    sides started a new one.
+    """
+    connection.write_frame(Frame(protocol.MSG_HELLO, session.hello(), channel=protocol.CHANNEL_CONTROL))
+    msg_type, _, _, _, payload = await asyncio.wait_for(connection.next_backlogged(), timeout)
+    if msg_type != protocol.MSG_HELLO or len(payload) != protocol.HELLO.size:
+        raise ValueError(f"Expected a session hello, got frame type {msg_type}")
+    return session.resume(payload)
+
+
+class PeerConnection:
+    """A framed stream connection to one peer, driven by the engine's loop.
+    
+    Incoming frames reach on_frame as views into the FrameProtocol's receive
+    buffer. The write loop drains the connection's outbound queue, writing
+    each header and its payload buffers with a single writelines call so the
+    transport can gather them.
+    
+    With a session, every frame except session control frames is numbered,
+    kept until the peer acknowledges it and replayed first on a resumed
+    connection. The queue belongs to the caller and survives the connection.
+    
+    A heartbeat pings the peer every heartbeat_interval seconds, feeds the
+    round-trip times and byte counts into stats and closes a link that has
+    been silent for heartbeat_timeout seconds.
+    """
+    
+    def __init__(self, connection, queue, on_frame, on_closed=None, session=None,
+                 stats=None, on_stats=None, heartbeat_interval=HEARTBEAT_INTERVAL,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        self.connection = connection
+        self.queue = queue
+        self.on_frame = on_frame
+        self.on_closed = on_closed
+        self.session = session
+        self.stats = stats
+        self.on_stats = on_stats
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.loop = asyncio.get_running_loop()
+        self.last_received = self.loop.time()
+        self.ready = asyncio.Event()
+        self.control = deque()
+        self.ack_timer = None
+        transport = connection.transport
+        self.peername = transport.get_extra_info('peername')
+        self.closed = False
+        queue.on_ready = self.wake
+        
+        # Keep the transport buffer small so the queue, not the buffer, decides write order
+        transport.set_write_buffer_limits(high=64 * 1024)
+        sock = transport.get_extra_info('socket')
+        if (sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6)
+                and hasattr(socket, 'TCP_NOTSENT_LOWAT')):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NOTSENT_LOWAT, 32 * 1024)
+            
+    def wake(self):
+        """Wake the write loop; safe to call from any thread."""
+        self.loop.call_soon_threadsafe(self.ready.set)
+        
+    async def run(self):
+        """Handle frames and run the write loop until the connection ends."""
+        self.connection.set_handler(self.handle_frame)
+        tasks = [
+            asyncio.ensure_future(self.wait_closed()),
+            asyncio.ensure_future(self.write_loop()),
+        ]
+        if self.heartbeat_interval:
+            tasks.append(asyncio.ensure_future(self.heartbeat()))
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception():
+                    logger.error("❌ Connection to %s failed: %s", self.peername, task.exception())
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.close()
+            if self.on_closed:
+                self.on_closed(self)
+                
+    async def wait_closed(self):
+        """Wait for the connection to end, raising whatever ended it."""
+        error = await self.connection.closed
+        if error:
+            raise error
+        logger.warning("❌ Connection closed by %s", self.peername)
+        
+    def handle_frame(self, msg_type, flags, channel, seq, payload):
+        """Handle one incoming frame; payload is only valid during this call."""
+        self.last_received = self.loop.time()
+        stats = self.stats
+        if stats:
+            stats.record_received(protocol.HEADER_SIZE + len(payload))
+        if msg_type == protocol.MSG_PING:
+            # The payload view is reused once this returns, so the echo needs its own copy
+            self.send_control(Frame(protocol.MSG_PONG, bytes(payload), channel=protocol.CHANNEL_CONTROL))
+            return
+        if msg_type == protocol.MSG_PONG:
+            if stats:
+                stats.record_rtt(self.last_received - protocol.decode_ping(payload) / 1e6)
+            return
+        session = self.session
+        if session:
+            if msg_type == protocol.MSG_ACK:
+                session.acknowledge(protocol.decode_ack(payload))
+                # Acknowledged data may reopen the send window
+                self.ready.set()
+                return
+            if msg_type not in UNSEQUENCED_TYPES:
+                session.receive(seq)
+                self.schedule_ack()
+        self.on_frame(msg_type, flags, channel, payload)
+        
+    async def heartbeat(self):
+        """Ping the peer on a timer and give up on a link that has gone quiet."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = self.loop.time()
+            if now - self.last_received > self.heartbeat_timeout:
+                raise TimeoutError(f"nothing received for {now - self.last_received:.1f}s")
+            self.send_control(Frame(
+                protocol.MSG_PING, protocol.encode_ping(int(now * 1e6)), channel=protocol.CHANNEL_CONTROL
+            ))
+            if self.stats:
+                self.stats.sample_rates(now)
+                if self.on_stats:
+                    self.on_stats(self.stats)
+                    
+    def send_control(self, frame):
+        """Write a connection control frame ahead of all queued frames."""
+        self.control.append(frame)
+        self.ready.set()
+        
+    def schedule_ack(self):
+        """Acknowledge now if enough frames arrived, otherwise after a short delay."""
+        if self.session.ack_due() >= ACK_EVERY:
+            self.send_ack()
+        elif self.ack_timer is None:
+            self.ack_timer = self.loop.call_later(ACK_DELAY, self.send_ack)
+            
+    def send_ack(self):
+        """Queue a cumulative acknowledgement ahead of all other frames."""
+        if self.ack_timer:
+            self.ack_timer.cancel()
+            self.ack_timer = None
+        if self.closed or not self.session.ack_due():
+            return
+        self.send_control(Frame(protocol.MSG_ACK, self.session.take_ack(), channel=protocol.CHANNEL_CONTROL))
+        
+    async def write_loop(self):
+        """Write queued frames in scheduler order until the queue is closed."""
+        queue = self.queue
+        session = self.session
+        if session:
+            # Frames the peer missed go first, under their original numbers
+            for seq, frame in list(session.unacked):
+                self.write_frame(frame, seq)
+                await self.connection.drain()
+                
+        while not self.closed and not queue.closed:
+            if self.control:
+                self.write_frame(self.control.popleft())
+                await self.connection.drain()
+                continue
+            if session and session.window_full():
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+            channel, frame = queue.next_frame()
+            if frame is None:
+                self.ready.clear()
+                # Re-check after clearing so a put that raced with us is not missed
+                if not queue.has_pending() and not self.control and not queue.closed:
+                    await self.ready.wait()
+                continue
+            seq = 0
+            if session and frame.msg_type not in UNSEQUENCED_TYPES:
+                seq = session.number(frame)
+            self.write_frame(frame, seq)
+            queue.charge(channel, frame.size)
+            await self.connection.drain()
+            
+    def write_frame(self, frame, seq=0):
+        """Write one frame and count it."""
+        self.connection.write_frame(frame, seq)
+        if self.stats:
+            self.stats.record_sent(frame.size)
+        
+    def close(self):
+        """Close the connection; the outbound queue is left to its owner."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.ack_timer:
+            self.ack_timer.cancel()
+            self.ack_timer = None
+        self.ready.set()
+        self.connection.close()
+
+
+async def dial_with_backoff(host, port, local_host=None, initial_delay=0.05, max_delay=2.0,
+                            max_frame_size=protocol.MAX_FRAME_SIZE):
+    """Dial until the peer accepts, doubling the delay after every failure.
+    
+    Returns the connected FrameProtocol.
+    """
+    loop = asyncio.get_running_loop()
+    delay = initial_delay
+    local_addr = (local_host, 0) if local_host else None
+    while True:
+        try:
+            _, connection = await loop.create_connection(
+                lambda: FrameProtocol(max_frame_size=max_frame_size), host, port, local_addr=local_addr
+            )
+            return connection
+        except OSError as e:
+            logger.debug("🔁 Dial to %s:%s failed (%s), retrying in %.2fs", host, port, e, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+def address_key(host):
+    """Return a sort key for an IP address string."""
+    address = ipaddress.ip_address(host.split('%')[0])
+    return address.version, int(address)
+
+
+def is_preferred(transport, outbound):
+    """Return True if this connection is the one both peers keep.
+    
+    When both peers dial each other at once there are two connections. Both
+    sides keep the one dialed by the lower address, so they always agree
+    without exchanging anything.
+    """
+    local = address_key(transport.get_extra_info('sockname')[0])
+    peer = address_key(transport.get_extra_info('peername')[0])
+    if local == peer:
+        return True
+    dialer, listener = (local, peer) if outbound else (peer, local)
+    return dialer < listener
+
+
+async def race_connect(host, port, listen=True, dial=True, listen_host='0.0.0.0',
+                       listen_port=None, local_host=None, timeout=30, grace=0.5,
+                       max_frame_size=protocol.MAX_FRAME_SIZE):
+    """Listen for the peer and dial it at the same time.
+    
+    Returns the FrameProtocol of the first connection to complete, unless a
+    duplicate shows up within the grace period, in which case the tie-break
+    in is_preferred decides. The grace period only applies when both
+    listening and dialing, since otherwise no duplicate can arrive. Every
+    other connection is closed.
+    """
+    loop = asyncio.get_running_loop()
+    candidates = asyncio.Queue()
+    server = None
+    dialer = None
+    chosen = None
+    
+    if listen:
+        try:
+            server = await loop.create_server(
+                lambda: FrameProtocol(
+                    on_connected=lambda connection: candidates.put_nowait((connection, False)),
+                    max_frame_size=max_frame_size
+                ),
+                listen_host, listen_port or port, reuse_address=True
+            )
+            logger.info("✅ Listening on port %s", listen_port or port)
+        except OSError as e:
+            if not dial:
+                raise
+            logger.warning("❌ Could not listen on port %s, dialing only: %s", listen_port or port, e)
+            
+    if dial:
+        async def dial_peer():
+            connection = await dial_with_backoff(host, port, local_host=local_host, max_frame_size=max_frame_size)
+            candidates.put_nowait((connection, True))
+        dialer = asyncio.ensure_future(dial_peer())
+        
+    try:
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                candidate = await asyncio.wait_for(candidates.get(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                if chosen:
+                    return chosen
+                raise TimeoutError(f"no peer connected within {timeout} seconds") from None
+                
+            connection, outbound = candidate
+            logger.info("✅ %s %s", 'Dialed' if outbound else 'Accepted', connection.transport.get_extra_info('peername'))
+            # A duplicate can only turn up while both listening and dialing
+            racing = server is not None and dialer is not None
+            if is_preferred(connection.transport, outbound) or not racing:
+                if chosen:
+                    chosen.close()
+                chosen = connection
+                return chosen
+            if chosen:
+                connection.close()
+            else:
+                # Give a preferred duplicate one grace period to turn up
+                chosen = connection
+                deadline = loop.time() + grace
+    except BaseException:
+        # Cancelled or failed: nothing is handed back, so nothing may stay open
+        if chosen:
+            chosen.close()
+            chosen = None
+        raise
+    finally:
+        if dialer:
+            dialer.cancel()
+        if server:
+            server.close()
+        while not candidates.empty():
+            connection, _ = candidates.get_nowait()
+            if connection is not chosen:
+                connection.close()
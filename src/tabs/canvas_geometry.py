@@ -0,0 +1,28 @@
+"""
+Canvas geometry for the collaborative canvas.
+Works out which pixels a stroke can touch, so only those are repainted.
+"""
+
+import math
+
+
+# Antialiased edges reach a little past the pen's outline
+ANTIALIAS_MARGIN = 2
+
+
+def stroke_bounds(points, width):
+    """Return (x, y, width, height) covering a polyline drawn with the given pen width.
+    
+    points is a flat sequence of x, y pairs. Returns None when there are no
+    points, so nothing needs repainting.
+    """
+    if len(points) < 2:
+        return None
+    xs = points[0::2]
+    ys = points[1::2]
+    # Pens use Qt's default square cap, whose corner reaches half the width times
+    # sqrt(2) past an endpoint when the stroke ends on a diagonal
+    pad = math.ceil(width * math.sqrt(2) / 2) + ANTIALIAS_MARGIN
+    left = min(xs) - pad
+    top = min(ys) - pad
+    return left, top, max(xs) + pad - left + 1, max(ys) + pad - top + 1
@@ -5,74 +5,198 @@ Handles mouse events and drawing operations.
 
 import json
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtCore import Qt, pyqtSignal, QPoint
-from PyQt6.QtGui import QPainter, QPen, QColor, QPixmap, QMouseEvent
+from PyQt6.QtCore import Qt, pyqtSignal, QPoint, QRect, QTimer
+from PyQt6.QtGui import QPainter, QPen, QColor, QPixmap, QMouseEvent, QPolygon
+
+from tabs.canvas_geometry import stroke_bounds
+from tabs.op_log import OpLog
+from tabs.paint_batch import PenCache, ops_to_paint
+from tabs.stroke_batcher import StrokeBatcher, STROKE_BATCH_INTERVAL_MS
+from tabs.tile_cache import TILE_MEMORY_BUDGET
+from tabs.tiled_canvas import TiledCanvas
+
+
+# A peer's stroke preview is dropped if no update arrives for this long
+PREVIEW_TIMEOUT_MS = 1000
+CURSOR_RADIUS = 4
+CURSOR_PEN_WIDTH = 2
+
+# Sender of drawing operations from the one peer of a point-to-point session
+PEER = 'peer'
+
+
+def make_pen(color, width):
+    """Return a solid pen for a color name and width."""
+    return QPen(QColor(color), width, Qt.PenStyle.SolidLine)
+
+
+def dirty_rect(points, width):
+    """Return the canvas area a polyline touches, or an empty QRect."""
+    bounds = stroke_bounds(points, width)
+    return QRect(*bounds) if bounds else QRect()
 
 
 class CanvasWidget(QWidget):
-    """Interactive canvas for collaborative drawing."""
+    """Interactive canvas for collaborative drawing.
+    
+    Every change repaints only the area it touched, padded for the pen
+    width, so the cost of a stroke scales with its size rather than with
+    the size of the canvas.
+    
+    The canvas has no edges: it is stored as tiles allocated where something
+    is drawn, and dragging with the middle button pans the view. Operations
+    and overlays use canvas coordinates; origin is the canvas point shown at
+    the widget's top-left corner.
+    
+    Every operation drawn, local or remote, is kept in op_log, so tiles the
+    canvas drops to stay within its memory budget are drawn again from the
+    operations rather than kept as pixels. Remote strokes are logged under
+    their sender, since stroke ids are only unique per node.
+    """
     
     # Signals
     drawing_data_sent = pyqtSignal(dict)
+    ephemeral_data_sent = pyqtSignal(dict)  # cursor positions and stroke previews
     
-    def __init__(self):
+    def __init__(self, batch_interval_ms=STROKE_BATCH_INTERVAL_MS, memory_budget=TILE_MEMORY_BUDGET):
         super().__init__()
         self.drawing = False
         self.last_point = QPoint()
+        self.origin = QPoint(0, 0)
+        self.pan_start = None
         self.pen_color = QColor(0, 0, 0)
         self.pen_width = 3
+        self.pens = PenCache(make_pen)
+        
+        # Batch outgoing stroke points into one message per interval
+        self.stroke_batcher = StrokeBatcher()
+        self.batch_timer = QTimer(self)
+        self.batch_timer.setSingleShot(True)
+        self.batch_timer.setInterval(batch_interval_ms)
+        self.batch_timer.timeout.connect(self.flush_stroke_batch)
         
-        # Create canvas pixmap
-        self.canvas = QPixmap(800, 600)
-        self.canvas.fill(Qt.GlobalColor.white)
+        # Peers' cursors and strokes in progress, drawn over the canvas
+        self.remote_cursors = {}
+        self.remote_previews = {}
+        self.overlay_rects = {}  # (sender, update type) -> canvas area last painted for it
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_TIMEOUT_MS)
+        self.preview_timer.timeout.connect(self.clear_previews)
+        
+        # Tiles are only allocated where something is drawn, and tiles dropped
+        # to stay within memory are drawn again from the operation log
+        self.op_log = OpLog()
+        self.canvas = TiledCanvas(memory_budget=memory_budget, source=self.strokes_in)
         
         # Set widget properties
         self.setMinimumSize(800, 600)
         self.setMouseTracking(True)
         
     def paintEvent(self, event):
-        """Paint the canvas."""
+        """Paint the part of the canvas that needs it."""
         painter = QPainter(self)
-        painter.drawPixmap(0, 0, self.canvas)
+        self.canvas.render(painter, event.rect(), self.origin)
+        painter.translate(-self.origin)
+        self.paint_remote(painter)
         
+    def paint_remote(self, painter):
+        """Draw peers' stroke previews and cursors over the canvas; the painter clips to the update."""
+        for data in self.remote_previews.values():
+            painter.setPen(QPen(QColor(data['color']), data['width'], Qt.PenStyle.SolidLine))
+            points = data['points']
+            painter.drawPolyline(QPolygon([
+                QPoint(points[i], points[i + 1]) for i in range(0, len(points), 2)
+            ]))
+        painter.setPen(QPen(QColor(0, 120, 215), CURSOR_PEN_WIDTH))
+        for x, y in self.remote_cursors.values():
+            painter.drawEllipse(QPoint(x, y), CURSOR_RADIUS, CURSOR_RADIUS)
+            
+    def to_canvas(self, pos):
+        """Convert a widget position to canvas coordinates."""
+        return pos + self.origin
+        
+    def update_area(self, rect):
+        """Schedule a repaint of a canvas area."""
+        if not rect.isNull():
+            self.update(rect.translated(-self.origin))
+            
     def mousePressEvent(self, event):
         """Handle mouse press events."""
-        if event.button() == Qt.MouseButton.LeftButton:
+        if event.button() == Qt.MouseButton.MiddleButton:
+            self.pan_start = event.pos()
+        elif event.button() == Qt.MouseButton.LeftButton:
             self.drawing = True
-            self.last_point = event.pos()
+            self.last_point = self.to_canvas(event.pos())
+            self.stroke_batcher.begin(
+                self.last_point.x(), self.last_point.y(),
+                self.pen_color.name(), self.pen_width
+            )
             
     def mouseMoveEvent(self, event):
         """Handle mouse move events."""
+        if self.pan_start is not None:
+            self.origin -= event.pos() - self.pan_start
+            self.pan_start = event.pos()
+            self.update()
+            return
+        pos = self.to_canvas(event.pos())
+        self.ephemeral_data_sent.emit({'type': 'cursor', 'x': pos.x(), 'y': pos.y()})
         if self.drawing and event.buttons() & Qt.MouseButton.LeftButton:
-            self.draw_line(self.last_point, event.pos())
-            self.last_point = event.pos()
+            self.draw_line(self.last_point, pos)
+            self.last_point = pos
+            self.stroke_batcher.add_point(pos.x(), pos.y())
+            if not self.batch_timer.isActive():
+                self.batch_timer.start()
+            self.send_preview()
             
+    def send_preview(self):
+        """Send the points not yet sent as a segment, so peers see the stroke straight away."""
+        batcher = self.stroke_batcher
+        self.ephemeral_data_sent.emit({
+            'type': 'stroke_preview',
+            'stroke_id': batcher.stroke_id,
+            'color': batcher.color or self.pen_color.name(),
+            'width': batcher.width or self.pen_width,
+            'points': batcher.points
+        })
+        
     def mouseReleaseEvent(self, event):
         """Handle mouse release events."""
-        if event.button() == Qt.MouseButton.LeftButton:
+        if event.button() == Qt.MouseButton.MiddleButton:
+            self.pan_start = None
+        elif event.button() == Qt.MouseButton.LeftButton:
             self.drawing = False
-            
+            self.batch_timer.stop()
+            for message in self.stroke_batcher.end():
+                self.send_op(message)
+            # An empty preview takes the stroke in progress off peers' screens
+            self.send_preview()
+                
     def draw_line(self, start_point, end_point):
-        """Draw a line on the canvas."""
-        painter = QPainter(self.canvas)
-        pen = QPen(self.pen_color, self.pen_width, Qt.PenStyle.SolidLine)
-        painter.setPen(pen)
-        painter.drawLine(start_point, end_point)
-        
-        # Send drawing data to peer
-        drawing_data = {
-            'type': 'draw_line',
-            'start_x': start_point.x(),
-            'start_y': start_point.y(),
-            'end_x': end_point.x(),
-            'end_y': end_point.y(),
-            'color': self.pen_color.name(),
-            'width': self.pen_width
-        }
-        self.drawing_data_sent.emit(drawing_data)
+        """Draw a line on the canvas, between two points in canvas coordinates."""
+        with self.canvas.begin() as batch:
+            rect = batch.draw_polyline(
+                (start_point.x(), start_point.y(), end_point.x(), end_point.y()),
+                self.pens.get(self.pen_color.name(), self.pen_width)
+            )
+        # Repaint only the segment just drawn
+        self.update_area(rect)
         
-        # Update the widget
-        self.update()
+    def flush_stroke_batch(self):
+        """Send the stroke points gathered during the current batch window."""
+        segment = self.stroke_batcher.flush()
+        if segment:
+            self.send_op(segment)
+            
+    def send_op(self, data):
+        """Log a local drawing operation and send it to the peer."""
+        self.op_log.append(data)
+        self.drawing_data_sent.emit(data)
+            
+    def set_batch_interval(self, interval_ms):
+        """Set how long stroke points are gathered before being sent."""
+        self.batch_timer.setInterval(interval_ms)
         
     def set_pen_color(self, color):
         """Set the pen color."""
@@ -82,28 +206,96 @@ class CanvasWidget(QWidget):
         """Set the pen width."""
         self.pen_width = width
         
+    def set_memory_budget(self, budget):
+        """Set how many bytes of uncompressed canvas tiles are kept in memory."""
+        self.canvas.set_memory_budget(budget)
+        
+    def shutdown(self):
+        """Release the canvas tiles, removing any spilled to disk."""
+        self.canvas.close()
+        
     def clear(self):
         """Clear the canvas."""
-        self.canvas.fill(Qt.GlobalColor.white)
+        self.canvas.clear()
         self.update()
         
         # Send clear command to peer
         clear_data = {
             'type': 'clear_canvas'
         }
-        self.drawing_data_sent.emit(clear_data)
+        self.send_op(clear_data)
+        
+    def receive_ephemeral_batch(self, batch):
+        """Show the latest cursor positions and stroke previews from peers."""
+        for data in batch:
+            sender = data['sender']
+            if data['type'] == 'cursor':
+                x, y = data['x'], data['y']
+                self.remote_cursors[sender] = (x, y)
+                rect = dirty_rect((x, y), 2 * CURSOR_RADIUS + CURSOR_PEN_WIDTH)
+            elif data['points']:
+                self.remote_previews[sender] = data
+                rect = dirty_rect(data['points'], data['width'])
+            else:
+                self.remote_previews.pop(sender, None)
+                rect = QRect()
+            self.move_overlay((sender, data['type']), rect)
+        if self.remote_previews:
+            self.preview_timer.start()
+            
+    def move_overlay(self, key, rect):
+        """Repaint where an overlay was and where it is now."""
+        old = self.overlay_rects.pop(key, None)
+        if old is not None:
+            self.update_area(old)
+        if not rect.isNull():
+            self.overlay_rects[key] = rect
+            self.update_area(rect)
+            
+    def clear_previews(self):
+        """Drop stroke previews whose peer has gone quiet."""
+        for sender in list(self.remote_previews):
+            self.move_overlay((sender, 'stroke_preview'), QRect())
+        self.remote_previews.clear()
         
     def receive_drawing_data(self, data):
         """Receive and apply drawing data from peer."""
-        if data['type'] == 'draw_line':
-            painter = QPainter(self.canvas)
-            pen = QPen(QColor(data['color']), data['width'], Qt.PenStyle.SolidLine)
-            painter.setPen(pen)
-            painter.drawLine(
-                data['start_x'], data['start_y'],
-                data['end_x'], data['end_y']
-            )
+        self.receive_drawing_batch([data])
+        
+    def receive_drawing_batch(self, batch):
+        """Apply a batch of drawing messages from peer in one paint pass."""
+        dirty = self.apply_ops(batch)
+        if dirty is None:
             self.update()
-        elif data['type'] == 'clear_canvas':
-            self.canvas.fill(Qt.GlobalColor.white)
-            self.update() 
\ No newline at end of file
+        else:
+            self.update_area(dirty)
+            
+    def apply_ops(self, ops):
+        """Paint drawing operations onto the canvas in one painting pass.
+        
+        Each tile touched gets one painter for the whole pass. Returns the
+        union of the canvas areas changed, for a single repaint, or None if
+        the whole canvas changed. ops_to_paint leaves out what the last clear
+        in the list would wipe straight away.
+        """
+        cleared, segments = ops_to_paint(ops)
+        if cleared:
+            self.canvas.clear()
+        dirty = QRect()
+        with self.canvas.begin() as batch:
+            for data in segments:
+                pen = self.pens.get(data['color'], data['width'])
+                dirty = dirty.united(batch.draw_polyline(data['points'], pen))
+        # Logged after painting, so a tile rebuilt during the pass is not drawn twice
+        for data in ops:
+            self.op_log.append(data, data.get('sender', PEER))
+        return None if cleared else dirty
+        
+    def strokes_in(self, bounds):
+        """Return the (points, pen) of every visible stroke segment touching an area, oldest first."""
+        store = self.op_log.strokes
+        strokes = []
+        for position in self.op_log.query(bounds):
+            stroke = self.op_log.ops[position]
+            strokes.append((store.points(stroke), self.pens.get(*store.style(stroke))))
+        return strokes
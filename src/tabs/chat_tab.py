@@ -78,7 +78,6 @@ class ChatTab(QWidget):
         """Send a message to the peer."""
         message = self.message_input.text().strip()
         if message:
-            print(f"💬 Chat tab sending message: {message}")
             # Add message to local display
             self.add_message("You", message, is_local=True)
             
@@ -108,10 +107,7 @@ class ChatTab(QWidget):
         
     def receive_message(self, message):
         """Receive a message from the peer."""
-        print(f"💬 Chat tab received message: {message}")
-        print(f"💬 Adding message to chat display: {message}")
         self.add_message("Peer", message, is_local=False)
-        print(f"💬 Message added to chat display")
         
     def clear_chat(self):
         """Clear the chat display."""
@@ -20,6 +20,7 @@ class DrawingTab(QWidget):
     # Signals
     drawing_data_received = pyqtSignal(dict)
     drawing_data_sent = pyqtSignal(dict)
+    ephemeral_data_sent = pyqtSignal(dict)
     
     def __init__(self):
         super().__init__()
@@ -32,6 +33,7 @@ class DrawingTab(QWidget):
         # Canvas (create first)
         self.canvas = CanvasWidget()
         self.canvas.drawing_data_sent.connect(self.on_drawing_data_sent)
+        self.canvas.ephemeral_data_sent.connect(self.ephemeral_data_sent.emit)
         
         # Toolbar (create after canvas)
         self.create_toolbar(layout)
@@ -99,4 +101,12 @@ class DrawingTab(QWidget):
         
     def receive_drawing_data(self, data):
         """Receive drawing data from peer."""
-        self.canvas.receive_drawing_data(data) 
\ No newline at end of file
+        self.canvas.receive_drawing_data(data)
+        
+    def receive_drawing_batch(self, batch):
+        """Receive several drawing messages from peer and apply them together."""
+        self.canvas.receive_drawing_batch(batch)
+        
+    def receive_ephemeral_batch(self, batch):
+        """Receive peers' latest cursor positions and stroke previews."""
+        self.canvas.receive_ephemeral_batch(batch)
@@ -14,6 +14,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSignal, QThread, pyqtSlot
 from PyQt6.QtGui import QFont, QDragEnterEvent, QDropEvent
 
+from network.file_transfer import ReceivedFiles
+
 
 class FileTab(QWidget):
     """File sharing tab with drag-and-drop and transfer capabilities."""
@@ -23,6 +25,8 @@ class FileTab(QWidget):
     
     def __init__(self):
         super().__init__()
+        # Received files wait in the download area until saved or cleared
+        self.received_files = ReceivedFiles()
         self.init_ui()
         self.setup_drag_drop()
         
@@ -167,15 +171,12 @@ class FileTab(QWidget):
             file_path = current_item.data(Qt.ItemDataRole.UserRole)
             file_name = os.path.basename(file_path)
             
-            # Send file to peer
-            self.file_sent.emit(file_path, file_name)
-            
             # Show progress
             self.progress_bar.setVisible(True)
             self.progress_bar.setValue(0)
             
-            # Simulate progress (in real implementation, this would track actual transfer)
-            self.simulate_transfer_progress()
+            # Send file to peer
+            self.file_sent.emit(file_path, file_name)
             
     def save_selected_file(self):
         """Save the selected received file."""
@@ -192,26 +193,34 @@ class FileTab(QWidget):
                 
                 if save_path:
                     try:
-                        # In real implementation, this would save the actual file data
-                        with open(save_path, 'wb') as f:
-                            f.write(file_data.get('data', b''))
+                        # Move the received file out of the download area
+                        file_data['path'] = self.received_files.save(file_data['path'], save_path)
+                        current_item.setData(Qt.ItemDataRole.UserRole, file_data)
                         QMessageBox.information(self, "Success", f"File saved as {save_path}")
                     except Exception as e:
                         QMessageBox.critical(self, "Error", f"Failed to save file: {str(e)}")
                         
     def clear_lists(self):
-        """Clear both file lists."""
+        """Clear both file lists, deleting received files that were not saved."""
         self.local_files_list.clear()
         self.remote_files_list.clear()
+        self.received_files.discard_all()
+        
+    def shutdown(self):
+        """Delete received files that were not saved."""
+        self.received_files.discard_all()
         
-    def receive_file(self, file_name, file_data):
+    def receive_file(self, file_name, file_path):
         """Receive a file from the peer."""
+        file_size = os.path.getsize(file_path)
+        self.received_files.add(file_path)
+        
         # Create list item for received file
         item = QListWidgetItem()
-        item.setText(f"📥 {file_name}")
+        item.setText(f"📥 {file_name} ({self.format_file_size(file_size)})")
         item.setData(Qt.ItemDataRole.UserRole, {
             'name': file_name,
-            'data': file_data
+            'path': file_path
         })
         
         self.remote_files_list.addItem(item)
@@ -229,13 +238,15 @@ class FileTab(QWidget):
             
         return f"{size_bytes:.1f}{size_names[i]}"
         
-    def simulate_transfer_progress(self):
-        """Simulate file transfer progress."""
-        # In real implementation, this would track actual transfer progress
-        import time
-        for i in range(101):
-            self.progress_bar.setValue(i)
-            time.sleep(0.01)  # Simulate transfer time
-            
-        self.progress_bar.setVisible(False)
-        QMessageBox.information(self, "Success", "File sent successfully!") 
\ No newline at end of file
+    def update_send_progress(self, file_name, bytes_sent, file_size):
+        """Update the progress bar for an outgoing transfer."""
+        percent = 100 if file_size == 0 else int(bytes_sent * 100 / file_size)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(percent)
+        
+        if bytes_sent >= file_size:
+            self.progress_bar.setVisible(False)
+            QMessageBox.information(
+                self, "File Sent",
+                f"Finished sending {file_name}. It may still be on its way to the peer."
+            ) 
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Vector operation log for the collaborative canvas.
+Keeps every drawing operation in order, indexed by where it lies on the canvas.
+"""
+
+from collections import defaultdict
+
+from tabs.canvas_geometry import stroke_bounds
+from tabs.stroke_store import Stroke, StrokeStore
+from tabs.tile_cache import tiles_covering
+
+
+# Side of one spatial index cell, in canvas pixels
+GRID_CELL_SIZE = 256
+
+# Operations spanning more cells than this are kept in one list checked by every query
+LARGE_OP_CELLS = 64
+
+
+def intersects(a, b):
+    """Return True if two (x, y, width, height) areas overlap."""
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+class GridIndex:
+    """Uniform grid over item bounding boxes.
+    
+    Each item is listed in every cell its box touches, so a query only
+    looks at the items in the cells it covers rather than at every item.
+    Items with very large boxes would fill many cells, so they go in a
+    short list that every query checks instead.
+    """
+    
+    def __init__(self, cell_size=GRID_CELL_SIZE, large_cells=LARGE_OP_CELLS):
+        self.cell_size = cell_size
+        self.large_cells = large_cells
+        self.cells = defaultdict(list)
+        self.large = []
+        self.bounds = {}
+        
+    def __len__(self):
+        return len(self.bounds)
+        
+    def insert(self, item, bounds):
+        """Index an item by its (x, y, width, height) box."""
+        self.bounds[item] = bounds
+        cells = list(tiles_covering(bounds, self.cell_size))
+        if len(cells) > self.large_cells:
+            self.large.append(item)
+            return
+        for cell in cells:
+            self.cells[cell].append(item)
+            
+    def query(self, bounds):
+        """Return the items whose boxes overlap an area, in insertion order."""
+        cells = self.cells
+        found = set(item for item in self.large if intersects(self.bounds[item], bounds))
+        for cell in tiles_covering(bounds, self.cell_size):
+            for item in cells.get(cell, ()):
+                if item not in found and intersects(self.bounds[item], bounds):
+                    found.add(item)
+        return sorted(found)
+        
+    def clear(self):
+        """Forget every item."""
+        self.cells.clear()
+        self.large.clear()
+        self.bounds.clear()
+
+
+def distance_to_polyline(x, y, points):
+    """Return the distance from a point to a polyline given as flat x, y pairs."""
+    best = None
+    last_x, last_y = points[0], points[1]
+    if len(points) == 2:
+        return ((x - last_x) ** 2 + (y - last_y) ** 2) ** 0.5
+    for i in range(2, len(points), 2):
+        next_x, next_y = points[i], points[i + 1]
+        dx, dy = next_x - last_x, next_y - last_y
+        length = dx * dx + dy * dy
+        t = 0.0 if length == 0 else max(0.0, min(1.0, ((x - last_x) * dx + (y - last_y) * dy) / length))
+        distance = ((x - last_x - t * dx) ** 2 + (y - last_y - t * dy) ** 2) ** 0.5
+        if best is None or distance < best:
+            best = distance
+        last_x, last_y = next_x, next_y
+    return best
+
+
+class OpLog:
+    """Append-only log of drawing operations, the canvas's source of truth.
+    
+    Operations are the drawing message dicts the canvas sends and receives,
+    kept in the order they were applied and addressed by their position in
+    the log. Stroke segments are indexed by bounding box, so finding the
+    operations that touch an area, for re-rendering or hit-testing, does
+    not scan the whole log. A clear stays in the log but empties the index,
+    since nothing before it is visible any more.
+    
+    Segments are kept in a StrokeStore rather than as dicts, and the log
+    holds their headers; indexing the log gives back the dict. Stroke ids
+    are only unique per sender, so strokes are keyed by (sender, stroke id),
+    with None as the sender for this node.
+    """
+    
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        self.ops = []
+        self.strokes = StrokeStore()
+        self.index = GridIndex(cell_size)
+        self.segments = defaultdict(list)  # (sender, stroke id) -> positions of visible segments
+        self.visible_from = 0
+        
+    def __len__(self):
+        return len(self.ops)
+        
+    def __getitem__(self, position):
+        return self.op_at(self.ops[position])
+        
+    def op_at(self, entry):
+        """Return the operation dict for an entry of the log."""
+        return self.strokes.segment(entry) if isinstance(entry, Stroke) else entry
+        
+    def append(self, op, sender=None):
+        """Add an operation drawn by sender to the log; returns its position."""
+        position = len(self.ops)
+        if op['type'] == 'stroke_segment':
+            self.ops.append(self.strokes.add(op, sender))
+            self.segments[sender, op['stroke_id']].append(position)
+            bounds = stroke_bounds(op['points'], op['width'])
+            if bounds:
+                self.index.insert(position, bounds)
+            return position
+        self.ops.append(op)
+        if op['type'] == 'clear_canvas':
+            self.index.clear()
+            self.segments.clear()
+            self.visible_from = position + 1
+        return position
+        
+    def since(self, position):
+        """Return the operations from a position on, for catching up a peer or a file."""
+        return [self.op_at(entry) for entry in self.ops[position:]]
+        
+    def visible(self):
+        """Return the operations that make up the canvas as it is now."""
+        return [self.op_at(entry) for entry in self.ops[self.visible_from:]]
+        
+    def stroke(self, sender, stroke_id):
+        """Return the positions of the visible segments of one stroke, oldest first."""
+        return self.segments.get((sender, stroke_id), [])
+        
+    def query(self, bounds):
+        """Return the positions of visible strokes touching an area, oldest first."""
+        return self.index.query(bounds)
+        
+    def hit_test(self, x, y, tolerance=0):
+        """Return the positions of visible strokes drawn over a point, topmost first."""
+        hits = []
+        strokes = self.strokes
+        for position in self.query((x - tolerance, y - tolerance, 2 * tolerance + 1, 2 * tolerance + 1)):
+            stroke = self.ops[position]
+            _, width = strokes.style(stroke)
+            if distance_to_polyline(x, y, strokes.points(stroke)) <= width / 2 + tolerance:
+                hits.append(position)
+        hits.reverse()
+        return hits
@@ -0,0 +1,50 @@
+"""
+Paint batching for the collaborative canvas.
+Decides which received operations a painting pass draws, and reuses the pens it draws them with.
+"""
+
+
+# Distinct pen styles kept before the cache is emptied
+PEN_CACHE_SIZE = 64
+
+
+def ops_to_paint(ops):
+    """Return (cleared, segments) for a batch of drawing operations.
+    
+    cleared is True when the batch clears the canvas. segments are the
+    stroke segments after the last clear, in order; those before it are
+    left out, since the clear would wipe them straight away.
+    """
+    start = None
+    for i, data in enumerate(ops):
+        if data['type'] == 'clear_canvas':
+            start = i
+    segments = [data for data in ops[start or 0:] if data['type'] == 'stroke_segment']
+    return start is not None, segments
+
+
+class PenCache:
+    """Pens made by make_pen(color, width), kept by style so each is made once.
+    
+    Holds at most size styles; when full it is emptied rather than tracking
+    use, as a canvas rarely sees more than a handful of styles at a time.
+    """
+    
+    def __init__(self, make_pen, size=PEN_CACHE_SIZE):
+        self.make_pen = make_pen
+        self.size = size
+        self.pens = {}  # (color name, width) -> pen
+        
+    def __len__(self):
+        return len(self.pens)
+        
+    def get(self, color, width):
+        """Return the pen for a style, reusing the one made last time."""
+        key = (color, width)
+        pen = self.pens.get(key)
+        if pen is None:
+            if len(self.pens) >= self.size:
+                self.pens.clear()
+            pen = self.make_pen(color, width)
+            self.pens[key] = pen
+        return pen
@@ -0,0 +1,76 @@
+"""
+Stroke batching for the collaborative canvas.
+Gathers the points of the stroke being drawn into batched polyline segments.
+"""
+
+from array import array
+
+
+# Default batching window: one frame at 60 Hz
+STROKE_BATCH_INTERVAL_MS = 16
+
+
+class StrokeBatcher:
+    """Collects stroke points and hands them out as batched segments.
+    
+    Each segment repeats the last point of the previous one so the receiver
+    can draw every segment as a connected polyline.
+    """
+    
+    def __init__(self):
+        self.stroke_id = 0
+        self.color = None
+        self.width = None
+        self.points = array('i')
+        self.active = False
+        self.flushed = False
+        
+    def begin(self, x, y, color, width):
+        """Start a new stroke at the given point."""
+        self.stroke_id += 1
+        self.color = color
+        self.width = width
+        self.points = array('i', (x, y))
+        self.active = True
+        self.flushed = False
+        
+    def add_point(self, x, y):
+        """Add a point to the current stroke."""
+        if self.active:
+            self.points.append(x)
+            self.points.append(y)
+            
+    def has_pending(self):
+        """Return True if there are points that have not been flushed yet."""
+        return self.active and len(self.points) > 2
+        
+    def flush(self):
+        """Return the pending points as a stroke segment, or None if there are none."""
+        if not self.has_pending():
+            return None
+        segment = {
+            'type': 'stroke_segment',
+            'stroke_id': self.stroke_id,
+            'color': self.color,
+            'width': self.width,
+            'points': self.points
+        }
+        # Carry the last point over so the next segment joins up with this one
+        self.points = self.points[-2:]
+        self.flushed = True
+        return segment
+        
+    def end(self):
+        """Finish the current stroke and return the messages still to be sent."""
+        if not self.active:
+            return []
+        messages = []
+        segment = self.flush()
+        if segment:
+            messages.append(segment)
+        # A click without movement drew nothing, so there is nothing to end
+        if self.flushed:
+            messages.append({'type': 'stroke_end', 'stroke_id': self.stroke_id})
+        self.active = False
+        self.points = array('i')
+        return messages
@@ -0,0 +1,126 @@
+"""
+Compact stroke storage for the collaborative canvas.
+Keeps retained stroke points in one flat integer array, with small headers pointing into it.
+"""
+
+import struct
+import sys
+from array import array
+
+from network.stroke_codec import StrokePalette
+
+
+# Coordinates start as 16-bit and widen to 32-bit once a stroke goes past this range
+SHORT_MIN = -0x8000
+SHORT_MAX = 0x7FFF
+
+PACKED = struct.Struct('<IIHcI')  # stroke id, color as 0xRRGGBB, width, array typecode, coordinate count
+
+
+class Stroke:
+    """Header of one stored stroke segment.
+    
+    start and length locate its flat x, y coordinates in the store's array,
+    and style is its index in the store's palette. sender is who drew it,
+    None for this node.
+    """
+    
+    __slots__ = ('sender', 'stroke_id', 'style', 'start', 'length')
+    
+    def __init__(self, sender, stroke_id, style, start, length):
+        self.sender = sender
+        self.stroke_id = stroke_id
+        self.style = style
+        self.start = start
+        self.length = length
+
+
+class StrokeStore:
+    """Append-only arena of stroke segment points.
+    
+    Every segment's coordinates are appended to one array, 2 bytes each while
+    they fit a short and 4 bytes after, instead of a list of Python ints
+    costing over 30 bytes each. Colors and widths are interned in a palette,
+    so a segment's header holds only its style index and where its points
+    are. Reading or packing a segment copies a slice of the array.
+    """
+    
+    def __init__(self):
+        self.palette = StrokePalette()
+        self.coords = array('h')
+        self.count = 0
+        
+    def __len__(self):
+        """Return the number of stored points."""
+        return len(self.coords) // 2
+        
+    def add(self, segment, sender=None):
+        """Store a stroke segment dict drawn by sender; returns its header."""
+        points = segment['points']
+        if self.coords.typecode == 'h' and points and (min(points) < SHORT_MIN or max(points) > SHORT_MAX):
+            self.coords = array('i', self.coords)
+        start = len(self.coords)
+        if isinstance(points, array) and points.typecode == self.coords.typecode:
+            self.coords.extend(points)
+        else:
+            self.coords.extend(array(self.coords.typecode, points))
+        style, _ = self.palette.intern(segment['color'], segment['width'])
+        self.count += 1
+        return Stroke(sender, segment['stroke_id'], style, start, len(points))
+        
+    def points(self, stroke):
+        """Return a copy of a segment's flat x, y coordinates."""
+        return self.coords[stroke.start:stroke.start + stroke.length]
+        
+    def style(self, stroke):
+        """Return a segment's (color, width)."""
+        return self.palette.lookup(stroke.style)
+        
+    def segment(self, stroke):
+        """Return a segment as the stroke segment dict it was stored from, with its sender if remote."""
+        color, width = self.style(stroke)
+        segment = {
+            'type': 'stroke_segment',
+            'stroke_id': stroke.stroke_id,
+            'color': color,
+            'width': width,
+            'points': self.points(stroke)
+        }
+        if stroke.sender is not None:
+            segment['sender'] = stroke.sender
+        return segment
+        
+    def pack(self, stroke):
+        """Serialize a segment as a fixed header followed by its raw little-endian coordinates."""
+        color, width = self.style(stroke)
+        points = self.points(stroke)
+        if sys.byteorder == 'big':
+            points.byteswap()
+        header = PACKED.pack(
+            stroke.stroke_id, int(color.lstrip('#'), 16), width,
+            points.typecode.encode(), stroke.length
+        )
+        return header + points.tobytes()
+        
+    def memory_used(self):
+        """Return roughly how many bytes the store holds."""
+        return len(self.coords) * self.coords.itemsize + self.count * sys.getsizeof(Stroke(None, 0, 0, 0, 0))
+
+
+def unpack_segment(data):
+    """Read a segment written by StrokeStore.pack back into a stroke segment dict."""
+    stroke_id, color, width, typecode, length = PACKED.unpack_from(data)
+    points = array(typecode.decode())
+    end = PACKED.size + length * points.itemsize
+    if len(data) < end:
+        raise ValueError(f"Packed stroke declares {length} coordinates but is {len(data)} bytes")
+    points.frombytes(data[PACKED.size:end])
+    if sys.byteorder == 'big':
+        points.byteswap()
+    return {
+        'type': 'stroke_segment',
+        'stroke_id': stroke_id,
+        'color': f"#{color:06x}",
+        'width': width,
+        'points': points
+    }
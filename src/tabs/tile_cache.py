@@ -0,0 +1,164 @@
+"""
+Tile cache for the collaborative canvas.
+Keeps the tiles of an unbounded canvas under a memory budget, compressing the least recently used.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Tiles are square, this many pixels a side
+TILE_SIZE = 256
+
+# Bytes of uncompressed tiles kept ready to paint; 256 tiles of 256x256 RGB32
+TILE_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Bytes of compressed tiles kept in memory before the oldest are written to disk
+COLD_MEMORY_BUDGET = 32 * 1024 * 1024
+
+
+def tiles_covering(bounds, tile_size=TILE_SIZE):
+    """Yield the (column, row) of every tile an (x, y, width, height) area touches."""
+    x, y, width, height = bounds
+    if width <= 0 or height <= 0:
+        return
+    for row in range(y // tile_size, (y + height - 1) // tile_size + 1):
+        for column in range(x // tile_size, (x + width - 1) // tile_size + 1):
+            yield column, row
+
+
+class TileCache:
+    """Tiles allocated on first touch and evicted least recently used first.
+    
+    Live tiles are ready to paint and count tile_bytes each against the
+    budget. Evicted tiles are packed, normally compressed, and kept in
+    memory; once those exceed cold_budget the oldest are written to a
+    temporary directory. A tile comes back to life the next time it is
+    touched, so memory is only spent on the regions actually drawn on.
+    
+    new_tile, pack and unpack make, serialize and restore the tile objects,
+    which keeps the cache independent of how tiles are drawn. Eviction only
+    happens in trim(), so tiles handed out stay valid until then. The
+    spill directory is removed by clear(), which also runs at interpreter
+    exit while the directory exists.
+    
+    When the tiles can be drawn again from elsewhere, rebuild(key, tile)
+    is given: compressed tiles beyond cold_budget are then dropped instead
+    of written to disk, and rebuild paints a blank tile back when one is
+    touched again.
+    """
+    
+    def __init__(self, new_tile, pack, unpack, tile_bytes, budget=TILE_MEMORY_BUDGET,
+                 cold_budget=COLD_MEMORY_BUDGET, spill=True, rebuild=None):
+        self.new_tile = new_tile
+        self.pack = pack
+        self.unpack = unpack
+        self.tile_bytes = tile_bytes
+        self.budget = budget
+        self.cold_budget = cold_budget
+        self.spill = spill
+        self.rebuild = rebuild
+        self.live = OrderedDict()
+        self.cold = OrderedDict()  # key -> packed bytes, oldest eviction first
+        self.cold_bytes = 0
+        self.spilled = set()
+        self.dropped = set()
+        self.spill_dir = None
+        
+    def __contains__(self, key):
+        return key in self.live or key in self.cold or key in self.spilled or key in self.dropped
+        
+    def __len__(self):
+        return len(self.live) + len(self.cold) + len(self.spilled) + len(self.dropped)
+        
+    def get(self, key, create=False):
+        """Return the tile at key, restoring it if evicted.
+        
+        A tile never touched is created when create is set, otherwise None
+        is returned and nothing is allocated.
+        """
+        tile = self.live.get(key)
+        if tile is not None:
+            self.live.move_to_end(key)
+            return tile
+        data = self.take_cold(key)
+        if data is not None:
+            tile = self.unpack(data)
+        elif key in self.dropped:
+            self.dropped.discard(key)
+            tile = self.new_tile()
+            self.rebuild(key, tile)
+        elif create:
+            tile = self.new_tile()
+        else:
+            return None
+        self.live[key] = tile
+        return tile
+        
+    def take_cold(self, key):
+        """Remove and return an evicted tile's packed bytes, or None."""
+        data = self.cold.pop(key, None)
+        if data is not None:
+            self.cold_bytes -= len(data)
+            return data
+        if key in self.spilled:
+            self.spilled.discard(key)
+            path = self.spill_path(key)
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.remove(path)
+            return data
+        return None
+        
+    def trim(self):
+        """Evict tiles until the live ones fit the budget."""
+        while self.live and len(self.live) * self.tile_bytes > self.budget:
+            key, tile = self.live.popitem(last=False)
+            data = self.pack(tile)
+            self.cold[key] = data
+            self.cold_bytes += len(data)
+        if self.spill or self.rebuild:
+            while self.cold and self.cold_bytes > self.cold_budget:
+                key, data = self.cold.popitem(last=False)
+                self.cold_bytes -= len(data)
+                if self.rebuild:
+                    self.dropped.add(key)
+                else:
+                    self.write_spilled(key, data)
+                
+    def write_spilled(self, key, data):
+        """Move a packed tile to disk."""
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='vortex-tiles-')
+            atexit.register(self.clear)
+            logger.debug("💾 Spilling canvas tiles to %s", self.spill_dir)
+        with open(self.spill_path(key), 'wb') as f:
+            f.write(data)
+        self.spilled.add(key)
+        
+    def spill_path(self, key):
+        """Return the file a spilled tile is kept in."""
+        return os.path.join(self.spill_dir, '%d_%d.tile' % key)
+        
+    def memory_used(self):
+        """Return the bytes held in memory by live and compressed tiles."""
+        return len(self.live) * self.tile_bytes + self.cold_bytes
+        
+    def clear(self):
+        """Forget every tile."""
+        self.live.clear()
+        self.cold.clear()
+        self.cold_bytes = 0
+        self.spilled.clear()
+        self.dropped.clear()
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            atexit.unregister(self.clear)
@@ -0,0 +1,150 @@
+"""
+Tiled raster store for the collaborative canvas.
+Paints and renders an unbounded canvas held in a TileCache of QImage tiles.
+"""
+
+import zlib
+from PyQt6.QtCore import Qt, QPoint, QRect
+from PyQt6.QtGui import QColor, QImage, QPainter, QPolygon
+
+from tabs.canvas_geometry import stroke_bounds
+from tabs.tile_cache import TILE_MEMORY_BUDGET, TILE_SIZE, TileCache, tiles_covering
+
+
+TILE_FORMAT = QImage.Format.Format_RGB32
+
+
+class TiledCanvas:
+    """An unbounded canvas split into fixed-size tiles.
+    
+    Tiles are allocated the first time something is drawn on them; regions
+    never drawn on cost nothing and render as the background. Cold tiles
+    are zlib-compressed by the cache, which mostly-blank tiles shrink well
+    under, and are restored when painted or shown again.
+    
+    Given a source, a function returning the (points, pen) strokes that
+    touch an (x, y, width, height) area, tiles that no longer fit even
+    compressed are dropped and drawn again from it when needed, instead of
+    being written to disk.
+    """
+    
+    def __init__(self, tile_size=TILE_SIZE, memory_budget=TILE_MEMORY_BUDGET, background=Qt.GlobalColor.white,
+                 source=None):
+        self.tile_size = tile_size
+        self.background = QColor(background)
+        self.source = source
+        self.cache = TileCache(
+            self.new_tile, self.pack_tile, self.unpack_tile,
+            tile_size * tile_size * 4, budget=memory_budget,
+            rebuild=self.rebuild_tile if source else None
+        )
+        
+    def new_tile(self):
+        """Return a blank tile."""
+        tile = QImage(self.tile_size, self.tile_size, TILE_FORMAT)
+        tile.fill(self.background)
+        return tile
+        
+    def pack_tile(self, tile):
+        """Compress a tile's pixels."""
+        bits = tile.constBits()
+        bits.setsize(tile.sizeInBytes())
+        return zlib.compress(bytes(bits), 1)
+        
+    def unpack_tile(self, data):
+        """Restore a tile from its compressed pixels."""
+        pixels = zlib.decompress(data)
+        # copy() detaches the image from the buffer it was built over
+        return QImage(pixels, self.tile_size, self.tile_size, TILE_FORMAT).copy()
+        
+    def set_memory_budget(self, budget):
+        """Change how many bytes of uncompressed tiles are kept."""
+        self.cache.budget = budget
+        self.cache.trim()
+        
+    def begin(self):
+        """Start a painting pass; use as a context manager."""
+        return TileBatch(self)
+        
+    def rebuild_tile(self, key, tile):
+        """Draw a dropped tile again from the source onto a blank tile."""
+        size = self.tile_size
+        painter = QPainter(tile)
+        painter.translate(-key[0] * size, -key[1] * size)
+        for points, pen in self.source((key[0] * size, key[1] * size, size, size)):
+            painter.setPen(pen)
+            painter.drawPolyline(QPolygon([QPoint(points[i], points[i + 1]) for i in range(0, len(points), 2)]))
+        painter.end()
+        
+    def render(self, painter, rect, origin):
+        """Draw the canvas area shown in a widget rect, given the canvas point at the widget's corner."""
+        size = self.tile_size
+        area = rect.translated(origin)
+        for column, row in tiles_covering((area.x(), area.y(), area.width(), area.height()), size):
+            target = QPoint(column * size - origin.x(), row * size - origin.y())
+            tile = self.cache.get((column, row))
+            if tile is None:
+                painter.fillRect(QRect(target.x(), target.y(), size, size), self.background)
+            else:
+                painter.drawImage(target, tile)
+        self.cache.trim()
+        
+    def clear(self):
+        """Wipe the canvas, releasing every tile."""
+        self.cache.clear()
+        
+    def close(self):
+        """Release every tile and remove any spilled to disk; call on shutdown."""
+        self.cache.clear()
+
+
+class TileBatch:
+    """One painting pass over a tiled canvas.
+    
+    Each tile touched gets one QPainter, opened on first use and kept for
+    the whole pass, so a batch of operations costs one painter per tile
+    rather than one per operation. Tiles are only evicted once the pass
+    ends.
+    """
+    
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.painters = {}
+        self.pens = {}
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc_info):
+        self.end()
+        
+    def painter(self, key, pen):
+        """Return the painter for a tile, set up to draw in canvas coordinates with pen."""
+        painter = self.painters.get(key)
+        if painter is None:
+            tile = self.canvas.cache.get(key, create=True)
+            painter = QPainter(tile)
+            painter.translate(-key[0] * self.canvas.tile_size, -key[1] * self.canvas.tile_size)
+            self.painters[key] = painter
+        if self.pens.get(key) is not pen:
+            painter.setPen(pen)
+            self.pens[key] = pen
+        return painter
+        
+    def draw_polyline(self, points, pen):
+        """Draw a polyline in canvas coordinates; returns the canvas area it touched."""
+        bounds = stroke_bounds(points, pen.width())
+        if bounds is None:
+            return QRect()
+        polygon = QPolygon([QPoint(points[i], points[i + 1]) for i in range(0, len(points), 2)])
+        for key in tiles_covering(bounds, self.canvas.tile_size):
+            self.painter(key, pen).drawPolyline(polygon)
+        return QRect(*bounds)
+        
+    def end(self):
+        """Finish painting and let the cache evict again."""
+        for painter in self.painters.values():
+            painter.end()
+        self.painters.clear()
+        self.pens.clear()
+        self.canvas.cache.trim()
@@ -3,18 +3,192 @@ Configuration manager for Vortex Tunnel application.
 Handles saving and loading application settings.
 """
 
+import atexit
+import copy
 import os
 import json
+import threading
+import time
 from pathlib import Path
 
 
+# Settings changes are written to disk once they have been quiet this long
+SAVE_DELAY = 0.5
+
+# Peer address of a profile that has none set
+DEFAULT_PEER_ADDRESS = '100.64.0.1'
+
+DEFAULT_SETTINGS = {
+    'dark_mode': False,
+    'always_on_top': False,
+    'profile': 'My Profile',
+    'connection_role': 'auto',  # 'host', 'client', 'auto', 'hub' or 'mesh'
+    'side_channel': True,  # send cursors and stroke previews over UDP next to the TCP link
+    'mesh_peers': [],  # addresses or host names of the other nodes; the profile's peer when empty
+    'max_frame_size': 1024 * 1024,  # bytes per frame; larger messages are split
+    'reassembly_budget': 16 * 1024 * 1024,  # bytes held for split messages at once
+    'canvas_memory_budget': 64 * 1024 * 1024,  # bytes of uncompressed canvas tiles kept in memory
+    'log_level': 'INFO',  # DEBUG, INFO, WARNING or ERROR
+    'log_levels': {},  # per-module overrides, e.g. {'network.transport': 'DEBUG'}
+    'log_file': '',  # written in the background when set
+    'window_geometry': {
+        'x': 100,
+        'y': 100,
+        'width': 1000,
+        'height': 700
+    },
+    'tailscale_peer_addresses': {
+        'My Profile': '100.93.161.73',
+        'Friend\'s Profile': '100.122.120.65'
+    }
+}
+
+# One store per settings file, shared by every ConfigManager in the process
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class SettingsStore:
+    """In-memory settings for one file, written back behind the callers.
+    
+    The file is read once. Reads are dict lookups, handing out copies of
+    dicts and lists so callers cannot change the store behind its back.
+    Changes mark the store dirty and push back the deadline of one writer
+    thread, so a burst of changes costs a single write. Writes go to a
+    temporary file that is then renamed over the settings file, so a crash
+    never leaves it half written.
+    """
+    
+    def __init__(self, config_file, save_delay=SAVE_DELAY):
+        self.config_file = config_file
+        self.save_delay = save_delay
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.deadline = None  # monotonic time the pending write is due
+        self.writer = None
+        self.dirty = False
+        self.settings = self.read()
+        
+    def read(self):
+        """Load the settings file merged over the defaults."""
+        settings = copy.deepcopy(DEFAULT_SETTINGS)
+        if not self.config_file.exists():
+            # Create default settings file
+            self.dirty = True
+            self.schedule_save()
+            return settings
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                settings.update(json.load(f))
+        except Exception as e:
+            print(f"Error loading settings: {e}")
+        return settings
+        
+    def get(self, key, default=None):
+        """Return one setting; dicts and lists are copies."""
+        with self.lock:
+            value = self.settings.get(key, default)
+            if isinstance(value, (dict, list)):
+                value = copy.deepcopy(value)
+            return value
+        
+    def snapshot(self):
+        """Return a copy of all settings that callers may change freely."""
+        with self.lock:
+            return copy.deepcopy(self.settings)
+            
+    def update(self, changes):
+        """Apply changed settings and schedule a write."""
+        with self.lock:
+            self.settings.update(copy.deepcopy(changes))
+            self.dirty = True
+            self.schedule_save()
+            
+    def reset(self):
+        """Return every setting to its default and schedule a write."""
+        with self.lock:
+            self.settings = copy.deepcopy(DEFAULT_SETTINGS)
+            self.dirty = True
+            self.schedule_save()
+            
+    def schedule_save(self):
+        """Push the pending write back by save_delay, starting the writer on first use."""
+        with self.lock:
+            self.deadline = time.monotonic() + self.save_delay
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.write_loop, name='settings-writer', daemon=True)
+                self.writer.start()
+            self.changed.notify()
+            
+    def write_loop(self):
+        """Write changes once they have been quiet for save_delay; runs on the writer thread."""
+        while True:
+            with self.lock:
+                if self.deadline is None:
+                    self.changed.wait()
+                    continue
+                remaining = self.deadline - time.monotonic()
+                if remaining > 0:
+                    self.changed.wait(remaining)
+                    continue
+                self.deadline = None
+            self.flush()
+            
+    def flush(self):
+        """Write pending changes now, if there are any."""
+        with self.write_lock:
+            with self.lock:
+                self.deadline = None
+                if not self.dirty:
+                    return
+                self.dirty = False
+                data = json.dumps(self.settings, indent=2, ensure_ascii=False)
+            try:
+                self.write_file(data)
+            except Exception as e:
+                print(f"Error saving settings: {e}")
+                
+    def write_file(self, data):
+        """Replace the settings file atomically with data."""
+        temp_file = self.config_file.with_name(self.config_file.name + '.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.config_file)
+
+
+def get_store(config_file):
+    """Return the shared store for a settings file, loading it on first use."""
+    with _stores_lock:
+        store = _stores.get(config_file)
+        if store is None:
+            config_file.parent.mkdir(parents=True, exist_ok=True)
+            store = _stores[config_file] = SettingsStore(config_file)
+        return store
+
+
+@atexit.register
+def flush_all():
+    """Write every store's pending changes; runs at interpreter exit."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
+
+
 class ConfigManager:
-    """Manages application configuration and settings."""
+    """Manages application configuration and settings.
     
-    def __init__(self):
-        self.config_dir = self.get_config_directory()
+    Every instance for the same directory shares one in-memory store, so
+    creating a ConfigManager and reading settings never touch the disk.
+    """
+    
+    def __init__(self, config_dir=None):
+        self.config_dir = Path(config_dir) if config_dir else self.get_config_directory()
         self.config_file = self.config_dir / "settings.json"
-        self.ensure_config_directory()
+        self.store = get_store(self.config_file)
         
     def get_config_directory(self):
         """Get the configuration directory path."""
@@ -28,64 +202,28 @@ class ConfigManager:
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
     def load_settings(self):
-        """Load application settings from file."""
-        default_settings = {
-            'dark_mode': False,
-            'always_on_top': False,
-            'profile': 'My Profile',
-            'connection_role': 'auto',  # 'host', 'client', or 'auto'
-            'window_geometry': {
-                'x': 100,
-                'y': 100,
-                'width': 1000,
-                'height': 700
-            },
-            'tailscale_peer_addresses': {
-                'My Profile': '100.93.161.73',
-                'Friend\'s Profile': '100.122.120.65'
-            }
-        }
+        """Return a copy of all application settings."""
+        return self.store.snapshot()
         
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded_settings = json.load(f)
-                    # Merge with defaults to handle missing keys
-                    for key, value in default_settings.items():
-                        if key not in loaded_settings:
-                            loaded_settings[key] = value
-                    return loaded_settings
-            except Exception as e:
-                print(f"Error loading settings: {e}")
-                return default_settings
-        else:
-            # Create default settings file
-            self.save_settings(default_settings)
-            return default_settings
-            
     def save_settings(self, settings):
-        """Save application settings to file."""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving settings: {e}")
-            
+        """Save application settings, keeping any not included."""
+        self.store.update(settings)
+        
+    def flush(self):
+        """Write pending setting changes to disk now."""
+        self.store.flush()
+        
     def get_setting(self, key, default=None):
         """Get a specific setting value."""
-        settings = self.load_settings()
-        return settings.get(key, default)
+        return self.store.get(key, default)
         
     def set_setting(self, key, value):
         """Set a specific setting value."""
-        settings = self.load_settings()
-        settings[key] = value
-        self.save_settings(settings)
+        self.store.update({key: value})
         
     def get_window_geometry(self):
         """Get saved window geometry."""
-        settings = self.load_settings()
-        return settings.get('window_geometry', {
+        return self.get_setting('window_geometry', {
             'x': 100,
             'y': 100,
             'width': 1000,
@@ -104,29 +242,59 @@ class ConfigManager:
         
     def get_peer_address(self, profile):
         """Get the Tailscale peer address for a profile."""
-        settings = self.load_settings()
-        addresses = settings.get('tailscale_peer_addresses', {})
-        return addresses.get(profile, '100.64.0.1')
+        addresses = self.get_setting('tailscale_peer_addresses', {})
+        return addresses.get(profile, DEFAULT_PEER_ADDRESS)
+        
+    def has_peer_address(self, profile):
+        """Return True if the user has set a peer address for a profile, not just left a default."""
+        address = self.get_setting('tailscale_peer_addresses', {}).get(profile)
+        defaults = DEFAULT_SETTINGS['tailscale_peer_addresses']
+        return address is not None and address not in (DEFAULT_PEER_ADDRESS, defaults.get(profile))
         
     def set_peer_address(self, profile, address):
         """Set the Tailscale peer address for a profile."""
-        settings = self.load_settings()
-        addresses = settings.get('tailscale_peer_addresses', {})
-        addresses[profile] = address
-        settings['tailscale_peer_addresses'] = addresses
-        self.save_settings(settings)
+        with self.store.lock:
+            addresses = dict(self.get_setting('tailscale_peer_addresses', {}))
+            addresses[profile] = address
+            self.set_setting('tailscale_peer_addresses', addresses)
         
     def get_connection_role(self):
         """Get the connection role setting."""
-        settings = self.load_settings()
-        return settings.get('connection_role', 'auto')
+        return self.get_setting('connection_role', 'auto')
         
     def set_connection_role(self, role):
         """Set the connection role."""
         self.set_setting('connection_role', role)
         
+    def get_mesh_peers(self):
+        """Get the other nodes of a mesh session."""
+        return list(self.get_setting('mesh_peers', []))
+        
+    def get_side_channel(self):
+        """Get whether cursors and stroke previews use the UDP side channel."""
+        return bool(self.get_setting('side_channel', True))
+        
+    def get_max_frame_size(self):
+        """Get the largest frame payload to send or accept, in bytes."""
+        return self.get_setting('max_frame_size', 1024 * 1024)
+        
+    def get_reassembly_budget(self):
+        """Get the memory budget for reassembling split messages, in bytes."""
+        return self.get_setting('reassembly_budget', 16 * 1024 * 1024)
+        
+    def get_canvas_memory_budget(self):
+        """Get the memory budget for uncompressed canvas tiles, in bytes."""
+        return self.get_setting('canvas_memory_budget', 64 * 1024 * 1024)
+        
+    def get_log_settings(self):
+        """Get the log level, per-module levels and log file path."""
+        return {
+            'level': self.get_setting('log_level', 'INFO'),
+            'levels': self.get_setting('log_levels', {}),
+            'file': self.get_setting('log_file') or None
+        }
+        
     def reset_settings(self):
         """Reset all settings to defaults."""
-        if self.config_file.exists():
-            self.config_file.unlink()
+        self.store.reset()
         return self.load_settings() 
\ No newline at end of file
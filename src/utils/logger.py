@@ -0,0 +1,102 @@
+"""
+Logging setup for Vortex Tunnel.
+Provides per-module leveled loggers and an optional background file sink.
+"""
+
+import logging
+import logging.handlers
+import queue
+from collections import deque
+
+
+ROOT_LOGGER = 'vortex'
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+# Records held for the file sink before the oldest are dropped
+LOG_RING_SIZE = 10000
+
+_listener = None
+
+
+class RingBufferQueue(queue.Queue):
+    """Unbounded-looking queue that keeps only the newest records.
+    
+    Putting never blocks; once capacity is reached the oldest record is
+    dropped, so a slow disk can cost log lines but never stall a sender.
+    """
+    
+    def __init__(self, capacity=LOG_RING_SIZE):
+        self.capacity = capacity
+        super().__init__()
+        
+    def _init(self, maxsize):
+        self.queue = deque(maxlen=self.capacity)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread."""
+    
+    def prepare(self, record):
+        return record
+
+
+def get_logger(name):
+    """Return the logger for a module, e.g. get_logger('network.transport')."""
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def setup_logging(level='INFO', levels=None, log_file=None, ring_size=LOG_RING_SIZE):
+    """Configure console output, per-module levels and the optional file sink.
+    
+    Messages below a logger's level are discarded before their arguments are
+    formatted. With a log_file, records are formatted and written on a
+    background thread through a ring buffer.
+    """
+    shutdown_logging()
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.propagate = False
+    set_level(level)
+    for module, module_level in (levels or {}).items():
+        set_level(module_level, module)
+        
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(console)
+    
+    if log_file:
+        global _listener
+        records = RingBufferQueue(ring_size)
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        _listener = logging.handlers.QueueListener(records, file_handler)
+        _listener.start()
+        root.addHandler(DeferredQueueHandler(records))
+    return root
+
+
+def set_level(level, module=None):
+    """Change the level of one module, or of everything when module is None."""
+    logger = logging.getLogger(ROOT_LOGGER) if module is None else get_logger(module)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def set_diagnostics(enabled, level='INFO'):
+    """Switch debug diagnostics on or off at runtime."""
+    set_level(logging.DEBUG if enabled else level)
+
+
+def diagnostics_enabled():
+    """Return True while debug diagnostics are on."""
+    return logging.getLogger(ROOT_LOGGER).isEnabledFor(logging.DEBUG)
+
+
+def shutdown_logging():
+    """Flush and stop the file sink, if one is running."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for the settings cache.
+Checks shared in-memory settings and debounced, atomic write-behind.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.config_manager import ConfigManager
+
+
+def read_file(config):
+    """Return the settings currently on disk."""
+    with open(config.config_file, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_shared_in_memory_settings():
+    """Test that instances share one store and reads never hit the disk."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        first = ConfigManager(temp_dir)
+        second = ConfigManager(temp_dir)
+        assert first.store is second.store
+        
+        first.set_peer_address('My Profile', '100.1.2.3')
+        assert second.get_peer_address('My Profile') == '100.1.2.3'
+        assert second.get_connection_role() == 'auto'
+        
+        # Copies handed out by load_settings do not leak back into the store
+        settings = second.load_settings()
+        settings['tailscale_peer_addresses']['My Profile'] = 'changed'
+        assert first.get_peer_address('My Profile') == '100.1.2.3'
+        
+        # So do values handed out by get_setting, and values passed in
+        geometry = first.get_window_geometry()
+        geometry['width'] = 1
+        first.get_setting('tailscale_peer_addresses')['My Profile'] = 'changed'
+        levels = {'network': 'DEBUG'}
+        first.set_setting('log_levels', levels)
+        levels['network'] = 'ERROR'
+        assert second.get_window_geometry()['width'] == 1000
+        assert second.get_peer_address('My Profile') == '100.1.2.3'
+        assert second.get_log_settings()['levels'] == {'network': 'DEBUG'}
+        
+        # Only an address the user set counts as configured
+        assert first.has_peer_address('My Profile')
+        assert not first.has_peer_address("Friend's Profile")
+        assert not first.has_peer_address('New Profile')
+        first.set_peer_address('New Profile', '100.64.0.1')
+        assert not first.has_peer_address('New Profile')
+        first.flush()
+    print("✓ Settings are shared in memory")
+
+
+def test_burst_costs_one_write():
+    """Test that a burst of changes is written once, after the debounce delay."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(temp_dir)
+        config.flush()
+        writes = []
+        write_file = config.store.write_file
+        config.store.write_file = lambda data: (writes.append(data), write_file(data))
+        config.store.save_delay = 0.05
+        
+        for i in range(100):
+            config.set_setting('counter', i)
+        config.save_settings({'profile': "Friend's Profile"})
+        assert writes == []
+        
+        deadline = time.monotonic() + 5
+        while not writes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        assert len(writes) == 1
+        writer = config.store.writer
+        assert writer.is_alive()
+        
+        # Later changes reuse the same writer thread
+        config.set_setting('counter', 100)
+        deadline = time.monotonic() + 5
+        while len(writes) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(writes) == 2 and config.store.writer is writer
+        config.flush()  # waits for the write in progress
+        saved = read_file(config)
+        assert saved['counter'] == 100
+        assert saved['profile'] == "Friend's Profile"
+        # Partial saves keep the other settings
+        assert saved['tailscale_peer_addresses']['My Profile'] == '100.93.161.73'
+        assert not os.path.exists(str(config.config_file) + '.tmp')
+    print("✓ A burst of changes costs one write")
+
+
+def test_existing_file_and_reset():
+    """Test that saved settings are merged over defaults and can be reset."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with open(os.path.join(temp_dir, 'settings.json'), 'w', encoding='utf-8') as f:
+            json.dump({'connection_role': 'host'}, f)
+        config = ConfigManager(temp_dir)
+        assert config.get_connection_role() == 'host'
+        assert config.get_max_frame_size() == 1024 * 1024
+        
+        config.reset_settings()
+        config.flush()
+        assert config.get_connection_role() == 'auto'
+        assert read_file(config)['connection_role'] == 'auto'
+    print("✓ Saved settings merge over defaults and reset")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Settings Tests")
+    print("=" * 40)
+    test_shared_in_memory_settings()
+    test_burst_costs_one_write()
+    test_existing_file_and_reset()
+    print("🎉 All settings tests passed!")
+
+
+if __name__ == "__main__":
+    main()
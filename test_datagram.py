@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for the UDP side channel.
+Checks latest-value-wins delivery of cursors and stroke previews between local sockets.
+"""
+
+import sys
+import os
+import asyncio
+import socket
+from array import array
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network import protocol
+from network.datagram import DatagramChannel, is_newer
+
+
+def test_ephemeral_round_trip():
+    """Test that cursors and previews survive encoding, and previews are capped."""
+    dgram_type, payload = protocol.encode_ephemeral({'type': 'cursor', 'x': -5, 'y': 700})
+    assert protocol.decode_ephemeral(dgram_type, payload) == {'type': 'cursor', 'x': -5, 'y': 700}
+    
+    points = array('i', range(1000))
+    preview = {'type': 'stroke_preview', 'stroke_id': 3, 'color': '#ff8800', 'width': 5, 'points': points}
+    dgram_type, payload = protocol.encode_ephemeral(preview)
+    datagram = protocol.encode_datagram(1, 2, dgram_type, payload)
+    assert len(datagram) <= protocol.MAX_DATAGRAM_SIZE
+    _, _, dgram_type, payload = protocol.decode_datagram(datagram)
+    data = protocol.decode_ephemeral(dgram_type, payload)
+    assert data['type'] == 'stroke_preview' and data['color'] == '#ff8800' and data['width'] == 5
+    assert list(data['points']) == list(points[-2 * protocol.PREVIEW_MAX_POINTS:])
+    
+    # Far-apart points would overflow a datagram, so the oldest are dropped
+    points = array('i', [(i // 2 % 2) * 2 ** 30 for i in range(2 * protocol.PREVIEW_MAX_POINTS)])
+    dgram_type, payload = protocol.encode_ephemeral(dict(preview, points=points))
+    assert protocol.DATAGRAM.size + len(payload) <= protocol.MAX_DATAGRAM_SIZE
+    kept = protocol.decode_ephemeral(dgram_type, payload)['points']
+    assert 0 < len(kept) < len(points) and list(kept) == list(points[-len(kept):])
+    try:
+        DatagramChannel(lambda *update: None).send(dgram_type, bytes(protocol.MAX_DATAGRAM_SIZE))
+        raise AssertionError("Oversized datagram was queued")
+    except ValueError:
+        pass
+    
+    assert is_newer(5, 4) and not is_newer(4, 5) and not is_newer(4, 4)
+    assert is_newer(1, 0xFFFFFFFF)
+    print("✓ Ephemeral updates round-trip")
+
+
+def test_latest_value_wins():
+    """Test coalescing, stale packet rejection and peer filtering."""
+    
+    async def scenario():
+        received = []
+        arrived = asyncio.Event()
+        
+        def on_update(sender_id, dgram_type, payload):
+            received.append((sender_id, protocol.decode_ephemeral(dgram_type, payload)))
+            arrived.set()
+            
+        a = DatagramChannel(lambda *args: None)
+        b = DatagramChannel(on_update)
+        a_port = await a.open('127.0.0.1', 0)
+        b_port = await b.open('127.0.0.1', 0)
+        a.add_peer('127.0.0.1', b_port)
+        b.add_peer('127.0.0.1', a_port)
+        
+        # A burst queued before the loop runs goes out as one datagram per type
+        for x in range(50):
+            a.send(*protocol.encode_ephemeral({'type': 'cursor', 'x': x, 'y': 0}))
+        await asyncio.wait_for(arrived.wait(), 5)
+        await asyncio.sleep(0.05)
+        assert received == [(a.sender_id, {'type': 'cursor', 'x': 49, 'y': 0})]
+        
+        # A late datagram carrying an older sequence is dropped
+        _, payload = protocol.encode_ephemeral({'type': 'cursor', 'x': 1, 'y': 1})
+        late = protocol.encode_datagram(a.sender_id, a.seq - 1, protocol.DGRAM_CURSOR, payload)
+        a.transport.sendto(late, ('127.0.0.1', b_port))
+        
+        # Datagrams from an unknown address are ignored
+        stranger = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        stranger.sendto(protocol.encode_datagram(7, 1, protocol.DGRAM_CURSOR, payload), ('127.0.0.1', b_port))
+        stranger.close()
+        await asyncio.sleep(0.1)
+        assert len(received) == 1 and b.stale == 1
+        
+        arrived.clear()
+        a.send(*protocol.encode_ephemeral({'type': 'cursor', 'x': 2, 'y': 2}))
+        await asyncio.wait_for(arrived.wait(), 5)
+        assert received[-1][1] == {'type': 'cursor', 'x': 2, 'y': 2}
+        a.close()
+        b.close()
+        
+    asyncio.run(scenario())
+    print("✓ The latest update wins")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Side Channel Tests")
+    print("=" * 40)
+    test_ephemeral_round_trip()
+    test_latest_value_wins()
+    print("🎉 All side channel tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the canvas drawing pipeline.
+Exercises the parts of the canvas that do not need a running Qt application.
+"""
+
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from tabs.canvas_geometry import ANTIALIAS_MARGIN, stroke_bounds
+from tabs.paint_batch import PenCache, ops_to_paint
+from tabs.stroke_batcher import StrokeBatcher
+
+
+def test_stroke_batching():
+    """Test that stroke points are batched into connected segments."""
+    batcher = StrokeBatcher()
+    batcher.begin(0, 0, '#000000', 3)
+    assert batcher.flush() is None
+    
+    for i in range(1, 101):
+        batcher.add_point(i, i * 2)
+    first = batcher.flush()
+    assert first['type'] == 'stroke_segment'
+    assert list(first['points'][:4]) == [0, 0, 1, 2]
+    assert len(first['points']) == 202
+    
+    batcher.add_point(101, 202)
+    messages = batcher.end()
+    assert [message['type'] for message in messages] == ['stroke_segment', 'stroke_end']
+    # The second segment starts where the first one stopped
+    assert list(messages[0]['points']) == [100, 200, 101, 202]
+    assert messages[1]['stroke_id'] == first['stroke_id']
+    print("✓ Stroke batching works")
+
+
+def test_click_without_movement():
+    """Test that a click that draws nothing sends nothing."""
+    batcher = StrokeBatcher()
+    batcher.begin(5, 5, '#ff0000', 1)
+    assert batcher.end() == []
+    print("✓ Empty strokes are not sent")
+
+
+def test_stroke_bounds():
+    """Test that a stroke's repaint area covers the pen's square caps and nothing more."""
+    assert stroke_bounds([], 3) is None
+    pad = 3 + ANTIALIAS_MARGIN
+    assert stroke_bounds([10, 20], 3) == (10 - pad, 20 - pad, 2 * pad + 1, 2 * pad + 1)
+    x, y, width, height = stroke_bounds([5, 50, 40, 10, 20, 30], 10)
+    pad = 8 + ANTIALIAS_MARGIN
+    assert (x, y) == (5 - pad, 10 - pad)
+    assert (x + width - 1, y + height - 1) == (40 + pad, 50 + pad)
+    # A square cap on a diagonal end reaches about 0.707 of the width past the endpoint
+    x, y, _, _ = stroke_bounds([100, 100, 200, 200], 50)
+    assert 100 - x >= 36
+    print("✓ Stroke repaint areas are tight")
+
+
+def test_ops_to_paint():
+    """Test that a batch paints only the strokes after its last clear."""
+    def segment(stroke_id):
+        return {'type': 'stroke_segment', 'stroke_id': stroke_id, 'color': '#000000', 'width': 3, 'points': [0, 0, 1, 1]}
+        
+    end = {'type': 'stroke_end', 'stroke_id': 1}
+    cleared, segments = ops_to_paint([segment(1), end, segment(2)])
+    assert not cleared and [data['stroke_id'] for data in segments] == [1, 2]
+    
+    clear = {'type': 'clear_canvas'}
+    cleared, segments = ops_to_paint([segment(1), clear, segment(2), clear, segment(3), end])
+    assert cleared and [data['stroke_id'] for data in segments] == [3]
+    assert ops_to_paint([segment(1), clear]) == (True, [])
+    assert ops_to_paint([]) == (False, [])
+    print("✓ Operations before the last clear are not painted")
+
+
+def test_pen_cache():
+    """Test that pens are made once per style and the cache stays bounded."""
+    made = []
+    
+    def make_pen(color, width):
+        made.append((color, width))
+        return object()
+        
+    pens = PenCache(make_pen, size=2)
+    red = pens.get('#ff0000', 3)
+    assert pens.get('#ff0000', 3) is red and made == [('#ff0000', 3)]
+    pens.get('#ff0000', 5)
+    assert len(pens) == 2
+    pens.get('#0000ff', 3)
+    # Full, so emptied before the new style went in
+    assert len(pens) == 1 and pens.get('#ff0000', 3) is not red
+    assert len(made) == 4
+    print("✓ Pens are reused per style within a bounded cache")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Drawing Tests")
+    print("=" * 40)
+    test_stroke_batching()
+    test_click_without_movement()
+    test_stroke_bounds()
+    test_ops_to_paint()
+    test_pen_cache()
+    print("🎉 All drawing tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test script for chunked file transfer.
+Streams files through the sender and receiver without a network connection.
+"""
+
+import sys
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network import protocol
+from network.file_transfer import FileSender, FileReceiver, ReceivedFiles
+
+
+def transfer(file_path, download_dir, chunk_size=1024, corrupt=False, executor=None):
+    """Feed every frame of a transfer through a receiver."""
+    sender = FileSender(file_path, os.path.basename(file_path), chunk_size=chunk_size)
+    receiver = FileReceiver(download_dir)
+    handlers = {
+        protocol.MSG_FILE_OFFER: receiver.handle_offer,
+        protocol.MSG_FILE_CHUNK: receiver.handle_chunk,
+        protocol.MSG_FILE_END: receiver.handle_end,
+    }
+    result = None
+    for item in sender.frames(executor):
+        if isinstance(item, Future):
+            item.result()
+            continue
+        msg_type, payload = item
+        if isinstance(payload, tuple):
+            payload = b''.join(payload)
+        if corrupt and msg_type == protocol.MSG_FILE_CHUNK:
+            payload = payload[:-1] + bytes([payload[-1] ^ 0xFF])
+        result = handlers[msg_type](memoryview(payload))
+    return result, receiver
+
+
+def test_round_trip():
+    """Test that a multi-chunk file arrives intact."""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.bin")
+        data = os.urandom(10 * 1024 + 17)
+        with open(source, 'wb') as f:
+            f.write(data)
+            
+        transfer_result, receiver = transfer(source, os.path.join(tmp, "downloads"))
+        assert transfer_result.file_name == "source.bin"
+        with open(transfer_result.path, 'rb') as f:
+            assert f.read() == data
+        assert not receiver.transfers
+    print("✓ Multi-chunk transfer works")
+
+
+def test_read_on_executor():
+    """Test that chunks read and hashed on an executor arrive intact and in order."""
+    with tempfile.TemporaryDirectory() as tmp, ThreadPoolExecutor(max_workers=1) as executor:
+        source = os.path.join(tmp, "source.bin")
+        data = os.urandom(50 * 1024 + 3)
+        with open(source, 'wb') as f:
+            f.write(data)
+            
+        transfer_result, _ = transfer(source, os.path.join(tmp, "downloads"), executor=executor)
+        with open(transfer_result.path, 'rb') as f:
+            assert f.read() == data
+            
+        # Until the reader has caught up, the sender hands back what it is waiting on
+        gate = threading.Event()
+        executor.submit(gate.wait)
+        sender = FileSender(source, "source.bin")
+        frames = sender.frames(executor)
+        next(frames)
+        assert isinstance(next(frames), Future)
+        gate.set()
+        frames.close()
+    print("✓ Files are read and hashed off the caller's thread")
+
+
+def test_empty_file():
+    """Test that empty files, which cannot be memory-mapped, still transfer."""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "empty.txt")
+        open(source, 'wb').close()
+        
+        transfer_result, _ = transfer(source, tmp)
+        assert os.path.getsize(transfer_result.path) == 0
+    print("✓ Empty file transfer works")
+
+
+def test_checksum_mismatch():
+    """Test that corrupted transfers are rejected and cleaned up."""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.bin")
+        with open(source, 'wb') as f:
+            f.write(os.urandom(4096))
+            
+        downloads = os.path.join(tmp, "downloads")
+        try:
+            transfer(source, downloads, corrupt=True)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Corrupted transfer was accepted")
+        assert os.listdir(downloads) == []
+    print("✓ Corrupted transfer rejected")
+
+
+def test_duplicate_offer():
+    """Test that a second offer with an id in progress is rejected, not swapped in."""
+    with tempfile.TemporaryDirectory() as tmp:
+        receiver = FileReceiver(tmp)
+        first = receiver.handle_offer(protocol.encode_file_offer(1, 10, "first.bin"))
+        try:
+            receiver.handle_offer(protocol.encode_file_offer(1, 20, "second.bin"))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Duplicate offer was accepted")
+        assert receiver.transfers == {1: first} and os.listdir(tmp) == [os.path.basename(first.path)]
+        receiver.abort_all()
+    print("✓ Duplicate offer rejected")
+
+
+def test_received_files():
+    """Test that received files leave the download area when saved or discarded."""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name in ("a.part", "b.part", "c.part"):
+            paths.append(os.path.join(tmp, name))
+            with open(paths[-1], 'wb') as f:
+                f.write(name.encode())
+        received = ReceivedFiles()
+        for path in paths:
+            received.add(path)
+            
+        saved = os.path.join(tmp, "saved.txt")
+        assert received.save(paths[0], saved) == saved
+        assert not os.path.exists(paths[0]) and paths[0] not in received
+        # Saving again copies from where it was saved
+        again = os.path.join(tmp, "again.txt")
+        received.save(saved, again)
+        with open(again, 'rb') as f:
+            assert f.read() == b"a.part"
+            
+        received.discard(paths[1])
+        assert not os.path.exists(paths[1])
+        received.discard_all()
+        assert not os.path.exists(paths[2]) and not received.paths
+        assert os.path.exists(saved)
+    print("✓ Received files are deleted once saved or cleared")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - File Transfer Tests")
+    print("=" * 40)
+    test_round_trip()
+    test_read_on_executor()
+    test_empty_file()
+    test_checksum_mismatch()
+    test_duplicate_offer()
+    test_received_files()
+    print("🎉 All file transfer tests passed!")
+
+
+if __name__ == "__main__":
+    main()
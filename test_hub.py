@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script for hub mode.
+Connects several peers to one hub and checks relaying, resume and expiry.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network import protocol
+from network.hub import Hub
+from network.outbound import Frame, OutboundQueue
+from network.session import Session
+from network.stroke_codec import StrokePalette
+from network.transport import PeerConnection, dial_with_backoff, exchange_hello
+
+
+class Client:
+    """A peer connected to the hub, recording what it receives."""
+    
+    def __init__(self, name):
+        self.name = name
+        self.session = Session()
+        self.queue = OutboundQueue()
+        self.palette = StrokePalette()
+        self.received = []
+        self.origins = set()
+        self.arrived = asyncio.Event()
+        self.connection = None
+        
+    async def connect(self, port):
+        stream = await dial_with_backoff('127.0.0.1', port)
+        resumed = await exchange_hello(stream, self.session)
+        self.connection = PeerConnection(stream, self.queue, self.on_frame, session=self.session)
+        self.connection.task = asyncio.ensure_future(self.connection.run())
+        return resumed
+        
+    def on_frame(self, msg_type, flags, channel, payload):
+        if msg_type == protocol.MSG_ORIGIN:
+            origin_id, _, msg_type, payload = protocol.decode_origin(payload)
+            self.origins.add(origin_id)
+        if msg_type == protocol.MSG_CHAT:
+            self.received.append(protocol.decode_chat(payload))
+        else:
+            self.received.append(protocol.decode_drawing(msg_type, payload, self.palette))
+        self.arrived.set()
+        
+    async def wait_for(self, count):
+        while len(self.received) < count:
+            self.arrived.clear()
+            await asyncio.wait_for(self.arrived.wait(), 5)
+
+
+async def start_hub(**kwargs):
+    """Start a hub on a free local port, recording what it delivers locally."""
+    delivered = []
+    hub = Hub(lambda msg_type, payload, sender: delivered.append((msg_type, bytes(payload))), **kwargs)
+    port = await hub.start('127.0.0.1', 0)
+    return hub, port, delivered
+
+
+def stroke(color):
+    """Return a short stroke segment."""
+    return {'type': 'stroke_segment', 'stroke_id': 1, 'color': color, 'width': 3, 'points': [0, 0, 5, 5, 9, 2]}
+
+
+def test_hub_relays_to_other_members():
+    """Test that a member's messages reach every other member once and the hub itself."""
+    
+    async def scenario():
+        hub, port, delivered = await start_hub()
+        clients = [Client(name) for name in 'abc']
+        for client in clients:
+            assert not await client.connect(port)
+        while len(hub.member_list) < 3:
+            await asyncio.sleep(0.01)
+        a, b, c = clients
+        
+        # File transfers are refused in a group, so the offer is never delivered
+        a.queue.put(Frame(protocol.MSG_FILE_OFFER, protocol.encode_file_offer(1, 10, "x.bin")))
+        a.queue.put(Frame(protocol.MSG_CHAT, protocol.encode_chat("hello")))
+        for color in ('#ff0000', '#ff0000', '#00ff00'):
+            a.queue.put(Frame(*protocol.encode_drawing(stroke(color), a.palette)))
+        await b.wait_for(4)
+        await c.wait_for(4)
+        assert b.received[0] == c.received[0] == "hello"
+        assert [op['color'] for op in b.received[1:]] == ['#ff0000', '#ff0000', '#00ff00']
+        assert [op['color'] for op in c.received[1:]] == ['#ff0000', '#ff0000', '#00ff00']
+        assert list(b.received[1]['points']) == [0, 0, 5, 5, 9, 2]
+        assert [msg_type for msg_type, _ in delivered] == [protocol.MSG_CHAT] + [protocol.MSG_STROKE_SEGMENT] * 3
+        # Relayed messages name the member they came from
+        assert b.origins == c.origins == {a.session.session_id & 0xFFFFFFFF}
+        
+        # The hub's own messages go to everyone, as one frame shared by every queue
+        queued = []
+        for member in hub.member_list:
+            put = member.queue.put
+            member.queue.put = lambda item, put=put, **kwargs: queued.append(item) or put(item, **kwargs)
+        frame = Frame(protocol.MSG_CHAT, protocol.encode_chat("from hub"))
+        assert hub.broadcast(frame)
+        assert len(queued) == 3 and all(item is frame for item in queued)
+        for client in clients:
+            await client.wait_for(1 if client is a else 5)
+        assert a.received == ["from hub"]
+        assert b.received[-1] == c.received[-1] == "from hub"
+        
+        snapshot = hub.snapshot()
+        assert snapshot['peers'] == 3 and snapshot['bytes_sent'] > 0
+        hub.close()
+        await asyncio.sleep(0.05)
+        assert not hub.members
+        for client in clients:
+            client.connection.close()
+            
+    asyncio.run(scenario())
+    print("✓ Hub relays to every other member")
+
+
+def test_member_resumes_and_expires():
+    """Test that a dropped member resumes its session, and is forgotten if it stays away."""
+    
+    async def scenario():
+        hub, port, _ = await start_hub(member_timeout=0.3)
+        a, b = Client('a'), Client('b')
+        await a.connect(port)
+        await b.connect(port)
+        while len(hub.member_list) < 2:
+            await asyncio.sleep(0.01)
+            
+        # b drops; what a sends meanwhile waits in b's queue at the hub
+        b.connection.close()
+        await asyncio.sleep(0.05)
+        a.queue.put(Frame(protocol.MSG_CHAT, protocol.encode_chat("while away")))
+        await asyncio.sleep(0.1)
+        assert await b.connect(port)
+        await b.wait_for(1)
+        assert b.received == ["while away"]
+        
+        b.connection.close()
+        await asyncio.sleep(0.6)
+        assert len(hub.members) == 1
+        hub.close()
+        a.connection.close()
+        
+    asyncio.run(scenario())
+    print("✓ Members resume, and expire when they stay away")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Hub Tests")
+    print("=" * 40)
+    test_hub_relays_to_other_members()
+    test_member_resumes_and_expires()
+    print("🎉 All hub tests passed!")
+
+
+if __name__ == "__main__":
+    main()
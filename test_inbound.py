@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script for the inbound message queue.
+Checks that received messages reach their batch handlers in order and in batches.
+"""
+
+import sys
+import os
+import threading
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network.inbound import InboundQueue
+
+
+def test_batches_keep_order():
+    """Test that consecutive items of one kind are handled together, in order."""
+    calls = []
+    inbound = InboundQueue()
+    inbound.register('chat', lambda batch: calls.append(('chat', batch)))
+    inbound.register('drawing', lambda batch: calls.append(('drawing', batch)))
+    for i in range(200):
+        inbound.put('drawing', i)
+    inbound.put('chat', 'hi')
+    inbound.put('drawing', 200)
+    
+    assert inbound.drain() == 202
+    assert calls == [('drawing', list(range(200))), ('chat', ['hi']), ('drawing', [200])]
+    assert inbound.drain() == 0
+    print("✓ Inbound batches keep order")
+
+
+def test_one_drain_request_per_burst():
+    """Test that a burst requests a single drain, and the next burst another."""
+    requests = []
+    inbound = InboundQueue(request_drain=lambda: requests.append(1))
+    inbound.register('chat', lambda batch: None)
+    for _ in range(50):
+        inbound.put('chat', 'x')
+    assert len(requests) == 1
+    inbound.drain()
+    inbound.put('chat', 'y')
+    assert len(requests) == 2
+    print("✓ One drain request per burst")
+
+
+def test_drain_limit_requests_more():
+    """Test that a drain stops at its limit and asks to be run again."""
+    requests = []
+    handled = []
+    inbound = InboundQueue(request_drain=lambda: requests.append(1), drain_limit=10)
+    inbound.register('drawing', handled.extend)
+    for i in range(25):
+        inbound.put('drawing', i)
+    assert inbound.drain() == 10
+    assert len(requests) == 2
+    assert inbound.drain() == 10
+    assert inbound.drain() == 5
+    assert len(requests) == 3
+    assert handled == list(range(25))
+    print("✓ Drain limit requests another drain")
+
+
+def test_handler_errors_are_contained():
+    """Test that a failing handler does not stop later batches."""
+    handled = []
+    inbound = InboundQueue()
+    inbound.register('chat', lambda batch: 1 / 0)
+    inbound.register('file', handled.extend)
+    inbound.put('chat', 'boom')
+    inbound.put('file', 'kept')
+    inbound.put('unknown', None)
+    assert inbound.drain() == 3
+    assert handled == ['kept']
+    print("✓ Handler errors are contained")
+
+
+def test_producer_thread():
+    """Test that items put from another thread all arrive exactly once."""
+    handled = []
+    wakeups = threading.Semaphore(0)
+    inbound = InboundQueue(request_drain=wakeups.release)
+    inbound.register('drawing', handled.extend)
+    
+    def produce():
+        for i in range(20000):
+            inbound.put('drawing', i)
+        inbound.put('done', None)
+        
+    done = []
+    inbound.register('done', done.extend)
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while not done:
+        assert wakeups.acquire(timeout=5)
+        inbound.drain()
+    producer.join()
+    assert handled == list(range(20000))
+    print("✓ Items from another thread arrive exactly once")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Inbound Queue Tests")
+    print("=" * 40)
+    test_batches_keep_order()
+    test_one_drain_request_per_burst()
+    test_drain_limit_requests_more()
+    test_handler_errors_are_contained()
+    test_producer_thread()
+    print("🎉 All inbound queue tests passed!")
+
+
+if __name__ == "__main__":
+    main()
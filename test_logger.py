@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the logging setup.
+Checks per-module levels, lazy formatting and the background file sink.
+"""
+
+import sys
+import os
+import logging
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils import logger
+
+
+class CountingArg:
+    """Log argument that counts how often it is formatted."""
+    
+    def __init__(self):
+        self.formatted = 0
+        
+    def __str__(self):
+        self.formatted += 1
+        return "arg"
+
+
+def test_levels_and_lazy_formatting():
+    """Test that disabled messages are never formatted and levels apply per module."""
+    logger.setup_logging(level='WARNING', levels={'network.transport': 'DEBUG'})
+    arg = CountingArg()
+    logger.get_logger('network.tailscale_manager').debug("hidden %s", arg)
+    assert arg.formatted == 0
+    assert logger.get_logger('network.transport').isEnabledFor(logging.DEBUG)
+    assert not logger.get_logger('network.inbound').isEnabledFor(logging.INFO)
+    
+    logger.set_diagnostics(True)
+    assert logger.diagnostics_enabled()
+    assert logger.get_logger('network.inbound').isEnabledFor(logging.DEBUG)
+    logger.set_diagnostics(False, 'WARNING')
+    assert not logger.diagnostics_enabled()
+    logger.set_level('NOTSET', 'network.transport')
+    print("✓ Levels apply per module and disabled messages cost nothing")
+
+
+def test_ring_buffer_drops_oldest():
+    """Test that the ring buffer keeps only the newest records without blocking."""
+    records = logger.RingBufferQueue(3)
+    for i in range(5):
+        records.put_nowait(i)
+    assert [records.get_nowait() for _ in range(records.qsize())] == [2, 3, 4]
+    print("✓ Ring buffer keeps the newest records")
+
+
+def test_file_sink():
+    """Test that records reach the log file through the background writer."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_file = os.path.join(temp_dir, 'vortex.log')
+        logger.setup_logging(level='INFO', log_file=log_file)
+        log = logger.get_logger('network.transport')
+        log.info("listening on port %d", 8081)
+        log.debug("not written")
+        logger.shutdown_logging()
+        with open(log_file, encoding='utf-8') as f:
+            text = f.read()
+        assert "vortex.network.transport: listening on port 8081" in text
+        assert "not written" not in text
+    logger.setup_logging(level='WARNING')
+    print("✓ File sink writes in the background")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Logging Tests")
+    print("=" * 40)
+    test_levels_and_lazy_formatting()
+    test_ring_buffer_drops_oldest()
+    test_file_sink()
+    print("🎉 All logging tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for mesh mode.
+Connects several nodes to each other and checks that every operation is applied once.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network import protocol
+from network.mesh import Mesh, OpFilter
+from network.outbound import Frame
+
+
+async def start_node(**kwargs):
+    """Start a mesh node on a free local port, recording what it delivers."""
+    delivered = []
+    node = Mesh(lambda msg_type, payload, sender: delivered.append((msg_type, bytes(payload))), **kwargs)
+    await node.start('127.0.0.1', 0, self_address='127.0.0.1')
+    return node, delivered
+
+
+async def wait_until(condition, timeout=5):
+    """Poll until condition() is true."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def linked(node, count):
+    """Return True once a node has count connected members."""
+    return sum(1 for member in node.member_list if member.connection) == count
+
+
+def test_op_filter():
+    """Test that each operation is accepted once, in or out of order."""
+    ops = OpFilter(window=8)
+    assert ops.accept(1, 10)
+    assert not ops.accept(1, 10)
+    assert not ops.accept(1, 9)
+    assert ops.accept(1, 12) and ops.accept(1, 11)
+    assert not ops.accept(1, 12)
+    assert ops.origins[1] == [12, set()]
+    assert ops.accept(2, 1)
+    
+    # Far ahead: the oldest gap is given up on and memory stays bounded
+    assert ops.accept(1, 30)
+    assert ops.origins[1][0] == 22 and ops.origins[1][1] == {30}
+    assert not ops.accept(1, 20)
+    assert ops.accept(1, 25)
+    print("✓ Operations are accepted once")
+
+
+def test_mesh_delivers_each_op_once():
+    """Test that three nodes link up pairwise and each op reaches each other node once."""
+    
+    async def scenario():
+        nodes = [await start_node() for _ in range(3)]
+        for node, _ in nodes:
+            for peer, _ in nodes:
+                if peer is not node:
+                    node.add_peer('127.0.0.1', peer.port)
+        for node, _ in nodes:
+            await wait_until(lambda: linked(node, 2))
+        # Only one side of each pair dials
+        assert sum(len(node.peers) for node, _ in nodes) == 3
+        
+        (a, a_got), (b, b_got), (c, c_got) = nodes
+        assert a.send(protocol.MSG_CHAT, protocol.encode_chat("hello"))
+        assert c.send(protocol.MSG_CHAT, protocol.encode_chat("from c"))
+        await wait_until(lambda: len(b_got) == 2 and a_got and len(c_got) == 1)
+        await asyncio.sleep(0.05)
+        assert sorted(b_got) == sorted([(protocol.MSG_CHAT, b'hello'), (protocol.MSG_CHAT, b'from c')])
+        assert a_got == [(protocol.MSG_CHAT, b'from c')]
+        assert c_got == [(protocol.MSG_CHAT, b'hello')]
+        
+        # The same operation arriving over a second link is not applied again
+        envelope = protocol.encode_origin(a.node_id, 1, protocol.MSG_CHAT)
+        frame = Frame(protocol.MSG_ORIGIN, (envelope, protocol.encode_chat("hello")))
+        payload = b''.join(frame.parts)
+        member = b.member_list[0]
+        b.on_member_frame(member, frame.msg_type, frame.flags, frame.channel, payload)
+        assert len(b_got) == 2
+        
+        # One frame is shared by every link
+        queued = []
+        for member in a.member_list:
+            put = member.queue.put
+            member.queue.put = lambda item, put=put, **kwargs: queued.append(item) or put(item, **kwargs)
+        assert a.send(protocol.MSG_CHAT, protocol.encode_chat("again"))
+        assert len(queued) == 2 and queued[0] is queued[1]
+        await wait_until(lambda: len(b_got) == 3 and len(c_got) == 2)
+        
+        assert a.snapshot()['peers'] == 2
+        for node, _ in nodes:
+            node.close()
+        await asyncio.sleep(0.05)
+        assert not any(node.members for node, _ in nodes)
+        
+    asyncio.run(scenario())
+    print("✓ Each operation reaches every other node once")
+
+
+def test_dialed_peer_resumes():
+    """Test that a node redials a dropped link and nothing sent meanwhile is lost."""
+    
+    async def scenario():
+        (a, a_got), (b, b_got) = await start_node(), await start_node()
+        dialer, listener, got = (a, b, b_got) if a.should_dial('127.0.0.1', b.port) else (b, a, a_got)
+        dialer.add_peer('127.0.0.1', listener.port)
+        await wait_until(lambda: linked(dialer, 1) and linked(listener, 1))
+        
+        member = dialer.member_list[0]
+        member.connection.close()
+        dialer.send(protocol.MSG_CHAT, protocol.encode_chat("while away"))
+        await wait_until(lambda: got == [(protocol.MSG_CHAT, b'while away')])
+        assert len(listener.members) == 1
+        dialer.close()
+        listener.close()
+        
+    asyncio.run(scenario())
+    print("✓ Dialed peers reconnect and resume")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Mesh Tests")
+    print("=" * 40)
+    test_op_filter()
+    test_mesh_delivers_each_op_once()
+    test_dialed_peer_resumes()
+    print("🎉 All mesh tests passed!")
+
+
+if __name__ == "__main__":
+    main()
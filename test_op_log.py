@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for the canvas operation log.
+Checks ordering, clears and spatial queries over logged strokes.
+"""
+
+import sys
+import os
+import random
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from tabs.op_log import GridIndex, OpLog, intersects
+
+
+def segment(points, width=3, color='#000000'):
+    """Return a stroke segment operation."""
+    return {'type': 'stroke_segment', 'stroke_id': 1, 'color': color, 'width': width, 'points': points}
+
+
+def test_log_and_clear():
+    """Test that operations keep their order and a clear hides what came before."""
+    log = OpLog()
+    first = log.append(segment([0, 0, 10, 10]))
+    log.append({'type': 'stroke_end', 'stroke_id': 1})
+    assert log.query((0, 0, 20, 20)) == [first]
+    
+    cleared = log.append({'type': 'clear_canvas'})
+    assert log.query((0, 0, 20, 20)) == []
+    after = log.append(segment([5, 5, 6, 6]))
+    assert log.query((0, 0, 20, 20)) == [after]
+    assert len(log) == 4 and list(log[first]['points']) == [0, 0, 10, 10]
+    assert [op['type'] for op in log.since(cleared)] == ['clear_canvas', 'stroke_segment']
+    assert log.visible() == [log[after]]
+    print("✓ Operations are logged in order and clears hide earlier ones")
+
+
+def test_strokes_keyed_by_sender():
+    """Test that the same stroke id from different senders stays two strokes."""
+    log = OpLog()
+    mine = log.append(segment([0, 0, 10, 10]))
+    theirs = log.append(segment([20, 20, 30, 30]), sender=7)
+    more = log.append(segment([10, 10, 12, 12]))
+    assert log.stroke(None, 1) == [mine, more]
+    assert log.stroke(7, 1) == [theirs]
+    assert log[theirs]['sender'] == 7 and 'sender' not in log[mine]
+    log.append({'type': 'clear_canvas'})
+    assert log.stroke(7, 1) == []
+    print("✓ Strokes are told apart by sender")
+
+
+def test_spatial_query_matches_scan():
+    """Test that grid queries find exactly what a full scan finds, far apart and up close."""
+    rng = random.Random(7)
+    index = GridIndex(cell_size=64, large_cells=16)
+    boxes = {}
+    for item in range(2000):
+        x, y = rng.randrange(-5000, 5000), rng.randrange(-5000, 5000)
+        box = (x, y, rng.randrange(1, 100), rng.randrange(1, 100))
+        if item % 500 == 0:
+            box = (x, y, 3000, 3000)  # spans more cells than large_cells
+        boxes[item] = box
+        index.insert(item, box)
+    assert index.large
+    for _ in range(200):
+        area = (rng.randrange(-5000, 5000), rng.randrange(-5000, 5000), rng.randrange(1, 400), rng.randrange(1, 400))
+        expected = [item for item, box in boxes.items() if intersects(box, area)]
+        assert index.query(area) == expected
+    print("✓ Spatial queries match a full scan")
+
+
+def test_hit_test():
+    """Test that hit-testing finds strokes under a point, topmost first."""
+    log = OpLog()
+    under = log.append(segment([0, 50, 100, 50], width=10))
+    over = log.append(segment([50, 0, 50, 100], width=2))
+    far = log.append(segment([500, 500, 600, 600]))
+    assert log.hit_test(50, 50) == [over, under]
+    assert log.hit_test(20, 54) == [under]
+    assert log.hit_test(20, 60) == []
+    assert log.hit_test(20, 60, tolerance=5) == [under]
+    assert log.hit_test(550, 550) == [far]
+    print("✓ Hit-testing finds the strokes under a point")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Operation Log Tests")
+    print("=" * 40)
+    test_log_and_clear()
+    test_strokes_keyed_by_sender()
+    test_spatial_query_matches_scan()
+    test_hit_test()
+    print("🎉 All operation log tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for the outbound queue.
+Checks channel scheduling, stream expansion and backpressure.
+"""
+
+import sys
+import os
+from concurrent.futures import Future
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network import protocol
+from network.outbound import Frame, OutboundQueue
+
+
+def test_bulk_yields_to_interactive():
+    """Test that interactive frames overtake a long bulk stream."""
+    queue = OutboundQueue()
+    chunk = b"x" * 16 * 1024
+    queue.put(Frame(protocol.MSG_FILE_CHUNK, chunk, channel=protocol.CHANNEL_BULK) for _ in range(100))
+    
+    order = []
+    for step in range(10):
+        if step == 3:
+            for _ in range(5):
+                queue.put(Frame(protocol.MSG_STROKE_SEGMENT, b"s" * 24))
+            queue.put(Frame(protocol.MSG_CHAT, b"ping", channel=protocol.CHANNEL_CONTROL))
+        channel, item = queue.get()
+        if channel == protocol.CHANNEL_BULK:
+            item = next(item)
+        queue.charge(channel, item.size)
+        order.append(channel)
+        
+    # Once queued, control goes first and interactive drains before the next bulk chunk
+    assert order[3] == protocol.CHANNEL_CONTROL
+    assert order[4:9] == [protocol.CHANNEL_INTERACTIVE] * 5
+    assert order[9] == protocol.CHANNEL_BULK
+    queue.close()
+    print("✓ Bulk stream yields to interactive frames")
+
+
+def test_next_frame_expands_streams():
+    """Test that next_frame pulls streams one frame at a time and never blocks."""
+    woken = []
+    queue = OutboundQueue(on_ready=lambda: woken.append(True))
+    assert queue.next_frame() == (None, None)
+    
+    queue.put(iter([
+        Frame(protocol.MSG_FILE_CHUNK, b"a", channel=protocol.CHANNEL_BULK),
+        Frame(protocol.MSG_FILE_CHUNK, b"b", channel=protocol.CHANNEL_BULK),
+    ]))
+    assert woken == [True]
+    assert queue.has_pending()
+    parts = []
+    while True:
+        channel, frame = queue.next_frame()
+        if frame is None:
+            break
+        assert channel == protocol.CHANNEL_BULK
+        parts.append(frame.parts[0])
+    assert parts == [b"a", b"b"]
+    assert not queue.has_pending()
+    print("✓ Streams expand one frame at a time")
+
+
+def test_congestion_watermarks():
+    """Test that crossing the watermarks reports congestion changes."""
+    events = []
+    queue = OutboundQueue(max_bytes=1000, high_water=300, low_water=100, on_congestion=events.append)
+    for _ in range(4):
+        assert queue.put(Frame(protocol.MSG_CHAT, b"x" * (100 - protocol.HEADER_SIZE)))
+    assert events == [True]
+    
+    # The queue is full, so a non-blocking put is refused
+    assert not queue.put(Frame(protocol.MSG_CHAT, b"x" * 900), timeout=0)
+    
+    for _ in range(3):
+        queue.get()
+    assert events == [True, False]
+    
+    # A stream counts the bytes it will produce until it has produced them
+    queue.get()
+    chunks = [Frame(protocol.MSG_FILE_CHUNK, b"x" * (100 - protocol.HEADER_SIZE)) for _ in range(4)]
+    assert queue.put(iter(chunks), size=400)
+    assert events == [True, False, True] and queue.queued_bytes == 0
+    for _ in range(3):
+        assert queue.next_frame()[1] is not None
+    assert events == [True, False, True, False]
+    assert queue.next_frame()[1] is not None and queue.next_frame() == (None, None)
+    assert queue.stream_bytes == 0 and not queue.stream_sizes
+    print("✓ Congestion watermarks work")
+
+
+def test_waiting_stream_parks_its_channel():
+    """Test that a stream waiting on a Future lets other channels through until it is done."""
+    wakeups = []
+    queue = OutboundQueue(on_ready=lambda: wakeups.append(True))
+    pending = Future()
+    
+    def stream():
+        yield pending
+        yield Frame(protocol.MSG_FILE_CHUNK, b"c" * 10, channel=protocol.CHANNEL_BULK)
+        
+    queue.put(stream())
+    queue.put(Frame(protocol.MSG_CHAT, b"hi"))
+    wakeups.clear()
+    
+    channel, frame = queue.next_frame()
+    assert channel == protocol.CHANNEL_INTERACTIVE and frame.msg_type == protocol.MSG_CHAT
+    assert queue.next_frame() == (None, None) and not queue.has_pending()
+    
+    pending.set_result(None)
+    assert wakeups and queue.has_pending()
+    channel, frame = queue.next_frame()
+    assert channel == protocol.CHANNEL_BULK and frame.msg_type == protocol.MSG_FILE_CHUNK
+    assert queue.next_frame() == (None, None)
+    queue.close()
+    print("✓ A waiting stream parks only its own channel")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Outbound Queue Tests")
+    print("=" * 40)
+    test_bulk_yields_to_interactive()
+    test_next_frame_expands_streams()
+    test_congestion_watermarks()
+    test_waiting_stream_parks_its_channel()
+    print("🎉 All outbound queue tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for the binary wire protocol.
+Verifies frame headers and payload encodings round-trip correctly.
+"""
+
+import sys
+import os
+from array import array
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network import protocol
+from network.stroke_codec import StrokePalette
+
+
+def test_header_round_trip():
+    """Test that frame headers pack and unpack symmetrically."""
+    header = protocol.encode_header(protocol.MSG_CHAT, 1234, flags=0x01, channel=2, seq=0xFFFFFFFF)
+    assert len(header) == protocol.HEADER_SIZE
+    assert protocol.decode_header(header) == (protocol.MSG_CHAT, 0x01, 2, 1234, 0xFFFFFFFF)
+    print("✓ Header round-trip works")
+
+
+def test_chat_round_trip():
+    """Test chat payload encoding."""
+    payload = protocol.encode_chat("héllo 👋")
+    assert protocol.decode_chat(memoryview(payload)) == "héllo 👋"
+    print("✓ Chat round-trip works")
+
+
+def test_drawing_round_trip():
+    """Test drawing payload encoding."""
+    segment = {
+        'type': 'stroke_segment',
+        'stroke_id': 3,
+        'color': '#1a2b3c',
+        'width': 3,
+        'points': array('i', [-5, 10, 799, 599, 800, 601])
+    }
+    send_palette = StrokePalette()
+    receive_palette = StrokePalette()
+    msg_type, payload = protocol.encode_drawing(segment, send_palette)
+    assert msg_type == protocol.MSG_STROKE_SEGMENT
+    assert protocol.decode_drawing(msg_type, memoryview(payload), receive_palette) == segment
+    
+    msg_type, payload = protocol.encode_drawing({'type': 'stroke_end', 'stroke_id': 3}, send_palette)
+    assert protocol.decode_drawing(msg_type, memoryview(payload), receive_palette) == {
+        'type': 'stroke_end', 'stroke_id': 3
+    }
+    
+    msg_type, payload = protocol.encode_drawing({'type': 'clear_canvas'}, send_palette)
+    assert msg_type == protocol.MSG_CLEAR_CANVAS and payload == b''
+    assert protocol.decode_drawing(msg_type, memoryview(payload), receive_palette) == {'type': 'clear_canvas'}
+    print("✓ Drawing round-trip works")
+
+
+def test_file_frames_round_trip():
+    """Test that file frames carry raw bytes without a text codec."""
+    payload = protocol.encode_file_offer(7, 1 << 33, "räport.bin")
+    assert protocol.decode_file_offer(memoryview(payload)) == (7, 1 << 33, "räport.bin")
+    
+    data = bytes(range(256)) * 4
+    payload = protocol.encode_file_chunk_header(7, 4096) + data
+    transfer_id, offset, view = protocol.decode_file_chunk(memoryview(payload))
+    assert (transfer_id, offset) == (7, 4096)
+    assert isinstance(view, memoryview)
+    assert view == data
+    
+    payload = protocol.encode_file_end(7, b'\x01' * 32)
+    assert protocol.decode_file_end(memoryview(payload)) == (7, b'\x01' * 32)
+    print("✓ File frames round-trip works")
+
+
+def test_session_frames_round_trip():
+    """Test session hello and acknowledgement payloads."""
+    payload = protocol.encode_hello(1 << 63, 5, 1 << 40)
+    assert protocol.decode_hello(memoryview(payload)) == (1 << 63, 5, 1 << 40)
+    assert protocol.decode_ack(memoryview(protocol.encode_ack(12345))) == 12345
+    print("✓ Session frames round-trip works")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Protocol Tests")
+    print("=" * 40)
+    test_header_round_trip()
+    test_chat_round_trip()
+    test_drawing_round_trip()
+    test_file_frames_round_trip()
+    test_session_frames_round_trip()
+    print("🎉 All protocol tests passed!")
+
+
+if __name__ == "__main__":
+    main()
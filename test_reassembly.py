@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for sub-frame splitting and reassembly.
+Checks that large messages survive the round trip within the memory budget.
+"""
+
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network import protocol
+from network.outbound import Frame, fragment_frames
+from network.reassembly import Reassembler
+
+
+def test_split_and_reassemble():
+    """Test that a message split into sub-frames is rebuilt exactly."""
+    payload = os.urandom(10 * 1000 + 7)
+    frames = list(fragment_frames(Frame(protocol.MSG_CHAT, payload), 1000))
+    assert len(frames) == 11
+    assert all(frame.length <= 1000 for frame in frames)
+    assert [bool(frame.flags & protocol.FLAG_MORE) for frame in frames] == [True] * 10 + [False]
+    
+    reassembler = Reassembler()
+    results = [reassembler.feed(frame.msg_type, frame.flags, frame.channel, frame.parts[0])
+               for frame in frames]
+    assert results[:-1] == [None] * 10
+    assert results[-1] == payload
+    assert reassembler.buffered == 0
+    print("✓ Split messages are reassembled")
+
+
+def test_whole_frames_pass_through():
+    """Test that unsplit frames are returned as-is, interleaved with a split message."""
+    reassembler = Reassembler()
+    view = memoryview(b"small")
+    assert reassembler.feed(protocol.MSG_CHAT, protocol.FLAG_MORE, protocol.CHANNEL_BULK, b"big-") is None
+    assert reassembler.feed(protocol.MSG_CHAT, protocol.FLAG_NONE, protocol.CHANNEL_INTERACTIVE, view) is view
+    assert reassembler.feed(protocol.MSG_CHAT, protocol.FLAG_NONE, protocol.CHANNEL_BULK, b"end") == b"big-end"
+    print("✓ Whole frames pass through untouched")
+
+
+def test_budget_drops_oversized_message():
+    """Test that a message over the budget is dropped without holding its bytes."""
+    reassembler = Reassembler(budget=2500)
+    frames = list(fragment_frames(Frame(protocol.MSG_CHAT, b"x" * 5000), 1000))
+    results = [reassembler.feed(frame.msg_type, frame.flags, frame.channel, frame.parts[0])
+               for frame in frames]
+    assert results == [None] * 5
+    assert reassembler.buffered == 0 and not reassembler.partial
+    
+    # The next message is unaffected
+    assert reassembler.feed(protocol.MSG_CHAT, protocol.FLAG_NONE, protocol.CHANNEL_INTERACTIVE, b"ok") == b"ok"
+    print("✓ Over-budget messages are dropped")
+
+
+def test_streaming_types_skip_reassembly():
+    """Test that streaming message types hand every sub-frame straight through."""
+    reassembler = Reassembler(streaming_types={protocol.MSG_FILE_CHUNK})
+    frames = list(fragment_frames(Frame(protocol.MSG_FILE_CHUNK, b"abcdef", channel=protocol.CHANNEL_BULK), 2))
+    results = [bytes(reassembler.feed(frame.msg_type, frame.flags, frame.channel, frame.parts[0]))
+               for frame in frames]
+    assert results == [b"ab", b"cd", b"ef"]
+    assert reassembler.buffered == 0
+    print("✓ Streaming types skip reassembly")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Reassembly Tests")
+    print("=" * 40)
+    test_split_and_reassemble()
+    test_whole_frames_pass_through()
+    test_budget_drops_oversized_message()
+    test_streaming_types_skip_reassembly()
+    print("🎉 All reassembly tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for the message type registry.
+Checks routing, lazy decoding and registration rules.
+"""
+
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network import protocol
+from network.registry import MessageRegistry
+
+
+def test_dispatch_decodes_and_handles():
+    """Test that a registered type is decoded and handed to its handler."""
+    received = []
+    registry = MessageRegistry()
+    registry.register(protocol.MSG_CHAT, received.append, decoder=protocol.decode_chat)
+    registry.register(protocol.MSG_FILE_CHUNK, received.append)
+    
+    assert registry.dispatch(protocol.MSG_CHAT, protocol.encode_chat("hello"))
+    assert registry.dispatch(protocol.MSG_FILE_CHUNK, b"raw")
+    assert received == ["hello", b"raw"]
+    print("✓ Registered types are decoded and handled")
+
+
+def test_unknown_types_are_not_decoded():
+    """Test that unregistered types are never parsed."""
+    decoded = []
+    registry = MessageRegistry()
+    registry.register(protocol.MSG_CHAT, lambda item: None, decoder=decoded.append)
+    
+    assert not registry.dispatch(protocol.MSG_STROKE_SEGMENT, b"\xff garbage")
+    assert not registry.dispatch(0xFF, b"")
+    assert decoded == []
+    
+    registry.unregister(protocol.MSG_CHAT)
+    assert not registry.is_registered(protocol.MSG_CHAT)
+    assert not registry.dispatch(protocol.MSG_CHAT, protocol.encode_chat("ignored"))
+    assert decoded == []
+    print("✓ Unknown types are never decoded")
+
+
+def test_registration_rules():
+    """Test that clashing or out-of-range type IDs are rejected."""
+    registry = MessageRegistry()
+    registry.register(protocol.MSG_CHAT, print)
+    for msg_type in (protocol.MSG_CHAT, 0x100, -1):
+        try:
+            registry.register(msg_type, print)
+            assert False, f"type {msg_type} should be rejected"
+        except ValueError:
+            pass
+    print("✓ Clashing and out-of-range types are rejected")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Message Registry Tests")
+    print("=" * 40)
+    test_dispatch_decodes_and_handles()
+    test_unknown_types_are_not_decoded()
+    test_registration_rules()
+    print("🎉 All message registry tests passed!")
+
+
+if __name__ == "__main__":
+    main()
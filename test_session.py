@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for reliable session state.
+Checks numbering, acknowledgements and the resume handshake.
+"""
+
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network import protocol
+from network.outbound import Frame
+from network.session import Session
+
+
+def handshake(a, b):
+    """Swap hellos between two sessions and return what each decided."""
+    hello_a, hello_b = a.hello(), b.hello()
+    return a.resume(hello_b), b.resume(hello_a)
+
+
+def test_acknowledge_releases_frames():
+    """Test that cumulative acks drop every frame up to the acked sequence."""
+    session = Session()
+    frames = [Frame(protocol.MSG_CHAT, b"x" * 10) for _ in range(5)]
+    assert [session.number(frame) for frame in frames] == [1, 2, 3, 4, 5]
+    assert session.unacked_bytes == 5 * frames[0].size
+    
+    session.acknowledge(3)
+    assert [seq for seq, _ in session.unacked] == [4, 5]
+    assert session.unacked_bytes == 2 * frames[0].size
+    print("✓ Cumulative acks release frames")
+
+
+def test_resume_replays_only_missing_frames():
+    """Test that a resumed session keeps exactly the frames the peer missed."""
+    a, b = Session(), Session()
+    assert handshake(a, b) == (False, False)
+    
+    for _ in range(5):
+        a.number(Frame(protocol.MSG_CHAT, b"hi"))
+    # The connection drops after the peer has read three frames
+    for seq in (1, 2, 3):
+        b.receive(seq)
+        
+    assert handshake(a, b) == (True, True)
+    assert [seq for seq, _ in a.unacked] == [4, 5]
+    print("✓ Resume replays only missing frames")
+
+
+def test_restarted_peer_starts_new_session():
+    """Test that a peer with a new session id resets both sides."""
+    a, b = Session(), Session()
+    handshake(a, b)
+    a.number(Frame(protocol.MSG_CHAT, b"lost"))
+    b.receive(1)
+    
+    restarted = Session()
+    assert handshake(a, restarted) == (False, False)
+    assert not a.unacked and a.next_seq == 1 and a.received_seq == 0
+    print("✓ Restarted peer starts a new session")
+
+
+def test_sequence_gap_rejected():
+    """Test that a gap in incoming sequence numbers is an error."""
+    session = Session()
+    session.receive(1)
+    try:
+        session.receive(3)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("gap was accepted")
+    
+    # Wire sequence numbers wrap at 32 bits
+    session.received_seq = 0xFFFFFFFF
+    session.receive(0)
+    assert session.received_seq == 0x100000000
+    print("✓ Sequence gaps are rejected")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Session Tests")
+    print("=" * 40)
+    test_acknowledge_releases_frames()
+    test_resume_replays_only_missing_frames()
+    test_restarted_peer_starts_new_session()
+    test_sequence_gap_rejected()
+    print("🎉 All session tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test script for link statistics.
+Checks the RTT, jitter and throughput estimators.
+"""
+
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network.stats import LinkStats
+
+
+def test_rtt_smoothing():
+    """Test that RTT is seeded by the first sample and then smoothed."""
+    stats = LinkStats()
+    stats.record_rtt(0.100)
+    assert stats.rtt == 0.100 and stats.jitter == 0.0
+    stats.record_rtt(0.180)
+    assert abs(stats.rtt - 0.110) < 1e-9
+    assert abs(stats.jitter - 0.005) < 1e-9
+    print("✓ RTT and jitter are smoothed")
+
+
+def test_throughput_sampling():
+    """Test that rates are measured per direction over each interval."""
+    stats = LinkStats()
+    stats.sample_rates(10.0)
+    stats.record_sent(3000)
+    stats.record_received(500)
+    stats.sample_rates(12.0)
+    assert stats.send_rate == 1500 and stats.receive_rate == 250
+    
+    snapshot = stats.snapshot()
+    assert snapshot['bytes_sent'] == 3000 and snapshot['rtt_ms'] is None
+    print("✓ Throughput is sampled per direction")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Link Stats Tests")
+    print("=" * 40)
+    test_rtt_smoothing()
+    test_throughput_sampling()
+    print("🎉 All link stats tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test script for the compact stroke codec.
+Verifies round-trips and reports encoded size and speed when run directly.
+"""
+
+import sys
+import os
+import math
+import random
+import timeit
+from array import array
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network.stroke_codec import StrokePalette, encode_stroke, decode_stroke
+
+
+def freehand_stroke(stroke_id=1, count=200, color='#336699', width=3):
+    """Build a smooth, jittery stroke like one drawn with a mouse."""
+    rng = random.Random(stroke_id)
+    points = array('i')
+    x, y = 400.0, 300.0
+    for i in range(count):
+        x += 3 * math.cos(i / 15) + rng.uniform(-1, 1)
+        y += 3 * math.sin(i / 11) + rng.uniform(-1, 1)
+        points.extend((int(x), int(y)))
+    return {
+        'type': 'stroke_segment',
+        'stroke_id': stroke_id,
+        'color': color,
+        'width': width,
+        'points': points
+    }
+
+
+def test_round_trip():
+    """Test that strokes decode to exactly what was encoded."""
+    send_palette = StrokePalette()
+    receive_palette = StrokePalette()
+    for stroke_id in range(1, 6):
+        segment = freehand_stroke(stroke_id)
+        assert decode_stroke(encode_stroke(segment, send_palette), receive_palette) == segment
+    print("✓ Freehand strokes round-trip")
+
+
+def test_extreme_coordinates():
+    """Test negative, large and single-point strokes."""
+    send_palette = StrokePalette()
+    receive_palette = StrokePalette()
+    for points in ([0, 0], [-1, -1, 1, 1], [2**31 - 1, -2**31, -2**31, 2**31 - 1]):
+        segment = {
+            'type': 'stroke_segment',
+            'stroke_id': 2**32 - 1,
+            'color': '#ffffff',
+            'width': 50,
+            'points': array('i', points)
+        }
+        assert decode_stroke(encode_stroke(segment, send_palette), receive_palette) == segment
+    print("✓ Extreme coordinates round-trip")
+
+
+def test_palette_interning():
+    """Test that a style is only sent in full the first time it is used."""
+    send_palette = StrokePalette()
+    receive_palette = StrokePalette()
+    first = encode_stroke(freehand_stroke(1, color='#ff8800', width=7), send_palette)
+    second = encode_stroke(freehand_stroke(1, color='#ff8800', width=7), send_palette)
+    assert len(second) < len(first)
+    decode_stroke(first, receive_palette)
+    assert decode_stroke(second, receive_palette)['color'] == '#ff8800'
+    
+    # A peer that missed the definition cannot decode the reference
+    try:
+        decode_stroke(second, StrokePalette())
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Undefined palette index was accepted")
+        
+    # Self-contained segments redefine their style on any receiving palette
+    relayed = encode_stroke(freehand_stroke(1, color='#123456', width=2), StrokePalette())
+    assert decode_stroke(relayed, receive_palette)['color'] == '#123456'
+    assert decode_stroke(relayed, receive_palette)['width'] == 2
+    print("✓ Palette interning works")
+
+
+def test_compact_size():
+    """Test that freehand strokes take a few bytes per point."""
+    segment = freehand_stroke(count=1000)
+    palette = StrokePalette()
+    encode_stroke(segment, palette)
+    encoded = encode_stroke(segment, palette)
+    assert len(encoded) / 1000 <= 2.5
+    print(f"✓ Freehand stroke encodes at {len(encoded) / 1000:.2f} bytes per point")
+
+
+def test_truncated_payload():
+    """Test that a truncated payload is rejected instead of over-allocating."""
+    encoded = encode_stroke(freehand_stroke(count=100), StrokePalette())
+    try:
+        decode_stroke(encoded[:20], StrokePalette())
+    except (ValueError, IndexError):
+        pass
+    else:
+        raise AssertionError("Truncated payload was accepted")
+    print("✓ Truncated payload rejected")
+
+
+def benchmark():
+    """Report encoded size and encode/decode throughput against fixed int32 pairs."""
+    segment = freehand_stroke(count=1000)
+    send_palette = StrokePalette()
+    receive_palette = StrokePalette()
+    # Define the style once so the timed strokes only carry a palette reference
+    decode_stroke(encode_stroke(segment, send_palette), receive_palette)
+    encoded = encode_stroke(segment, send_palette)
+    
+    runs = 200
+    encode_time = timeit.timeit(lambda: encode_stroke(segment, send_palette), number=runs) / runs
+    decode_time = timeit.timeit(lambda: decode_stroke(encoded, receive_palette), number=runs) / runs
+    
+    print(f"Points per stroke:   1000")
+    print(f"int32 pairs:         {len(segment['points']) * 4} bytes")
+    print(f"Varint deltas:       {len(encoded)} bytes ({len(encoded) / 1000:.2f} bytes/point)")
+    print(f"Encode:              {encode_time * 1e6:.0f} µs ({1000 / encode_time / 1e6:.2f} M points/s)")
+    print(f"Decode:              {decode_time * 1e6:.0f} µs ({1000 / decode_time / 1e6:.2f} M points/s)")
+
+
+def main():
+    """Run all tests, then the microbenchmark."""
+    print("Vortex Tunnel - Stroke Codec Tests")
+    print("=" * 40)
+    test_round_trip()
+    test_extreme_coordinates()
+    test_palette_interning()
+    test_compact_size()
+    test_truncated_payload()
+    print("🎉 All stroke codec tests passed!")
+    print(f"\n{'='*20} Benchmark {'='*20}")
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for the compact stroke store.
+Checks that stored segments come back intact and stay small.
+"""
+
+import sys
+import os
+import tracemalloc
+from array import array
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from tabs.stroke_store import StrokeStore, unpack_segment
+
+
+def segment(stroke_id, points, color='#ff8000', width=4):
+    """Return a stroke segment operation."""
+    return {'type': 'stroke_segment', 'stroke_id': stroke_id, 'color': color, 'width': width, 'points': points}
+
+
+def test_round_trip_and_widening():
+    """Test that segments come back as stored, including after coordinates outgrow 16 bits."""
+    store = StrokeStore()
+    small = store.add(segment(1, [0, 0, 10, -20, 300, 400]))
+    same_style = store.add(segment(2, array('i', [5, 5])))
+    assert store.coords.typecode == 'h' and small.style == same_style.style
+    
+    far = store.add(segment(3, [100000, -70000, 100001, -70001], color='#000000', width=1))
+    assert store.coords.typecode == 'i' and far.style != small.style
+    assert store.segment(small) == segment(1, array('i', [0, 0, 10, -20, 300, 400]))
+    assert list(store.points(same_style)) == [5, 5]
+    assert store.segment(far) == segment(3, array('i', [100000, -70000, 100001, -70001]), '#000000', 1)
+    assert len(store) == 6
+    print("✓ Segments come back as stored")
+
+
+def test_pack():
+    """Test that packed segments unpack to the same dict and reject truncated data."""
+    store = StrokeStore()
+    for points in ([1, 2, 3, 4], [40000, 2, 3, 4]):
+        stroke = store.add(segment(7, points))
+        data = store.pack(stroke)
+        assert unpack_segment(data) == store.segment(stroke)
+        try:
+            unpack_segment(data[:-1])
+            assert False, "truncated stroke accepted"
+        except ValueError:
+            pass
+    print("✓ Segments pack to bytes and back")
+
+
+def test_million_points_memory():
+    """Test that a million points in ten thousand segments take single-digit megabytes."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = StrokeStore()
+    headers = []
+    for stroke_id in range(10000):
+        points = [stroke_id % 2000 + i for i in range(200)]
+        headers.append(store.add(segment(stroke_id, points, width=stroke_id % 8 + 1)))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert len(store) == 1000000
+    assert used < 10 * 1024 * 1024, used
+    assert store.memory_used() < 10 * 1024 * 1024
+    print(f"✓ A million points take {used / (1024 * 1024):.1f} MB")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Stroke Store Tests")
+    print("=" * 40)
+    test_round_trip_and_widening()
+    test_pack()
+    test_million_points_memory()
+    print("🎉 All stroke store tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for Tailscale status probing.
+Runs the probe against a stub tailscale executable.
+"""
+
+import sys
+import os
+import asyncio
+import json
+import stat
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network.tailscale_status import TailscaleProbe, TailscaleStatus
+
+
+STATUS = {
+    'BackendState': 'Running',
+    'Self': {'HostName': 'desk', 'DNSName': 'desk.tail1234.ts.net.', 'TailscaleIPs': ['100.93.161.73'], 'Online': True},
+    'Peer': {
+        'nodekey:a': {'HostName': 'laptop', 'DNSName': 'laptop.tail1234.ts.net.',
+                      'TailscaleIPs': ['100.122.120.65', 'fd7a:115c:a1e0::1'], 'Online': True,
+                      'CurAddr': '203.0.113.5:41641', 'Relay': 'lhr'},
+        'nodekey:b': {'HostName': 'phone', 'DNSName': 'phone.tail1234.ts.net.',
+                      'TailscaleIPs': ['100.101.1.2'], 'Online': False, 'CurAddr': '', 'Relay': 'fra'}
+    }
+}
+
+
+def write_stub(directory, body):
+    """Write an executable stub tailscale that runs the given Python body."""
+    path = os.path.join(directory, 'tailscale')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"#!{sys.executable}\nimport sys, time\n{body}\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def stub_printing(directory, status):
+    """Write a stub that logs each call and prints a status."""
+    calls = os.path.join(directory, 'calls')
+    return write_stub(directory, (
+        f"open({calls!r}, 'a').write('x')\n"
+        f"assert sys.argv[1:] == ['status', '--json']\n"
+        f"print({json.dumps(status)!r})"
+    )), calls
+
+
+def test_parse_status():
+    """Test that the JSON status becomes a peer table."""
+    status = TailscaleStatus.from_json(STATUS)
+    assert status.running
+    assert status.self_node.host_name == 'desk'
+    laptop = status.find_peer('laptop')
+    assert laptop.addresses[0] == '100.122.120.65'
+    assert laptop.online and laptop.direct
+    assert status.find_peer('laptop.tail1234.ts.net') is laptop
+    assert status.find_peer('100.122.120.65') is laptop
+    phone = status.find_peer('PHONE')
+    assert not phone.online and not phone.direct and phone.relay == 'fra'
+    assert status.find_peer('100.64.0.1') is None
+    assert status.online_peers() == [laptop]
+    assert not TailscaleStatus.from_json({'BackendState': 'Stopped'}).running
+    print("✓ Status JSON is parsed into a peer table")
+
+
+def test_probe_caches_and_shares():
+    """Test that the stub runs once for concurrent and repeated requests within the TTL."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        stub, calls = stub_printing(temp_dir, STATUS)
+        probe = TailscaleProbe(paths=[os.path.join(temp_dir, 'missing'), stub], ttl=60)
+        
+        async def run():
+            first, second = await asyncio.gather(probe.get_status(), probe.get_status())
+            third = await probe.get_status()
+            return first, second, third
+            
+        first, second, third = asyncio.run(run())
+        assert first.running and first is second is third
+        assert probe.executable == stub
+        with open(calls) as f:
+            assert f.read() == 'x'
+            
+        probe.invalidate()
+        assert asyncio.run(probe.get_status()).find_peer('laptop')
+        with open(calls) as f:
+            assert f.read() == 'xx'
+    print("✓ Probe results are cached and shared")
+
+
+def test_probe_failures():
+    """Test that a missing, hanging or broken CLI reports Tailscale as not running."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        probe = TailscaleProbe(paths=[os.path.join(temp_dir, 'missing')])
+        assert not asyncio.run(probe.get_status()).running
+        assert probe.executable is None
+        
+        hanging = write_stub(temp_dir, "time.sleep(30)")
+        probe = TailscaleProbe(paths=[hanging], timeout=0.2)
+        assert not asyncio.run(probe.get_status()).running
+        
+        broken = write_stub(temp_dir, "print('not json')")
+        probe = TailscaleProbe(paths=[broken])
+        assert not asyncio.run(probe.get_status()).running
+    print("✓ Probe failures report Tailscale as not running")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Tailscale Status Tests")
+    print("=" * 40)
+    test_parse_status()
+    test_probe_caches_and_shares()
+    test_probe_failures()
+    print("🎉 All Tailscale status tests passed!")
+
+
+if __name__ == "__main__":
+    main()
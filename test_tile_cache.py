@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for the canvas tile cache.
+Uses byte-array tiles so the cache can be exercised without Qt.
+"""
+
+import sys
+import os
+import subprocess
+import zlib
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from tabs.tile_cache import TileCache, tiles_covering
+
+
+TILE_BYTES = 64 * 64
+
+
+def make_cache(**kwargs):
+    """Return a cache of blank byte-array tiles, compressed with zlib."""
+    return TileCache(
+        lambda: bytearray(TILE_BYTES),
+        lambda tile: zlib.compress(bytes(tile)),
+        lambda data: bytearray(zlib.decompress(data)),
+        TILE_BYTES, **kwargs
+    )
+
+
+def test_tiles_covering():
+    """Test that an area maps to the tiles it touches, including negative coordinates."""
+    assert list(tiles_covering((0, 0, 256, 256), 256)) == [(0, 0)]
+    assert list(tiles_covering((250, 10, 10, 10), 256)) == [(0, 0), (1, 0)]
+    assert list(tiles_covering((-5, -5, 10, 10), 256)) == [(-1, -1), (0, -1), (-1, 0), (0, 0)]
+    assert list(tiles_covering((0, 0, 0, 10), 256)) == []
+    print("✓ Areas map to the tiles they touch")
+
+
+def test_lazy_allocation_and_lru():
+    """Test that tiles are made on first touch and the least recently used are evicted."""
+    cache = make_cache(budget=2 * TILE_BYTES, spill=False)
+    assert cache.get((5, 5)) is None and len(cache) == 0
+    
+    a = cache.get((0, 0), create=True)
+    a[0] = 1
+    cache.get((1, 0), create=True)[0] = 2
+    cache.get((0, 0))
+    cache.get((2, 0), create=True)[0] = 3
+    assert len(cache.live) == 3
+    cache.trim()
+    # (1, 0) was used longest ago
+    assert list(cache.live) == [(0, 0), (2, 0)] and list(cache.cold) == [(1, 0)]
+    assert cache.memory_used() < 3 * TILE_BYTES
+    
+    # An evicted tile comes back with its pixels
+    assert cache.get((1, 0))[0] == 2
+    cache.trim()
+    assert (1, 0) in cache.live and (0, 0) in cache.cold
+    assert len(cache) == 3
+    
+    cache.clear()
+    assert len(cache) == 0 and cache.memory_used() == 0
+    print("✓ Tiles are allocated lazily and evicted least recently used")
+
+
+def test_spill_to_disk():
+    """Test that compressed tiles beyond the cold budget move to disk and come back."""
+    cache = make_cache(budget=TILE_BYTES, cold_budget=1)
+    for column in range(4):
+        cache.get((column, 0), create=True)[0] = column + 10
+        cache.trim()
+    assert len(cache.live) == 1 and not cache.cold
+    assert cache.spilled == {(0, 0), (1, 0), (2, 0)}
+    spill_dir = cache.spill_dir
+    assert len(os.listdir(spill_dir)) == 3
+    
+    assert cache.get((1, 0))[0] == 11
+    assert (1, 0) not in cache.spilled and len(os.listdir(spill_dir)) == 2
+    cache.clear()
+    assert not os.path.exists(spill_dir)
+    
+    # A cache never cleared still removes its spill directory at exit
+    script = (
+        "import sys; sys.path.insert(0, 'src')\n"
+        "from test_tile_cache import make_cache, TILE_BYTES\n"
+        "cache = make_cache(budget=TILE_BYTES, cold_budget=1)\n"
+        "for column in range(2):\n"
+        "    cache.get((column, 0), create=True)\n"
+        "    cache.trim()\n"
+        "print(cache.spill_dir)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    ).stdout
+    assert 'vortex-tiles-' in output and not os.path.exists(output.strip())
+    print("✓ Cold tiles spill to disk and come back")
+
+
+def test_rebuild_dropped():
+    """Test that with a rebuild source, cold tiles are dropped and painted back on demand."""
+    rebuilt = []
+    
+    def rebuild(key, tile):
+        rebuilt.append(key)
+        tile[0] = key[0] + 10
+        
+    cache = make_cache(budget=TILE_BYTES, cold_budget=1, rebuild=rebuild)
+    for column in range(3):
+        cache.get((column, 0), create=True)[0] = column + 10
+        cache.trim()
+    assert cache.dropped == {(0, 0), (1, 0)} and not cache.spilled and cache.spill_dir is None
+    assert (0, 0) in cache and len(cache) == 3
+    
+    assert cache.get((1, 0))[0] == 11 and rebuilt == [(1, 0)]
+    assert (1, 0) not in cache.dropped
+    cache.clear()
+    assert len(cache) == 0
+    print("✓ Dropped tiles are rebuilt from their source")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Tile Cache Tests")
+    print("=" * 40)
+    test_tiles_covering()
+    test_lazy_allocation_and_lru()
+    test_spill_to_disk()
+    test_rebuild_dropped()
+    print("🎉 All tile cache tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Test script for the asyncio transport engine.
+Runs peer connections over a local socket pair on the engine's loop.
+"""
+
+import sys
+import os
+import asyncio
+import random
+import socket
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from network import protocol
+from network.outbound import Frame, OutboundQueue
+from network.session import Session
+from network.stats import LinkStats
+from network.transport import FrameProtocol, NetworkEngine, PeerConnection, exchange_hello, race_connect
+
+
+async def open_protocol(sock, **kwargs):
+    """Wrap a connected socket in a FrameProtocol."""
+    _, connection = await asyncio.get_running_loop().create_connection(
+        lambda: FrameProtocol(**kwargs), sock=sock
+    )
+    return connection
+
+
+async def open_pair(on_frame, on_closed=None):
+    """Return two PeerConnections joined by a socket pair."""
+    left, right = socket.socketpair()
+    connections = []
+    for sock in (left, right):
+        connection = PeerConnection(await open_protocol(sock), OutboundQueue(), on_frame, on_closed=on_closed)
+        connection.task = asyncio.ensure_future(connection.run())
+        connections.append(connection)
+    return connections
+
+
+class IdleTransport:
+    """Stands in for the socket transport when feeding FrameProtocol by hand."""
+    
+    def __init__(self):
+        self.closing = False
+        
+    def is_closing(self):
+        return self.closing
+        
+    def close(self):
+        self.closing = True
+
+
+def feed(connection, data, sizes):
+    """Push data through get_buffer/buffer_updated in reads of the given sizes."""
+    offset = 0
+    while offset < len(data):
+        buffer = connection.get_buffer(-1)
+        count = min(len(buffer), next(sizes), len(data) - offset)
+        buffer[:count] = data[offset:offset + count]
+        connection.buffer_updated(count)
+        offset += count
+
+
+def test_receive_buffer_reassembles_frames():
+    """Test that frames split at any byte, including inside headers, come out whole."""
+    async def receive():
+        rng = random.Random(7)
+        payloads = [os.urandom(rng.choice([0, 1, 5, 30, 52, 200, 1000])) for _ in range(200)]
+        wire = b''.join(
+            protocol.encode_header(protocol.MSG_CHAT, len(payload), seq=i) + payload
+            for i, payload in enumerate(payloads)
+        )
+        for read_size in (1, 3, 11, 64, 4096):
+            # A 64-byte buffer forces compaction and dedicated buffers for large frames
+            connection = FrameProtocol(buffer_size=64)
+            connection.connection_made(IdleTransport())
+            received = []
+            connection.set_handler(lambda msg_type, flags, channel, seq, payload:
+                                   received.append((seq, bytes(payload))))
+            sizes = iter(lambda: rng.randint(1, read_size), None)
+            feed(connection, wire, sizes)
+            assert received == list(enumerate(payloads)), f"read size {read_size}"
+            assert not connection.transport.closing
+            
+    asyncio.run(receive())
+    print("✓ Receive buffer reassembles split frames")
+
+
+def test_oversized_frame_rejected():
+    """Test that a header announcing more than the frame limit closes the connection."""
+    async def receive():
+        connection = FrameProtocol(max_frame_size=1024)
+        connection.connection_made(IdleTransport())
+        connection.set_handler(lambda *frame: None)
+        feed(connection, protocol.encode_header(protocol.MSG_CHAT, 1 << 30), iter(lambda: 4096, None))
+        assert connection.transport.closing
+        assert isinstance(connection.closed.result(), ValueError)
+        # Nothing was allocated for the announced payload
+        assert connection.large is None
+        
+    asyncio.run(receive())
+    print("✓ Oversized frames are rejected")
+
+
+def test_connection_preserves_frames():
+    """Test that frames and streams arrive complete and in order per channel."""
+    engine = NetworkEngine()
+    received = []
+    
+    async def exchange():
+        done = asyncio.Event()
+        
+        def on_frame(msg_type, flags, channel, payload):
+            received.append((msg_type, bytes(payload)))
+            if len(received) == 3:
+                done.set()
+                
+        left, right = await open_pair(on_frame)
+        big = os.urandom(512 * 1024)
+        left.queue.put(Frame(protocol.MSG_CHAT, b"hello"))
+        left.queue.put(iter([Frame(protocol.MSG_FILE_CHUNK, (b"ab", memoryview(big)), channel=protocol.CHANNEL_BULK)]))
+        left.queue.put(Frame(protocol.MSG_CHAT, b"bye"))
+        await asyncio.wait_for(done.wait(), 5)
+        left.close()
+        right.close()
+        return big
+        
+    big = engine.submit(exchange()).result(timeout=10)
+    assert [frame for frame in received if frame[0] == protocol.MSG_CHAT] == [
+        (protocol.MSG_CHAT, b"hello"), (protocol.MSG_CHAT, b"bye")
+    ]
+    assert (protocol.MSG_FILE_CHUNK, b"ab" + big) in received
+    engine.stop()
+    print("✓ Connection preserves frame boundaries")
+
+
+def test_send_from_another_thread():
+    """Test that a frame queued off the loop thread wakes the write loop."""
+    engine = NetworkEngine()
+    received = []
+    arrived = []
+    
+    async def setup():
+        done = asyncio.Event()
+        arrived.append(done)
+        
+        def on_frame(msg_type, flags, channel, payload):
+            received.append(bytes(payload))
+            done.set()
+            
+        return await open_pair(on_frame)
+        
+    left, right = engine.submit(setup()).result(timeout=5)
+    # Queued from this (non-loop) thread, as the GUI does
+    assert left.queue.put(Frame(protocol.MSG_CHAT, b"from the gui"))
+    engine.submit(asyncio.wait_for(arrived[0].wait(), 5)).result(timeout=10)
+    assert received == [b"from the gui"]
+    engine.call_soon(left.close)
+    engine.call_soon(right.close)
+    engine.stop()
+    print("✓ Frames queued from other threads are sent")
+
+
+def test_peer_close_reported():
+    """Test that closing one side reports the connection closed on the other."""
+    engine = NetworkEngine()
+    
+    async def close_one_side():
+        closed = asyncio.get_running_loop().create_future()
+        
+        def on_closed(connection):
+            if not closed.done():
+                closed.set_result(connection)
+                
+        left, right = await open_pair(lambda *frame: None, on_closed=on_closed)
+        left.close()
+        connection = await asyncio.wait_for(closed, 5)
+        return connection is left or connection is right
+        
+    assert engine.submit(close_one_side()).result(timeout=10)
+    engine.stop()
+    print("✓ Peer close is reported")
+
+
+def test_session_resumes_without_loss():
+    """Test that frames sent across a reconnect arrive once each, in order."""
+    sessions = (Session(), Session())
+    queues = (OutboundQueue(), OutboundQueue())
+    received = []
+    
+    async def connect(on_frame):
+        left, right = socket.socketpair()
+        streams = [await open_protocol(sock) for sock in (left, right)]
+        resumed = await asyncio.gather(*(
+            exchange_hello(stream, session) for stream, session in zip(streams, sessions)
+        ))
+        connections = []
+        for stream, queue, session in zip(streams, queues, sessions):
+            connection = PeerConnection(stream, queue, on_frame, session=session)
+            connection.task = asyncio.ensure_future(connection.run())
+            connections.append(connection)
+        return resumed, connections
+        
+    async def scenario():
+        arrived = asyncio.Event()
+        
+        def on_frame(msg_type, flags, channel, payload):
+            received.append(bytes(payload))
+            if len(received) in (5, 8):
+                arrived.set()
+                
+        resumed, connections = await connect(on_frame)
+        assert resumed == [False, False]
+        for i in range(5):
+            queues[0].put(Frame(protocol.MSG_CHAT, b"%d" % i))
+        await asyncio.wait_for(arrived.wait(), 5)
+        arrived.clear()
+        # Drop the link before the delayed ack goes out, then keep sending
+        for connection in connections:
+            connection.close()
+        assert sessions[0].unacked
+        for i in range(5, 8):
+            queues[0].put(Frame(protocol.MSG_CHAT, b"%d" % i))
+            
+        resumed, connections = await connect(on_frame)
+        assert resumed == [True, True]
+        await asyncio.wait_for(arrived.wait(), 5)
+        await asyncio.sleep(0.2)
+        for connection in connections:
+            connection.close()
+            
+    asyncio.run(scenario())
+    assert received == [b"%d" % i for i in range(8)]
+    assert not sessions[0].unacked
+    print("✓ Session resumes without loss or duplicates")
+
+
+def test_heartbeat_measures_rtt():
+    """Test that pings are answered and produce RTT samples."""
+    stats = LinkStats()
+    updates = []
+    
+    async def ping():
+        left, right = socket.socketpair()
+        connections = []
+        for sock, link_stats in ((left, stats), (right, None)):
+            connection = PeerConnection(
+                await open_protocol(sock), OutboundQueue(), lambda *frame: None,
+                stats=link_stats, on_stats=updates.append, heartbeat_interval=0.05
+            )
+            connection.task = asyncio.ensure_future(connection.run())
+            connections.append(connection)
+        await asyncio.sleep(0.3)
+        for connection in connections:
+            connection.close()
+            
+    asyncio.run(ping())
+    assert updates and stats.rtt is not None and stats.rtt < 0.1
+    assert stats.bytes_sent > 0 and stats.bytes_received > 0
+    print("✓ Heartbeat measures RTT")
+
+
+def test_heartbeat_drops_silent_peer():
+    """Test that a link with no traffic from the peer is closed."""
+    async def silent():
+        left, right = socket.socketpair()
+        closed = asyncio.get_running_loop().create_future()
+        connection = PeerConnection(
+            await open_protocol(left), OutboundQueue(), lambda *frame: None,
+            on_closed=closed.set_result, heartbeat_interval=0.05, heartbeat_timeout=0.2
+        )
+        connection.task = asyncio.ensure_future(connection.run())
+        # The other end is a raw socket that never answers
+        await asyncio.wait_for(closed, 2)
+        right.close()
+        
+    asyncio.run(silent())
+    print("✓ Heartbeat drops a silent peer")
+
+
+def free_port(host):
+    """Return a TCP port that is currently free on host."""
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def test_race_settles_on_one_connection():
+    """Test that two peers dialing each other at once keep the same connection."""
+    port_a = free_port('127.0.0.1')
+    port_b = free_port('127.0.0.2')
+    
+    async def race():
+        a = race_connect('127.0.0.2', port_b, listen_host='127.0.0.1', listen_port=port_a,
+                         local_host='127.0.0.1', timeout=5)
+        b = race_connect('127.0.0.1', port_a, listen_host='127.0.0.2', listen_port=port_b,
+                         local_host='127.0.0.2', timeout=5)
+        connection_a, connection_b = await asyncio.gather(a, b)
+        transport_a, transport_b = connection_a.transport, connection_b.transport
+        same = (transport_a.get_extra_info('sockname') == transport_b.get_extra_info('peername')
+                and transport_a.get_extra_info('peername') == transport_b.get_extra_info('sockname'))
+        connection_a.close()
+        connection_b.close()
+        return same
+        
+    assert asyncio.run(race())
+    print("✓ Simultaneous dial settles on one connection")
+
+
+def test_single_role_skips_grace():
+    """Test that a host-only or client-only side never waits for a duplicate that cannot come."""
+    port = free_port('127.0.0.1')
+    
+    async def one_way():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        # Dialing from the higher address loses the tie-break on both sides
+        host = race_connect('127.0.0.2', port, dial=False, listen_host='127.0.0.1', timeout=5, grace=5)
+        client = race_connect('127.0.0.1', port, listen=False, local_host='127.0.0.2', timeout=5, grace=5)
+        connection_host, connection_client = await asyncio.gather(host, client)
+        elapsed = loop.time() - started
+        connection_host.close()
+        connection_client.close()
+        return elapsed
+        
+    assert asyncio.run(one_way()) < 1
+    print("✓ Single-role connections skip the grace period")
+
+
+def test_dial_retries_until_listener_appears():
+    """Test that dialing backs off and connects once the peer starts listening."""
+    port = free_port('127.0.0.1')
+    
+    async def late_listener():
+        dial = asyncio.ensure_future(race_connect('127.0.0.1', port, listen=False, timeout=5))
+        await asyncio.sleep(0.3)
+        assert not dial.done()
+        accepted = asyncio.Event()
+        
+        def on_client(reader, writer):
+            accepted.set()
+            writer.close()
+            
+        server = await asyncio.start_server(on_client, '127.0.0.1', port)
+        connection = await dial
+        await asyncio.wait_for(accepted.wait(), 5)
+        connection.close()
+        server.close()
+        
+    asyncio.run(late_listener())
+    print("✓ Dialing retries until the listener appears")
+
+
+def main():
+    """Run all tests."""
+    print("Vortex Tunnel - Transport Tests")
+    print("=" * 40)
+    test_receive_buffer_reassembles_frames()
+    test_oversized_frame_rejected()
+    test_connection_preserves_frames()
+    test_send_from_another_thread()
+    test_peer_close_reported()
+    test_session_resumes_without_loss()
+    test_heartbeat_measures_rtt()
+    test_heartbeat_drops_silent_peer()
+    test_race_settles_on_one_connection()
+    test_single_role_skips_grace()
+    test_dial_retries_until_listener_appears()
+    print("🎉 All transport tests passed!")
+
+
+if __name__ == "__main__":
+    main()